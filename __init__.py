@@ -2,5 +2,7 @@
 # Part of Bangladesh HR Holidays Localization
 # Author: Kabir SE
 
+from . import controllers
 from . import models
-from . import wizard
\ No newline at end of file
+from . import wizard
+from .hooks import post_init_hook
\ No newline at end of file
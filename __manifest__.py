@@ -1,7 +1,7 @@
 # -*- coding: utf-8 -*-
 {
     'name': 'Enhanced Leave Management',
-    'version': '18.0.2.0.1',
+    'version': '18.0.2.3.0',
     'category': 'Human Resources/Time Off',
     'summary': 'Enhanced Leave Management with Recommendation, Forward, Sandwich Policy & Carryover',
     'description': """
@@ -10,13 +10,32 @@ Enhanced Leave Management Module
 Key Features:
 * Recommendation stage - Leave can be recommended before approval
 * Forward stage - Leave can be forwarded to higher authority
-* Configurable workflow per leave type
+* Configurable workflow per leave type, compiled into a cached transition table
+* SLA-based escalation of requests stuck in recommend/forward/approval
 * Security groups for Recommender and Forwarder roles
+* Date-bounded approval delegations with a fallback to the manager of absent approvers
+* Bulk recommender/forwarder/approver assignment by department, job or hierarchy
 * Sandwich leave policy - weekends/holidays between leaves count as leave
+* Background recomputation of sandwich durations with an audit of the deltas
+* Instant sandwich duration preview computed in the browser
 * Max days per year validation on allocations
 * Minimum notice days validation on leave requests
+* Maximum simultaneous absences per department, checked from per-day counters
 * Carryover functionality with expiry
+* FIFO consumption ledger booking validated leaves on allocations by expiry
+* Year-end balance projection (carryover, forfeited days, expiry exposure)
+* Policy what-if replay of a past year under a proposed leave type policy
+* Reversible archival of closed leave years into a yearly summary
+* Bulk creation of leaves for mandated closures (Eid, government holidays)
 * Refuse with reason functionality
+* Bulk JSON endpoint for recommend/forward/approve/refuse transitions
+* Streaming CSV/JSONL export of the leave workflow audit trail
+* Team availability API with per-day absence counts (sandwich days included)
+* Delta-sync API paging leave and allocation changes from an opaque token
+* Transactional outbox delivering leave and carryover events to downstream systems
+* Daily digest of pending leaves for approvers instead of a mail per leave
+* Leave dashboard loaded with a single aggregated call
+* Prometheus metrics endpoint for workflow queues and carryover jobs
 * Renamed "Time Off" to "Leaves" in menus
     """,
     'author': 'Kabir SE',
@@ -33,18 +52,37 @@ Key Features:
         
         # Data
         'data/ir_cron_data.xml',
+        'data/mail_template_data.xml',
         
         # Views
         'views/hr_leave_views.xml',
         'views/hr_leave_type_views.xml',
         'views/hr_employee_views.xml',
+        'views/hr_department_views.xml',
+        'views/hr_leave_delegation_views.xml',
+        'views/hr_leave_outbox_views.xml',
         'views/res_users_views.xml',
+        'views/hr_leave_sandwich_audit_views.xml',
+        'views/hr_leave_dashboard_views.xml',
+        'views/hr_leave_year_summary_views.xml',
+        'views/hr_leave_allocation_consumption_views.xml',
         'views/hr_holidays_menus.xml',
         
         # Wizards
         'wizard/hr_leave_refuse_wizard_views.xml',
         'wizard/hr_leave_carryover_wizard_views.xml',
+        'wizard/hr_leave_projection_wizard_views.xml',
+        'wizard/hr_leave_archive_wizard_views.xml',
+        'wizard/hr_leave_approver_assign_wizard_views.xml',
+        'wizard/hr_leave_closure_wizard_views.xml',
+        'wizard/hr_leave_policy_replay_wizard_views.xml',
     ],
+    'assets': {
+        'web.assets_backend': [
+            'l10n_bd_hr_holidays/static/src/components/**/*',
+        ],
+    },
+    'post_init_hook': 'post_init_hook',
     'installable': True,
     'auto_install':  False,
     'application': False,
@@ -0,0 +1,6 @@
+# -*- coding: utf-8 -*-
+from . import leave_workflow
+from . import leave_export
+from . import leave_availability
+from . import leave_metrics
+from . import leave_sync
\ No newline at end of file
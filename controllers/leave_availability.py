@@ -0,0 +1,18 @@
+# -*- coding: utf-8 -*-
+from odoo import http
+from odoo.http import request
+
+
+class LeaveAvailabilityController(http.Controller):
+
+    @http.route('/l10n_bd_hr_holidays/team_availability', type='json', auth='user', methods=['POST'])
+    def team_availability(self, date_from, date_to, department_id=False, employee_ids=None,
+                          include_pending=False, **kwargs):
+        """Per-day absence counts for a department or a set of employees"""
+        return request.env['hr.leave'].l10n_bd_get_team_availability(
+            date_from,
+            date_to,
+            department_id=department_id,
+            employee_ids=employee_ids,
+            include_pending=include_pending,
+        )
\ No newline at end of file
@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+import csv
+import io
+import json
+
+from werkzeug.exceptions import BadRequest, Forbidden
+
+from odoo import http, fields
+from odoo.http import request
+
+# Rows fetched from the server-side cursor per round trip
+EXPORT_CHUNK_SIZE = 2000
+
+EXPORT_COLUMNS = [
+    'leave_id', 'employee', 'leave_type', 'date_from', 'date_to', 'number_of_days', 'state',
+    'recommended_by', 'recommended_date', 'forwarded_by', 'forwarded_date',
+    'first_approver', 'second_approver', 'refuse_reason', 'refuse_notes',
+]
+
+EXPORT_QUERY = """
+    SELECT l.id,
+           emp.name,
+           COALESCE(lt.name->>%(lang)s, lt.name->>'en_US'),
+           l.request_date_from,
+           l.request_date_to,
+           l.number_of_days,
+           l.state,
+           rec_partner.name,
+           l.l10n_bd_recommended_date,
+           fwd_partner.name,
+           l.l10n_bd_forwarded_date,
+           first_approver.name,
+           second_approver.name,
+           l.l10n_bd_refuse_reason,
+           l.l10n_bd_refuse_notes
+      FROM hr_leave l
+      JOIN hr_employee emp ON emp.id = l.employee_id
+      JOIN hr_leave_type lt ON lt.id = l.holiday_status_id
+ LEFT JOIN res_users rec_user ON rec_user.id = l.l10n_bd_recommended_by
+ LEFT JOIN res_partner rec_partner ON rec_partner.id = rec_user.partner_id
+ LEFT JOIN res_users fwd_user ON fwd_user.id = l.l10n_bd_forwarded_by
+ LEFT JOIN res_partner fwd_partner ON fwd_partner.id = fwd_user.partner_id
+ LEFT JOIN hr_employee first_approver ON first_approver.id = l.first_approver_id
+ LEFT JOIN hr_employee second_approver ON second_approver.id = l.second_approver_id
+     WHERE l.company_id = ANY(%(company_ids)s)
+       AND l.request_date_to >= %(date_from)s
+       AND l.request_date_from <= %(date_to)s
+  ORDER BY l.id
+"""
+
+
+class LeaveExportController(http.Controller):
+
+    @http.route('/l10n_bd_hr_holidays/export/workflow_audit', type='http', auth='user', methods=['GET'])
+    def export_workflow_audit(self, date_from=None, date_to=None, export_format='csv', **kwargs):
+        """Stream the recommend/forward/approve/refuse trail of every leave in a date range"""
+        if not request.env.user.has_group('hr_holidays.group_hr_holidays_user'):
+            raise Forbidden()
+        if export_format not in ('csv', 'jsonl'):
+            raise BadRequest('export_format must be "csv" or "jsonl"')
+        try:
+            date_from = fields.Date.to_date(date_from) or fields.Date.to_date('1970-01-01')
+            date_to = fields.Date.to_date(date_to) or fields.Date.context_today(request.env.user)
+        except ValueError:
+            raise BadRequest('Dates must use the YYYY-MM-DD format')
+        
+        params = {
+            'lang': request.env.lang or 'en_US',
+            'company_ids': request.env.companies.ids,
+            'date_from': date_from,
+            'date_to': date_to,
+        }
+        rows = self._stream_rows(request.env.registry, params)
+        if export_format == 'csv':
+            body, mimetype = self._format_csv(rows), 'text/csv'
+        else:
+            body, mimetype = self._format_jsonl(rows), 'application/x-ndjson'
+        
+        filename = 'leave_workflow_audit_%s_%s.%s' % (date_from, date_to, export_format)
+        return http.Response(
+            body,
+            headers=[
+                ('Content-Type', '%s; charset=utf-8' % mimetype),
+                ('Content-Disposition', http.content_disposition(filename)),
+                ('Cache-Control', 'no-store'),
+            ],
+            direct_passthrough=True,
+        )
+
+    @staticmethod
+    def _stream_rows(registry, params):
+        """Yield export rows from a server-side cursor, EXPORT_CHUNK_SIZE at a time"""
+        # The request cursor is closed once the response is returned, so the
+        # generator works on its own read-only transaction.
+        with registry.cursor() as cr:
+            cr.execute('DECLARE l10n_bd_workflow_export NO SCROLL CURSOR FOR ' + EXPORT_QUERY, params)
+            while True:
+                cr.execute('FETCH FORWARD %s FROM l10n_bd_workflow_export', [EXPORT_CHUNK_SIZE])
+                chunk = cr.fetchall()
+                if not chunk:
+                    break
+                yield from chunk
+
+    @staticmethod
+    def _format_csv(rows):
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(EXPORT_COLUMNS)
+        for count, row in enumerate(rows, 1):
+            writer.writerow(['' if value is None else value for value in row])
+            if count % EXPORT_CHUNK_SIZE == 0:
+                yield buffer.getvalue().encode()
+                buffer.seek(0)
+                buffer.truncate()
+        yield buffer.getvalue().encode()
+
+    @staticmethod
+    def _format_jsonl(rows):
+        lines = []
+        for row in rows:
+            lines.append(json.dumps(dict(zip(EXPORT_COLUMNS, row)), default=str))
+            if len(lines) == EXPORT_CHUNK_SIZE:
+                yield ('\n'.join(lines) + '\n').encode()
+                lines = []
+        if lines:
+            yield ('\n'.join(lines) + '\n').encode()
\ No newline at end of file
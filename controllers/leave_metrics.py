@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+import hmac
+import json
+
+from werkzeug.exceptions import Forbidden
+
+from odoo import http
+from odoo.http import request
+
+from ..tools import metrics
+
+# Jobs whose runs are recorded by hr.leave.allocation._l10n_bd_record_run_metrics
+RUN_METRIC_JOBS = ['expire_carryover', 'carryover']
+
+# States of the hr_leave_l10n_bd_waiting_state_idx partial index: the gauge
+# stays an index-only count whatever the history kept in the table. Leaves
+# leaving the workflow are counted by l10n_bd_leave_transitions_total.
+WAITING_STATES = ('confirm', 'recommend', 'forward', 'validate1')
+
+
+class LeaveMetricsController(http.Controller):
+
+    @http.route('/l10n_bd_hr_holidays/metrics', type='http', auth='public', methods=['GET'], csrf=False, save_session=False)
+    def metrics(self, token=None, **kwargs):
+        """Leave workflow health in the Prometheus text format"""
+        ICP = request.env['ir.config_parameter'].sudo()
+        expected = ICP.get_param('l10n_bd_hr_holidays.metrics_token')
+        provided = token or request.httprequest.headers.get('Authorization', '').removeprefix('Bearer ')
+        # The endpoint is disabled until a token is configured
+        if not expected or not hmac.compare_digest(expected, provided or ''):
+            raise Forbidden()
+        
+        cr = request.env.cr
+        # All served by partial/boolean indexes; waiting leaves are never archived
+        cr.execute("SELECT state, count(*) FROM hr_leave WHERE state IN %s GROUP BY state", [WAITING_STATES])
+        state_counts = cr.fetchall()
+        cr.execute("SELECT count(*) FROM hr_leave WHERE l10n_bd_escalation_deadline <= now() AT TIME ZONE 'UTC'")
+        overdue = cr.fetchone()[0]
+        cr.execute("SELECT count(*) FROM hr_leave WHERE l10n_bd_sandwich_dirty")
+        sandwich_pending = cr.fetchone()[0]
+        
+        worker = metrics.worker_label()
+        samples = [
+            ('l10n_bd_leave_requests', 'gauge', 'Leave requests waiting in each workflow state',
+             [({'state': state}, count) for state, count in state_counts]),
+            ('l10n_bd_leave_escalation_overdue', 'gauge', 'Leave requests past their escalation deadline',
+             [({}, overdue)]),
+            ('l10n_bd_leave_sandwich_recompute_pending', 'gauge', 'Leave requests waiting for a sandwich recompute',
+             [({}, sandwich_pending)]),
+            ('l10n_bd_leave_transitions_total', 'counter',
+             'Leave requests that entered a state, per HTTP worker process; transitions made in cron '
+             'worker processes are never counted, as those processes serve no HTTP',
+             [({'state': state, 'worker': worker}, count) for state, count in metrics.get_transitions().items()]),
+        ]
+        
+        for job in RUN_METRIC_JOBS:
+            stats = json.loads(ICP.get_param('l10n_bd_hr_holidays.metrics.%s' % job) or '{}')
+            if not stats:
+                continue
+            samples += [
+                ('l10n_bd_leave_%s_last_run_timestamp_seconds' % job, 'gauge', 'Last run of the %s job' % job,
+                 [({}, stats['last_run'])]),
+                ('l10n_bd_leave_%s_last_rows' % job, 'gauge', 'Rows processed by the last %s run' % job,
+                 [({}, stats['last_rows'])]),
+                ('l10n_bd_leave_%s_last_duration_seconds' % job, 'gauge', 'Duration of the last %s run' % job,
+                 [({}, stats['last_duration'])]),
+                ('l10n_bd_leave_%s_duration_seconds_total' % job, 'counter', 'Total duration of the %s runs' % job,
+                 [({}, stats['duration_sum'])]),
+                ('l10n_bd_leave_%s_runs_total' % job, 'counter', 'Number of %s runs' % job,
+                 [({}, stats['runs'])]),
+            ]
+        
+        return request.make_response(
+            metrics.render(samples),
+            headers=[('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')],
+        )
\ No newline at end of file
@@ -0,0 +1,15 @@
+# -*- coding: utf-8 -*-
+from werkzeug.exceptions import Forbidden
+
+from odoo import http
+from odoo.http import request
+
+
+class LeaveSyncController(http.Controller):
+
+    @http.route('/l10n_bd_hr_holidays/sync', type='json', auth='user', methods=['POST'])
+    def sync(self, token=False, limit=None, **kwargs):
+        """Leaves and allocations changed since the token, one page per call"""
+        if not request.env.user.has_group('hr_holidays.group_hr_holidays_user'):
+            raise Forbidden()
+        return request.env['hr.leave'].l10n_bd_sync_changes(token=token, limit=limit)
\ No newline at end of file
@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+import logging
+
+from odoo import http, _
+from odoo.http import request
+from odoo.tools import split_every
+
+_logger = logging.getLogger(__name__)
+
+# Items applied (and committed) together in one transaction
+TRANSITION_BATCH_SIZE = 200
+
+
+class LeaveWorkflowController(http.Controller):
+
+    @http.route('/l10n_bd_hr_holidays/leave/transitions', type='json', auth='user', methods=['POST'])
+    def apply_transitions(self, items=None, batch_size=TRANSITION_BATCH_SIZE, **kwargs):
+        """
+        Apply workflow transitions in bulk.
+        items: list of {'leave_id': int, 'transition': str, 'reason': str, 'notes': str}
+        Returns one result per item, in the same order.
+        """
+        if not isinstance(items, list):
+            return {'error': _('"items" must be a list of transitions.')}
+        
+        batch_size = max(1, min(int(batch_size or TRANSITION_BATCH_SIZE), 1000))
+        Leave = request.env['hr.leave']
+        
+        results = []
+        try:
+            for batch in split_every(batch_size, items, list):
+                batch_results = Leave.l10n_bd_apply_transitions(batch)
+                # Commit each batch so a long run does not hold row locks until the end
+                request.env.cr.commit()
+                results += batch_results
+        except Exception as e:
+            # Earlier batches are committed: tell the caller where to resume
+            request.env.cr.rollback()
+            _logger.exception('Bulk leave transitions stopped after %s items', len(results))
+            return {
+                'error': str(e),
+                'results': results,
+                'committed': len(results),
+                'succeeded': sum(1 for result in results if result['success']),
+                'failed': sum(1 for result in results if not result['success']),
+            }
+        
+        return {
+            'results': results,
+            'succeeded': sum(1 for result in results if result['success']),
+            'failed': sum(1 for result in results if not result['success']),
+        }
\ No newline at end of file
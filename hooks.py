@@ -0,0 +1,7 @@
+# -*- coding: utf-8 -*-
+
+
+def post_init_hook(env):
+    """Book the leaves submitted before install on the ledger and the team counters"""
+    env['hr.leave.allocation.consumption']._rebuild()
+    env['hr.leave.absence.counter']._rebuild()
\ No newline at end of file
@@ -0,0 +1,8 @@
+# -*- coding: utf-8 -*-
+from odoo import api, SUPERUSER_ID
+
+
+def migrate(cr, version):
+    """Book the leaves validated before the consumption ledger existed"""
+    env = api.Environment(cr, SUPERUSER_ID, {})
+    env['hr.leave.allocation.consumption']._rebuild()
\ No newline at end of file
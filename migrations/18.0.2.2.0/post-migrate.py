@@ -0,0 +1,8 @@
+# -*- coding: utf-8 -*-
+from odoo import api, SUPERUSER_ID
+
+
+def migrate(cr, version):
+    """Count the leaves submitted before the team absence counters existed"""
+    env = api.Environment(cr, SUPERUSER_ID, {})
+    env['hr.leave.absence.counter']._rebuild()
\ No newline at end of file
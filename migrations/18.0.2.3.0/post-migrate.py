@@ -0,0 +1,12 @@
+# -*- coding: utf-8 -*-
+
+
+def migrate(cr, version):
+    """Flag the carryovers whose expiry was already announced through the outbox"""
+    cr.execute("""
+        UPDATE hr_leave_allocation a
+           SET l10n_bd_carryover_expired = TRUE
+          FROM hr_leave_outbox o
+         WHERE o.event = 'carryover_expire'
+           AND o.res_id = a.id
+    """)
\ No newline at end of file
@@ -0,0 +1,19 @@
+# -*- coding: utf-8 -*-
+
+
+def migrate(cr, version):
+    """
+    Create the SLA start of the waiting leaves from their current deadline,
+    before the ORM would compute it as the upgrade time and restart every
+    pending escalation.
+    """
+    cr.execute("ALTER TABLE hr_leave ADD COLUMN IF NOT EXISTS l10n_bd_sla_start timestamp")
+    cr.execute("""
+        UPDATE hr_leave l
+           SET l10n_bd_sla_start = COALESCE(
+                   l.l10n_bd_escalation_deadline - t.l10n_bd_escalation_sla_hours * interval '1 hour',
+                   l.write_date)
+          FROM hr_leave_type t
+         WHERE t.id = l.holiday_status_id
+           AND l.state IN ('confirm', 'recommend', 'forward')
+    """)
\ No newline at end of file
@@ -2,4 +2,13 @@
 from . import hr_leave
 from . import hr_leave_type
 from . import hr_leave_allocation
-from . import hr_employee
\ No newline at end of file
+from . import hr_employee
+from . import hr_leave_sandwich_audit
+from . import resource_calendar_leaves
+from . import hr_leave_year_summary
+from . import hr_leave_allocation_consumption
+from . import hr_leave_type_approval_role
+from . import hr_department
+from . import hr_leave_absence_counter
+from . import hr_leave_delegation
+from . import hr_leave_outbox
\ No newline at end of file
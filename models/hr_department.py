@@ -0,0 +1,22 @@
+# -*- coding: utf-8 -*-
+from odoo import models, fields
+
+
+class HrDepartment(models.Model):
+    _inherit = 'hr.department'
+    
+    l10n_bd_max_absences = fields.Integer(
+        string='Max Simultaneous Absences',
+        default=0,
+        help='Maximum number of employees of the department who may be on leave on the same day. '
+             'Submitted, recommended, forwarded and approved leaves count. Set 0 for unlimited.'
+    )
+    
+    l10n_bd_capacity_mode = fields.Selection([
+        ('block', 'Block Submission'),
+        ('flag', 'Flag for Approvers'),
+    ], string='When Capacity Is Exceeded', default='flag', required=True,
+        help='Block: the leave request cannot be submitted.\n'
+             'Flag: the request is submitted and marked for the approvers, '
+             'who are offered the overlap refuse reason.'
+    )
\ No newline at end of file
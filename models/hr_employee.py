@@ -1,12 +1,15 @@
 # -*- coding: utf-8 -*-
 from odoo import models, fields, api, _
 
+from .hr_leave_absence_counter import ABSENCE_STATES
+
 
 class HrEmployee(models.Model):
     _inherit = 'hr.employee'
     
     leave_recommender_id = fields.Many2one(
         'res.users',
+        index='btree_not_null',
         string='Leave Recommender',
         domain="[('share', '=', False)]",
         help='User who will recommend leave requests for this employee'
@@ -14,10 +17,32 @@ class HrEmployee(models.Model):
     
     leave_forwarder_id = fields.Many2one(
         'res.users',
+        index='btree_not_null',
         string='Leave Forwarder',
         domain="[('share', '=', False)]",
         help='User who will forward leave requests after recommendation'
     )
+    
+    def write(self, vals):
+        # The leaves follow the employee to the new department, partly through
+        # hr.leave.write and partly through recomputation: move all their
+        # absences between the counters here, once.
+        leaves = self.env['hr.leave']
+        if 'department_id' in vals:
+            leaves = leaves.sudo().with_context(active_test=False).search([
+                ('employee_id', 'in', self.ids),
+                ('state', 'in', ABSENCE_STATES),
+            ])
+            self = self.with_context(l10n_bd_skip_absence_counters=True)
+        absences = leaves._l10n_bd_get_absence_spans()
+        result = super().write(vals)
+        if leaves:
+            self.env['hr.leave.absence.counter']._apply_spans(
+                leaves._l10n_bd_get_absence_spans().values(), absences.values())
+        # Absent users fall back to the user of their manager in the closure
+        if 'parent_id' in vals or 'user_id' in vals:
+            self.env['hr.leave.delegation']._invalidate_closure()
+        return result
 
 
 class HrEmployeePublic(models.Model):
@@ -55,10 +80,15 @@ class ResUsers(models.Model):
         related_sudo=False
     )
     
+    l10n_bd_leave_digest = fields.Boolean(
+        string='Daily Leave Digest',
+        help='Receive one daily summary of the leaves waiting for you instead of a mail per leave'
+    )
+    
     @property
     def SELF_READABLE_FIELDS(self):
-        return super().SELF_READABLE_FIELDS + ['leave_recommender_id', 'leave_forwarder_id']
+        return super().SELF_READABLE_FIELDS + ['leave_recommender_id', 'leave_forwarder_id', 'l10n_bd_leave_digest']
     
     @property
     def SELF_WRITEABLE_FIELDS(self):
-        return super().SELF_WRITEABLE_FIELDS + ['leave_recommender_id', 'leave_forwarder_id']
\ No newline at end of file
+        return super().SELF_WRITEABLE_FIELDS + ['leave_recommender_id', 'leave_forwarder_id', 'l10n_bd_leave_digest']
\ No newline at end of file
@@ -1,7 +1,100 @@
 # -*- coding: utf-8 -*-
-from datetime import datetime, timedelta, date
+import base64
+import json
+import logging
+from collections import defaultdict
+from datetime import datetime, timedelta, date, time
+
+import psycopg2
+import pytz
+
 from odoo import models, fields, api, _
 from odoo.exceptions import UserError, AccessError, ValidationError
+from odoo.osv import expression
+from odoo.tools import SQL, float_compare, split_every
+from odoo.tools.sql import create_index
+
+from ..tools import leave_rules, metrics
+from .hr_leave_absence_counter import ABSENCE_STATES
+from .hr_leave_allocation import SYNC_ALLOCATION_FIELDS
+from .hr_leave_outbox import OUTBOX_LEAVE_STATES
+
+_logger = logging.getLogger(__name__)
+
+# Sandwich days are looked up at most 7 days on each side of a leave, plus
+# the neighbouring leave day that closes the sandwich.
+SANDWICH_WINDOW_DAYS = 8
+
+# Fields whose change can alter the sandwich days of neighbouring leaves
+SANDWICH_TRIGGER_FIELDS = {
+    'state', 'employee_id', 'holiday_status_id',
+    'request_date_from', 'request_date_to', 'date_from', 'date_to',
+}
+
+# Fields after whose change a saved sandwich leave gets its authoritative
+# duration, number_of_days included as the form only sends an estimate
+SANDWICH_SAVE_FIELDS = (SANDWICH_TRIGGER_FIELDS - {'state'}) | {'number_of_days'}
+
+# Fields that move the days a validated leave books on the consumption ledger
+LEDGER_TRIGGER_FIELDS = SANDWICH_TRIGGER_FIELDS | {'number_of_days'}
+
+# Fields whose change can move a leave on the department absence counters
+CAPACITY_TRIGGER_FIELDS = SANDWICH_TRIGGER_FIELDS | {'department_id'}
+
+# Stages in which a leave waits for a recommender, forwarder or approver
+ESCALATION_STATES = ['confirm', 'recommend', 'forward']
+
+REFUSE_REASONS = [
+    ('insufficient_balance', 'Insufficient Leave Balance'),
+    ('workload', 'Critical Workload/Project Deadline'),
+    ('overlap', 'Overlapping with Other Leaves'),
+    ('notice', 'Insufficient Notice Period'),
+    ('document', 'Missing Supporting Documents'),
+    ('policy', 'Policy Violation'),
+    ('other', 'Other Reason'),
+]
+
+# Approval roles of the compiled transition table, mapped to their check
+ROLE_CHECKS = {
+    'recommender': '_is_assigned_recommender',
+    'forwarder': '_is_assigned_forwarder',
+    'manager': '_is_assigned_approver',
+    'officer': '_is_assigned_validator',
+}
+
+# Sections of the approver digest, in workflow order
+DIGEST_STAGES = ['recommend', 'forward', 'approve', 'validate']
+
+# Records returned per model and per call by the delta-sync API
+SYNC_PAGE_SIZE = 500
+
+# Changes younger than this are left for the next poll: write_date is the
+# start of the writing transaction, so a slow transaction may still commit
+# rows older than the newest row already visible. Transactions open for
+# longer (closure or archive jobs) hold the bound back by themselves, see
+# _l10n_bd_sync_until().
+SYNC_SAFETY_LAG = timedelta(minutes=5)
+
+SYNC_LEAVE_FIELDS = [
+    'employee_id', 'holiday_status_id', 'request_date_from', 'request_date_to',
+    'number_of_days', 'number_of_hours', 'state', 'active',
+    'l10n_bd_recommended_by', 'l10n_bd_recommended_date',
+    'l10n_bd_forwarded_by', 'l10n_bd_forwarded_date',
+    'l10n_bd_refuse_reason', 'l10n_bd_archived_year', 'write_date',
+]
+
+# Leaves created per batch by the mandated closure service
+CLOSURE_BATCH_SIZE = 500
+
+# Workflow transitions that can be requested in bulk, mapped to their action
+BULK_TRANSITIONS = {
+    'recommend': 'action_recommend',
+    'forward': 'action_forward',
+    'skip_forward': 'action_skip_forward',
+    'approve': 'action_approve',
+    'validate': 'action_validate',
+    'refuse': 'action_refuse',
+}
 
 
 class HrLeave(models.Model):
@@ -52,6 +145,58 @@ class HrLeave(models.Model):
         copy=False
     )
     
+    l10n_bd_archived_year = fields.Integer(
+        string='Archived With Year',
+        index='btree_not_null',
+        readonly=True,
+        copy=False,
+        help='Set when the leave was archived with its closed leave year'
+    )
+    
+    l10n_bd_sla_start = fields.Datetime(
+        string='Waiting Since',
+        compute='_compute_l10n_bd_sla_start',
+        store=True,
+        copy=False,
+        help='Start of the current escalation SLA: entry in the waiting stage, or the last reminder.'
+    )
+    
+    l10n_bd_escalation_deadline = fields.Datetime(
+        string='Escalation Deadline',
+        compute='_compute_l10n_bd_escalation_deadline',
+        store=True,
+        index='btree_not_null',
+        copy=False,
+        help='Moment the leave is escalated if it is still waiting in its current stage.'
+    )
+    
+    l10n_bd_escalation_count = fields.Integer(
+        string='Escalations',
+        readonly=True,
+        copy=False
+    )
+    
+    l10n_bd_refuse_reason = fields.Selection(
+        REFUSE_REASONS,
+        string='Refuse Reason',
+        readonly=True,
+        copy=False
+    )
+    
+    l10n_bd_refuse_notes = fields.Text(
+        string='Refuse Notes',
+        readonly=True,
+        copy=False
+    )
+    
+    l10n_bd_capacity_exceeded = fields.Boolean(
+        string='Team Capacity Exceeded',
+        readonly=True,
+        copy=False,
+        help='Set when the request was submitted while its department already had '
+             'the maximum number of simultaneous absences on one of its days.'
+    )
+    
     l10n_bd_can_recommend = fields.Boolean(
         string='Can Recommend',
         compute='_compute_l10n_bd_can_recommend',
@@ -94,6 +239,14 @@ class HrLeave(models.Model):
         store=False
     )
     
+    l10n_bd_to_act_on = fields.Boolean(
+        string='To Act On',
+        compute='_compute_l10n_bd_to_act_on',
+        search='_search_l10n_bd_to_act_on',
+        store=False,
+        help='Leaves waiting for the current user, directly or through a delegation'
+    )
+    
     # ========================================
     # EXISTING ENHANCED FIELDS
     # ========================================
@@ -109,23 +262,56 @@ class HrLeave(models.Model):
         related='holiday_status_id.l10n_bd_is_sandwich_leave',
         store=False
     )
+    
+    l10n_bd_sandwich_dirty = fields.Boolean(
+        string='Sandwich Recompute Pending',
+        index=True,
+        readonly=True,
+        copy=False,
+        help='Set when a public holiday or neighbouring leave changed and the '
+             'sandwich-adjusted duration of this leave must be recomputed.'
+    )
+
+    def init(self):
+        super().init()
+        # Only active leaves are indexed, so archived years do not weigh on
+        # the neighbour and balance lookups of the current year.
+        create_index(
+            self._cr, 'hr_leave_l10n_bd_active_employee_dates_idx', self._table,
+            ['employee_id', 'request_date_from', 'request_date_to'], where='active',
+        )
+        # Workflow queues, search filters and the dashboard only look at the
+        # leaves still waiting for someone, a small share of the table.
+        create_index(
+            self._cr, 'hr_leave_l10n_bd_waiting_state_idx', self._table,
+            ['state'], where="state IN ('confirm', 'recommend', 'forward', 'validate1')",
+        )
+        # Keyset cursor of the delta-sync API, archived leaves included
+        create_index(
+            self._cr, 'hr_leave_l10n_bd_write_date_id_idx', self._table,
+            ['write_date', 'id'],
+        )
 
     # ========================================
     # STRICT ACCESS CONTROL - HELPER METHODS
     # ========================================
     
+    def _l10n_bd_get_acting_for(self):
+        """Return the ids of the users current user acts for today, through delegations"""
+        return self.env['hr.leave.delegation']._get_acting_for()
+    
     def _is_assigned_recommender(self):
         """Check if current user is an assigned recommender for this leave"""
         if not self or not self.id:
             return False
-        current_user = self.env.user
+        acting_for = self._l10n_bd_get_acting_for()
         
-        # Check if user is the employee's designated recommender
-        if self.employee_id and self.employee_id.leave_recommender_id == current_user: 
+        # Check if user is (or stands in for) the employee's designated recommender
+        if self.employee_id and self.employee_id.leave_recommender_id.id in acting_for:
             return True
         
-        # Check if user is in leave type's designated recommenders
-        if self.holiday_status_id and current_user in self.holiday_status_id.l10n_bd_recommender_ids:
+        # Check if user is (or stands in for) one of the leave type's designated recommenders
+        if self.holiday_status_id and acting_for.intersection(self.holiday_status_id.l10n_bd_recommender_ids.ids):
             return True
         
         return False
@@ -134,14 +320,14 @@ class HrLeave(models.Model):
         """Check if current user is an assigned forwarder for this leave"""
         if not self or not self.id:
             return False
-        current_user = self.env.user
+        acting_for = self._l10n_bd_get_acting_for()
         
-        # Check if user is the employee's designated forwarder
-        if self.employee_id and self.employee_id.leave_forwarder_id == current_user:
+        # Check if user is (or stands in for) the employee's designated forwarder
+        if self.employee_id and self.employee_id.leave_forwarder_id.id in acting_for:
             return True
         
-        # Check if user is in leave type's designated forwarders
-        if self.holiday_status_id and current_user in self.holiday_status_id.l10n_bd_forwarder_ids:
+        # Check if user is (or stands in for) one of the leave type's designated forwarders
+        if self.holiday_status_id and acting_for.intersection(self.holiday_status_id.l10n_bd_forwarder_ids.ids):
             return True
         
         return False
@@ -150,10 +336,9 @@ class HrLeave(models.Model):
         """Check if current user is an assigned approver for this leave"""
         if not self or not self.id:
             return False
-        current_user = self.env.user
         
-        # Check if user is the employee's designated leave manager/approver
-        if self.employee_id and self.employee_id.leave_manager_id == current_user:
+        # Check if user is (or stands in for) the employee's designated leave manager/approver
+        if self.employee_id and self.employee_id.leave_manager_id.id in self._l10n_bd_get_acting_for():
             return True
         
         return False
@@ -162,14 +347,56 @@ class HrLeave(models.Model):
         """Check if current user is an assigned validator (HR Officer) for this leave"""
         if not self or not self.id:
             return False
-        current_user = self.env.user
         
-        # Check if user is in leave type's responsible/HR officers
-        if self.holiday_status_id and current_user in self.holiday_status_id.responsible_ids:
+        # Check if user is (or stands in for) one of the leave type's responsible/HR officers
+        if self.holiday_status_id and self._l10n_bd_get_acting_for().intersection(self.holiday_status_id.responsible_ids.ids):
             return True
         
         return False
 
+    def _l10n_bd_get_transition(self):
+        """Return the compiled transition of the approval chain from the current state"""
+        self.ensure_one()
+        if not self.holiday_status_id:
+            return None
+        return self.holiday_status_id._l10n_bd_get_transition_table().get(self.state)
+    
+    def _l10n_bd_has_role(self, roles):
+        """Check if current user holds one of the roles on this leave (no role: anybody)"""
+        return not roles or any(getattr(self, ROLE_CHECKS[role])() for role in roles)
+    
+    def _l10n_bd_get_role_users(self, roles):
+        """Return the users holding the roles on this leave"""
+        self.ensure_one()
+        leave_type = self.holiday_status_id
+        employee = self.employee_id
+        users = self.env['res.users']
+        for role in roles:
+            if role == 'recommender':
+                users |= employee.leave_recommender_id | leave_type.l10n_bd_recommender_ids
+            elif role == 'forwarder':
+                users |= employee.leave_forwarder_id | leave_type.l10n_bd_forwarder_ids
+            elif role == 'manager':
+                users |= employee.leave_manager_id
+            elif role == 'officer':
+                users |= leave_type.responsible_ids
+        return users
+    
+    def _l10n_bd_is_own_leave(self):
+        """Whether the current user is the employee of the leave, leave managers excepted"""
+        return bool(
+            self.employee_id.user_id and self.employee_id.user_id == self.env.user and
+            not self.env.user.has_group('hr_holidays.group_hr_holidays_manager')
+        )
+    
+    def _l10n_bd_can_take(self, actions):
+        """Check if current user can take one of the actions in the current state"""
+        transition = self._l10n_bd_get_transition()
+        return bool(
+            transition and transition.action in actions and
+            not self._l10n_bd_is_own_leave() and self._l10n_bd_has_role(transition.roles)
+        )
+
     # ========================================
     # COMPUTE METHODS
     # ========================================
@@ -179,7 +406,7 @@ class HrLeave(models.Model):
         """Check if current user can recommend this leave - STRICT"""
         for leave in self:
             try:
-                leave.l10n_bd_can_recommend = leave._is_assigned_recommender()
+                leave.l10n_bd_can_recommend = leave._l10n_bd_can_take(('recommend',))
             except Exception:
                 leave.l10n_bd_can_recommend = False
     
@@ -188,7 +415,7 @@ class HrLeave(models.Model):
         """Check if current user can forward this leave - STRICT"""
         for leave in self:
             try:
-                leave.l10n_bd_can_forward = leave._is_assigned_forwarder()
+                leave.l10n_bd_can_forward = leave._l10n_bd_can_take(('forward',))
             except Exception: 
                 leave.l10n_bd_can_forward = False
     
@@ -197,27 +424,7 @@ class HrLeave(models.Model):
         """Check if current user can approve this leave - STRICT"""
         for leave in self:
             try:
-                if not leave.holiday_status_id:
-                    leave.l10n_bd_can_approve_leave = False
-                    continue
-                    
-                validation_type = leave.holiday_status_id.leave_validation_type
-                
-                can_approve = False
-                
-                if validation_type == 'no_validation':
-                    can_approve = True
-                elif validation_type == 'manager':
-                    can_approve = leave._is_assigned_approver()
-                elif validation_type == 'hr': 
-                    can_approve = leave._is_assigned_validator()
-                elif validation_type == 'both':
-                    if leave.state in ['confirm', 'recommend', 'forward']:
-                        can_approve = leave._is_assigned_approver()
-                    elif leave.state == 'validate1':
-                        can_approve = leave._is_assigned_validator()
-                
-                leave.l10n_bd_can_approve_leave = can_approve
+                leave.l10n_bd_can_approve_leave = leave._l10n_bd_can_take(('approve', 'validate'))
             except Exception: 
                 leave.l10n_bd_can_approve_leave = False
     
@@ -225,38 +432,44 @@ class HrLeave(models.Model):
     def _compute_l10n_bd_show_buttons(self):
         """Compute which buttons to show based on strict access"""
         for leave in self:
-            try:
-                # Show Recommend button
-                show_recommend = (
-                    leave.state == 'confirm' and
-                    leave.holiday_status_id and
-                    leave.holiday_status_id.l10n_bd_require_recommendation and
-                    leave.l10n_bd_can_recommend
-                )
-                leave.l10n_bd_show_recommend_button = show_recommend
-                
-                # Show Forward button
-                show_forward = (
-                    leave.state == 'recommend' and
-                    leave.holiday_status_id and
-                    leave.holiday_status_id.l10n_bd_require_forward and
-                    leave.l10n_bd_can_forward
-                )
-                leave.l10n_bd_show_forward_button = show_forward
-                
-                # Show Skip Forward button
-                leave.l10n_bd_show_skip_forward_button = show_forward
-                
-                # Show Approve button
-                leave.l10n_bd_show_approve_button = (
-                    leave.state == 'forward' and
-                    leave.l10n_bd_can_approve_leave
-                )
-            except Exception:
-                leave.l10n_bd_show_recommend_button = False
-                leave.l10n_bd_show_forward_button = False
-                leave.l10n_bd_show_skip_forward_button = False
-                leave.l10n_bd_show_approve_button = False
+            leave.l10n_bd_show_recommend_button = leave.l10n_bd_can_recommend
+            leave.l10n_bd_show_forward_button = leave.l10n_bd_can_forward
+            leave.l10n_bd_show_skip_forward_button = leave.l10n_bd_can_forward
+            # Submitted leaves use the standard approve button
+            leave.l10n_bd_show_approve_button = leave.state == 'forward' and leave.l10n_bd_can_approve_leave
+    
+    @api.depends('l10n_bd_can_recommend', 'l10n_bd_can_forward', 'l10n_bd_can_approve_leave')
+    def _compute_l10n_bd_to_act_on(self):
+        for leave in self:
+            leave.l10n_bd_to_act_on = (
+                leave.l10n_bd_can_recommend or leave.l10n_bd_can_forward or leave.l10n_bd_can_approve_leave
+            )
+    
+    def _search_l10n_bd_to_act_on(self, operator, value):
+        """Search the leaves waiting for the current user with the dashboard queue domains"""
+        if operator not in ('=', '!=') or not isinstance(value, bool):
+            raise UserError(_('Operation not supported'))
+        domain = expression.OR(list(self._l10n_bd_get_pending_domains().values()))
+        return domain if (operator == '=') == value else ['!'] + domain
+    
+    @api.depends('state')
+    def _compute_l10n_bd_sla_start(self):
+        """Restart the escalation SLA each time the leave enters a waiting stage"""
+        now = fields.Datetime.now()
+        for leave in self:
+            leave.l10n_bd_sla_start = now if leave.state in ESCALATION_STATES else False
+    
+    @api.depends('state', 'l10n_bd_sla_start', 'holiday_status_id', 'holiday_status_id.l10n_bd_escalation_sla_hours')
+    def _compute_l10n_bd_escalation_deadline(self):
+        """Deadline counted from the SLA start, so that enabling or changing the
+        SLA of a leave type applies to the leaves already waiting"""
+        now = fields.Datetime.now()
+        for leave in self:
+            sla_hours = leave.holiday_status_id.l10n_bd_escalation_sla_hours
+            if leave.state in ESCALATION_STATES and sla_hours > 0:
+                leave.l10n_bd_escalation_deadline = (leave.l10n_bd_sla_start or now) + timedelta(hours=sla_hours)
+            else:
+                leave.l10n_bd_escalation_deadline = False
     
     @api.depends('holiday_status_id', 'holiday_status_id.l10n_bd_is_sandwich_leave', 
                  'request_date_from', 'request_date_to', 'number_of_days')
@@ -274,100 +487,62 @@ class HrLeave(models.Model):
     # STRICT ACCESS CONTROL - CHECK METHODS
     # ========================================
     
-    def _check_recommend_rights(self):
-        """Strictly check if current user can recommend - raises error if not"""
+    def _l10n_bd_check_transition(self, actions):
+        """Strictly check the current state expects one of the actions and the
+        current user holds one of its roles - raises error if not"""
         self.ensure_one()
+        Role = self.env['hr.leave.type.approval.role']
+        action_labels = dict(Role._fields['action']._description_selection(self.env))
+        transition = self._l10n_bd_get_transition()
+        if not transition:
+            raise UserError(_('This leave request is not waiting for the %s stage.') % action_labels[actions[0]])
+        if transition.action not in actions:
+            raise UserError(_('This leave request must go through the %s stage first.') % action_labels[transition.action])
+        # Neither an approver role nor a delegation lets employees act on their own leaves
+        if self._l10n_bd_is_own_leave():
+            raise AccessError(_('You cannot take the %s stage of your own leave request.') % action_labels[transition.action])
         
-        if not self._is_assigned_recommender():
-            recommender = self.employee_id.leave_recommender_id if self.employee_id else False
-            type_recommenders = self.holiday_status_id.l10n_bd_recommender_ids if self.holiday_status_id else False
-            
-            msg = _('You are not authorized to recommend this leave request.\n\n')
-            if recommender:
-                msg += _('Assigned Recommender: %s\n') % recommender.name
-            if type_recommenders: 
-                msg += _('Leave Type Recommenders: %s') % ', '.join(type_recommenders.mapped('name'))
-            if not recommender and not type_recommenders:
-                msg += _('No recommender has been assigned for this employee or leave type.')
-            
+        if not self._l10n_bd_has_role(transition.roles):
+            role_labels = dict(Role._fields['role']._description_selection(self.env))
+            users = self._l10n_bd_get_role_users(transition.roles)
+            msg = _('You are not authorized to take the %s stage of this leave request.\n\n') % action_labels[transition.action]
+            msg += _('Allowed: %s\n') % ', '.join(role_labels[role] for role in transition.roles)
+            if users:
+                msg += _('Assigned: %s') % ', '.join(users.mapped('name'))
+            else:
+                msg += _('Nobody has been assigned to this stage for this employee or leave type.')
             raise AccessError(msg)
+        return transition
+    
+    def _check_recommend_rights(self):
+        """Strictly check if current user can recommend - raises error if not"""
+        self._l10n_bd_check_transition(('recommend',))
         return True
     
     def _check_forward_rights(self):
         """Strictly check if current user can forward - raises error if not"""
-        self.ensure_one()
-        
-        if not self._is_assigned_forwarder():
-            forwarder = self.employee_id.leave_forwarder_id if self.employee_id else False
-            type_forwarders = self.holiday_status_id.l10n_bd_forwarder_ids if self.holiday_status_id else False
-            
-            msg = _('You are not authorized to forward this leave request.\n\n')
-            if forwarder:
-                msg += _('Assigned Forwarder: %s\n') % forwarder.name
-            if type_forwarders:
-                msg += _('Leave Type Forwarders: %s') % ', '.join(type_forwarders.mapped('name'))
-            if not forwarder and not type_forwarders:
-                msg += _('No forwarder has been assigned for this employee or leave type.')
-            
-            raise AccessError(msg)
+        self._l10n_bd_check_transition(('forward',))
         return True
     
+    def _l10n_bd_is_mandated_closure(self):
+        """Whether the mandated closure service runs: the context key alone can
+        be sent by any RPC client, so it only counts for leave managers"""
+        return bool(
+            self.env.context.get('l10n_bd_mandated_closure') and
+            self.env.user.has_group('hr_holidays.group_hr_holidays_manager')
+        )
+    
     def _check_approval_rights_strict(self):
         """Strictly check if current user can approve - raises error if not"""
         self.ensure_one()
         
-        if not self.holiday_status_id:
+        # Mandated closures are validated by leave managers, outside the approval chain
+        if self._l10n_bd_is_mandated_closure():
             return True
-            
-        validation_type = self.holiday_status_id.leave_validation_type
-        
-        if validation_type == 'no_validation': 
-            return True
-        
-        if validation_type == 'manager':
-            if not self._is_assigned_approver():
-                approver = self.employee_id.leave_manager_id if self.employee_id else False
-                msg = _('You are not authorized to approve this leave request.\n\n')
-                msg += _('Only the assigned Leave Approver can approve.\n')
-                if approver: 
-                    msg += _('Assigned Approver: %s') % approver.name
-                else:
-                    msg += _('No approver has been assigned for this employee.')
-                raise AccessError(msg)
-        
-        elif validation_type == 'hr': 
-            if not self._is_assigned_validator():
-                validators = self.holiday_status_id.responsible_ids if self.holiday_status_id else False
-                msg = _('You are not authorized to approve this leave request.\n\n')
-                msg += _('Only the HR Officers configured on the leave type can approve.\n')
-                if validators:
-                    msg += _('Authorized Officers: %s') % ', '.join(validators.mapped('name'))
-                else:
-                    msg += _('No HR Officers have been configured for this leave type.')
-                raise AccessError(msg)
-        
-        elif validation_type == 'both':
-            if self.state in ['confirm', 'recommend', 'forward']:
-                if not self._is_assigned_approver():
-                    approver = self.employee_id.leave_manager_id if self.employee_id else False
-                    msg = _('You are not authorized to approve this leave request.\n\n')
-                    msg += _('First approval must be done by the assigned Leave Approver.\n')
-                    if approver:
-                        msg += _('Assigned Approver: %s') % approver.name
-                    else:
-                        msg += _('No approver has been assigned for this employee.')
-                    raise AccessError(msg)
-            elif self.state == 'validate1':
-                if not self._is_assigned_validator():
-                    validators = self.holiday_status_id.responsible_ids if self.holiday_status_id else False
-                    msg = _('You are not authorized to validate this leave request.\n\n')
-                    msg += _('Second approval (validation) must be done by HR Officers.\n')
-                    if validators:
-                        msg += _('Authorized Officers: %s') % ', '.join(validators.mapped('name'))
-                    else: 
-                        msg += _('No HR Officers have been configured for this leave type.')
-                    raise AccessError(msg)
-        
+        transition = self._l10n_bd_get_transition()
+        # Leaves outside the approval chain are left to the standard checks
+        if transition and transition.action in ('approve', 'validate'):
+            self._l10n_bd_check_transition(('approve', 'validate'))
         return True
 
     # ========================================
@@ -377,17 +552,12 @@ class HrLeave(models.Model):
     def action_recommend(self):
         """Recommend the leave request - STRICT ACCESS"""
         for leave in self:
-            if leave.state != 'confirm': 
-                raise UserError(_('Only submitted leave requests can be recommended.'))
-            
-            if not leave.holiday_status_id.l10n_bd_require_recommendation:
-                raise UserError(_('This leave type does not require recommendation.'))
+            # STRICT: Check the stage and that user is authorized
+            transition = leave._l10n_bd_check_transition(('recommend',))
             
-            # STRICT: Check if user is authorized
-            leave._check_recommend_rights()
-            
-            leave.write({
-                'state': 'recommend',
+            # Checked above: recommenders only get read access to the leave
+            leave.sudo().write({
+                'state': transition.next_state,
                 'l10n_bd_recommended_by': self.env.user.id,
                 'l10n_bd_recommended_date': fields.Datetime.now(),
             })
@@ -397,9 +567,7 @@ class HrLeave(models.Model):
                 message_type='notification'
             )
             
-            # If forward is not required, move directly to forward state
-            if not leave.holiday_status_id.l10n_bd_require_forward:
-                leave.write({'state': 'forward'})
+            if transition.next_state == 'forward':
                 leave.message_post(
                     body=_('Forward stage skipped (not required for this leave type)'),
                     message_type='notification'
@@ -410,14 +578,12 @@ class HrLeave(models.Model):
     def action_forward(self):
         """Forward the leave request - STRICT ACCESS"""
         for leave in self:
-            if leave.state != 'recommend':
-                raise UserError(_('Only recommended leave requests can be forwarded.'))
-            
-            # STRICT: Check if user is authorized
-            leave._check_forward_rights()
+            # STRICT: Check the stage and that user is authorized
+            transition = leave._l10n_bd_check_transition(('forward',))
             
-            leave.write({
-                'state': 'forward',
+            # Checked above: forwarders only get read access to the leave
+            leave.sudo().write({
+                'state': transition.next_state,
                 'l10n_bd_forwarded_by': self.env.user.id,
                 'l10n_bd_forwarded_date': fields.Datetime.now(),
             })
@@ -432,14 +598,12 @@ class HrLeave(models.Model):
     def action_skip_forward(self):
         """Skip forward stage - STRICT ACCESS (only forwarders can skip)"""
         for leave in self:
-            if leave.state != 'recommend':
-                raise UserError(_('Only recommended leave requests can skip forward.'))
-            
             # STRICT: Only forwarders can skip forward
-            leave._check_forward_rights()
+            transition = leave._l10n_bd_check_transition(('forward',))
             
-            leave.write({
-                'state': 'forward',
+            # Checked above: forwarders only get read access to the leave
+            leave.sudo().write({
+                'state': transition.next_state,
                 'l10n_bd_forwarded_by': self.env.user.id,
                 'l10n_bd_forwarded_date': fields.Datetime.now(),
             })
@@ -458,23 +622,16 @@ class HrLeave(models.Model):
     def action_approve(self, check_state=True):
         """Override to enforce STRICT approval rights"""
         for leave in self:
-            # Check workflow stages first
-            if (leave.holiday_status_id.l10n_bd_require_recommendation and 
-                leave.state == 'confirm'):
-                raise UserError(_('This leave requires recommendation before approval.'))
-            
-            if (leave.holiday_status_id.l10n_bd_require_forward and 
-                leave.state == 'recommend'):
-                raise UserError(_('This leave requires forwarding before approval.'))
+            if check_state and leave.state not in ('confirm', 'recommend', 'forward'):
+                raise UserError(_('Leave request must be submitted, recommended or forwarded in order to approve it.'))
             
-            # STRICT: Check if user is authorized to approve
-            leave._check_approval_rights_strict()
-            
-            # If state is 'forward', change to 'confirm' for parent method
-            if leave.state == 'forward':
-                leave.write({'state': 'confirm'})
+            # STRICT: Check the stage and that user is authorized to approve
+            leave._l10n_bd_check_transition(('approve', 'validate'))
         
-        return super().action_approve(check_state)
+        # States were checked above: the parent method accepts recommended and
+        # forwarded leaves as is instead of rewriting them to 'confirm' first,
+        # so each leave only gets one state write.
+        return super().action_approve(check_state=False)
     
     def action_validate(self, check_state=True):
         """Override to enforce STRICT validation rights"""
@@ -486,28 +643,21 @@ class HrLeave(models.Model):
     
     def action_refuse(self):
         """Override to enforce STRICT refusal rights"""
+        checked = self.browse()
         for leave in self:
-            # For refusal, check based on current state
-            can_refuse = False
-            
-            if leave.state == 'confirm':
-                can_refuse = (leave._is_assigned_recommender() or 
-                             leave._is_assigned_approver() or 
-                             leave._is_assigned_validator())
-            elif leave.state == 'recommend':
-                can_refuse = (leave._is_assigned_forwarder() or 
-                             leave._is_assigned_approver() or 
-                             leave._is_assigned_validator())
-            elif leave.state in ['forward', 'validate1']: 
-                can_refuse = (leave._is_assigned_approver() or 
-                             leave._is_assigned_validator())
-            else:
-                can_refuse = True  # Allow for other states
-            
-            if not can_refuse:
-                raise AccessError(_('You are not authorized to refuse this leave request.'))
+            # Stage actors and approvers may refuse, other states are left to the parent
+            transition = leave._l10n_bd_get_transition()
+            if transition:
+                if leave._l10n_bd_is_own_leave() or not leave._l10n_bd_has_role(transition.refuse_roles):
+                    raise AccessError(_('You are not authorized to refuse this leave request.'))
+                checked |= leave
         
-        return super().action_refuse()
+        if self - checked:
+            super(HrLeave, self - checked).action_refuse()
+        if checked:
+            # Checked above: recommenders and forwarders only get read access to the leave
+            super(HrLeave, checked.sudo()).action_refuse()
+        return True
 
     # ========================================
     # VALIDATION - NOTICE DAYS
@@ -516,29 +666,28 @@ class HrLeave(models.Model):
     @api.constrains('request_date_from', 'holiday_status_id')
     def _check_notice_days(self):
         """Validate that leave request meets minimum notice days requirement"""
+        # Mandated closures are not employee requests
+        if self._l10n_bd_is_mandated_closure():
+            return
         for leave in self:
             if not leave.holiday_status_id or not leave.request_date_from:
                 continue
             
             notice_days = leave.holiday_status_id.l10n_bd_notice_days
-            if not notice_days or notice_days <= 0:
-                continue
-            
-            today = date.today()
             leave_start = leave.request_date_from
             
             if isinstance(leave_start, datetime):
                 leave_start = leave_start.date()
             
-            days_advance = (leave_start - today).days
+            days_advance = leave_rules.notice_shortfall(leave_start, date.today(), notice_days)
             
-            if days_advance < notice_days:
+            if days_advance is not None:
                 raise ValidationError(
                     _('Leave type "%(leave_type)s" requires at least %(notice)s days advance notice. '
                       'Your leave starts in %(days)s days.') % {
                         'leave_type': leave.holiday_status_id.name,
                         'notice': notice_days,
-                        'days': max(0, days_advance),
+                        'days': days_advance,
                     }
                 )
 
@@ -546,106 +695,84 @@ class HrLeave(models.Model):
     # SANDWICH LEAVE LOGIC
     # ========================================
     
-    def _l10n_bd_apply_sandwich_rule(self, public_holidays, employee_leaves):
-        """Apply sandwich leave rule"""
+    def _l10n_bd_get_sandwich_extension(self, public_holidays, employee_leaves):
+        """Return the (before, after) sandwich days added around this leave"""
         self.ensure_one()
         
-        if not self.request_date_from or not self.request_date_to:
-            return 0
-        
-        date_from = self.request_date_from
-        date_to = self.request_date_to
-        
-        if date_from > date_to: 
-            return 0
-            
-        total_leaves = (date_to - date_from).days + 1
-        
         calendar = self.resource_calendar_id
         if not calendar:
-            return total_leaves
+            return 0, 0
+        
+        holiday_spans = []
+        for holiday in public_holidays:
+            holiday_from = holiday.get('date_from')
+            holiday_to = holiday.get('date_to')
+            if holiday_from and holiday_to:
+                if isinstance(holiday_from, datetime):
+                    holiday_from = holiday_from.date()
+                if isinstance(holiday_to, datetime):
+                    holiday_to = holiday_to.date()
+                holiday_spans.append(leave_rules.LeaveSpan(holiday_from, holiday_to))
         
         def is_non_working_day(check_date):
             try:
                 if not calendar._works_on_date(check_date):
                     return True
-                for holiday in public_holidays:
-                    holiday_from = holiday.get('date_from')
-                    holiday_to = holiday.get('date_to')
-                    if holiday_from and holiday_to: 
-                        if isinstance(holiday_from, datetime):
-                            holiday_from = holiday_from.date()
-                        if isinstance(holiday_to, datetime):
-                            holiday_to = holiday_to.date()
-                        if holiday_from <= check_date <= holiday_to:
-                            return True
-                return False
+                return any(span.start <= check_date <= span.end for span in holiday_spans)
             except Exception:
                 return False
         
-        def count_sandwich_days(start_date, direction):
-            days_count = 0
-            max_check = 7
-            
-            try:
-                current_date = start_date + timedelta(days=direction)
-                checked = 0
-                
-                while checked < max_check:
-                    if not is_non_working_day(current_date):
-                        break
-                    
-                    days_count += 1
-                    checked += 1
-                    current_date = current_date + timedelta(days=direction)
-                
-                if days_count > 0:
-                    for leave in employee_leaves:
-                        leave_from = leave.get('request_date_from')
-                        leave_to = leave.get('request_date_to')
-                        if leave_from and leave_to: 
-                            if leave_from <= current_date <= leave_to:
-                                return days_count
-                    return 0
-                    
-                return 0
-            except Exception: 
-                return 0
-        
-        sandwich_before = count_sandwich_days(date_from, -1)
-        sandwich_after = count_sandwich_days(date_to, 1)
-        total_leaves += sandwich_before + sandwich_after
+        neighbours = [
+            leave_rules.LeaveSpan(leave['request_date_from'], leave['request_date_to'])
+            for leave in employee_leaves
+            if leave.get('request_date_from') and leave.get('request_date_to')
+        ]
         
-        return total_leaves
+        return leave_rules.sandwich_extension(
+            self.request_date_from, self.request_date_to, is_non_working_day, neighbours)
     
-    def _get_durations(self, check_leave_type=True, resource_calendar=None):
-        """Override to apply sandwich rule if enabled on leave type"""
-        result = super()._get_durations(check_leave_type, resource_calendar)
+    def _l10n_bd_apply_sandwich_rule(self, public_holidays, employee_leaves):
+        """Apply sandwich leave rule"""
+        self.ensure_one()
         
-        sandwich_leaves = self.filtered(
-            lambda l: l.holiday_status_id and 
-            hasattr(l.holiday_status_id, 'l10n_bd_is_sandwich_leave') and 
-            l.holiday_status_id.l10n_bd_is_sandwich_leave and
-            l.request_date_from and l.request_date_to
-        )
+        sandwich_before, sandwich_after = self._l10n_bd_get_sandwich_extension(public_holidays, employee_leaves)
+        return leave_rules.sandwich_duration(
+            self.request_date_from, self.request_date_to, sandwich_before, sandwich_after)
+    
+    def _l10n_bd_get_sandwich_data(self):
+        """
+        Load the public holidays and neighbouring leaves the sandwich rule
+        needs for self, limited to the sandwich window around the leaves.
+        Returns (public_holidays, leaves_by_employee).
+        """
+        spans = self._l10n_bd_get_sandwich_spans()
+        if not spans:
+            return [], {}
         
-        if not sandwich_leaves:
-            return result
+        window = timedelta(days=SANDWICH_WINDOW_DAYS)
+        window_from = min(span[1] for span in spans) - window
+        window_to = max(span[2] for span in spans) + window
         
         try:
             public_holidays = self.env['resource.calendar.leaves'].search_read([
                 ('resource_id', '=', False),
-                ('company_id', 'in', sandwich_leaves.company_id.ids),
+                ('company_id', 'in', self.company_id.ids),
+                ('date_from', '<=', datetime.combine(window_to, datetime.max.time())),
+                ('date_to', '>=', datetime.combine(window_from, datetime.min.time())),
             ], ['date_from', 'date_to'])
         except Exception:
             public_holidays = []
         
         leaves_by_employee = {}
         try:
+            # The leaves being computed are neighbours of each other when they
+            # belong to the same employee, so each leave is only excluded
+            # from its own lookup by the caller.
             other_leaves = self.env['hr.leave'].search_read([
-                ('id', 'not in', self.ids),
-                ('employee_id', 'in', sandwich_leaves.employee_id.ids),
+                ('employee_id', 'in', self.employee_id.ids),
                 ('state', 'not in', ['cancel', 'refuse']),
+                ('request_date_from', '<=', window_to),
+                ('request_date_to', '>=', window_from),
             ], ['employee_id', 'request_date_from', 'request_date_to'])
             
             for leave_data in other_leaves:
@@ -657,10 +784,43 @@ class HrLeave(models.Model):
         except Exception:
             pass
         
+        return public_holidays, leaves_by_employee
+    
+    def _l10n_bd_get_neighbour_leaves(self, leaves_by_employee):
+        """Return the neighbouring leaves of this leave, without the leave itself"""
+        self.ensure_one()
+        own_id = self._origin.id or self.id
+        return [
+            leave_data for leave_data in leaves_by_employee.get(self.employee_id.id, [])
+            if leave_data['id'] != own_id
+        ]
+    
+    def _l10n_bd_is_sandwich_applicable(self):
+        self.ensure_one()
+        return bool(
+            self.holiday_status_id and
+            self.holiday_status_id.l10n_bd_is_sandwich_leave and
+            self.request_date_from and self.request_date_to
+        )
+    
+    def _get_durations(self, check_leave_type=True, resource_calendar=None):
+        """Override to apply sandwich rule if enabled on leave type"""
+        result = super()._get_durations(check_leave_type, resource_calendar)
+        
+        # Form onchanges work on new records: there the sandwich preview
+        # widget estimates the adjusted duration in the browser, and the
+        # authoritative one is computed when the leave is saved.
+        sandwich_leaves = self.filtered(lambda l: isinstance(l.id, int) and l._l10n_bd_is_sandwich_applicable())
+        
+        if not sandwich_leaves:
+            return result
+        
+        public_holidays, leaves_by_employee = sandwich_leaves._l10n_bd_get_sandwich_data()
+        
         for leave in sandwich_leaves:
             if leave.id in result:
                 days, hours = result[leave.id]
-                emp_leaves = leaves_by_employee.get(leave.employee_id.id, [])
+                emp_leaves = leave._l10n_bd_get_neighbour_leaves(leaves_by_employee)
                 try:
                     updated_days = leave._l10n_bd_apply_sandwich_rule(public_holidays, emp_leaves)
                     if updated_days and updated_days != days:
@@ -669,7 +829,923 @@ class HrLeave(models.Model):
                     pass
         
         return result
+    
+    # ========================================
+    # CLIENT-SIDE SANDWICH PREVIEW
+    # ========================================
+    
+    @api.model
+    def _l10n_bd_get_non_working_days(self, calendar, company_ids, date_start, date_end):
+        """Return the set of days between date_start and date_end that are off for the calendar"""
+        holidays = self.env['resource.calendar.leaves'].search_read([
+            ('resource_id', '=', False),
+            ('company_id', 'in', company_ids),
+            ('date_from', '<=', datetime.combine(date_end, datetime.max.time())),
+            ('date_to', '>=', datetime.combine(date_start, datetime.min.time())),
+        ], ['date_from', 'date_to'])
+        
+        non_working = set()
+        for holiday in holidays:
+            day = max(holiday['date_from'].date(), date_start)
+            while day <= min(holiday['date_to'].date(), date_end):
+                non_working.add(day)
+                day += timedelta(days=1)
+        
+        day = date_start
+        while day <= date_end:
+            if day not in non_working and not calendar._works_on_date(day):
+                non_working.add(day)
+            day += timedelta(days=1)
+        return non_working
+    
+    @api.model
+    def l10n_bd_get_sandwich_calendar(self, employee_id, leave_type_id, date_from, date_to, leave_id=False, margin=31):
+        """
+        Compact payload for computing the sandwich-adjusted duration in the
+        browser: a non-working day bitmap ('1' = off) and the neighbouring
+        leave spans, as day offsets from window_start. The window covers the
+        requested dates plus margin days on each side, so the form can keep
+        computing locally while the user moves the dates around.
+        """
+        employee = self.env['hr.employee'].browse(employee_id)
+        leave_type = self.env['hr.leave.type'].browse(leave_type_id)
+        date_from = fields.Date.to_date(date_from)
+        date_to = fields.Date.to_date(date_to)
+        calendar = employee.resource_calendar_id
+        
+        if not leave_type.l10n_bd_is_sandwich_leave or not calendar or not date_from or not date_to:
+            return {'sandwich': False}
+        
+        window = timedelta(days=margin + SANDWICH_WINDOW_DAYS)
+        window_start = min(date_from, date_to) - window
+        window_end = max(date_from, date_to) + window
+        
+        non_working = self._l10n_bd_get_non_working_days(calendar, employee.company_id.ids, window_start, window_end)
+        bitmap = ''.join(
+            '1' if window_start + timedelta(days=offset) in non_working else '0'
+            for offset in range((window_end - window_start).days + 1)
+        )
+        
+        neighbours = self.search_read([
+            ('id', '!=', leave_id or 0),
+            ('employee_id', '=', employee.id),
+            ('state', 'not in', ['cancel', 'refuse']),
+            ('request_date_from', '<=', window_end),
+            ('request_date_to', '>=', window_start),
+        ], ['request_date_from', 'request_date_to'])
+        
+        return {
+            'sandwich': True,
+            'window_start': fields.Date.to_string(window_start),
+            'non_working': bitmap,
+            'leaves': [
+                [(leave['request_date_from'] - window_start).days, (leave['request_date_to'] - window_start).days]
+                for leave in neighbours
+            ],
+            'max_check': SANDWICH_WINDOW_DAYS - 1,
+        }
+
+    # ========================================
+    # TEAM AVAILABILITY
+    # ========================================
+    
+    @api.model
+    def l10n_bd_get_team_availability(self, date_from, date_to, department_id=False, employee_ids=None,
+                                      include_pending=False):
+        """
+        Return how many employees are absent on each day between date_from and
+        date_to, sandwich days included. Absences are merged per employee and
+        counted with a sweep over the sorted interval endpoints, so the cost
+        grows with the number of leaves and not with leaves x days.
+        """
+        date_from = fields.Date.to_date(date_from)
+        date_to = fields.Date.to_date(date_to)
+        if not date_from or not date_to or date_from > date_to:
+            raise UserError(_('Please provide a valid date range.'))
+        if not department_id and not employee_ids:
+            raise UserError(_('Please provide a department or a list of employees.'))
+        
+        employee_domain = []
+        if department_id:
+            employee_domain.append(('department_id', 'child_of', department_id))
+        if employee_ids:
+            employee_domain.append(('id', 'in', employee_ids))
+        employees = self.env['hr.employee'].search(employee_domain)
+        
+        states = ['validate']
+        if include_pending:
+            states += ['confirm', 'recommend', 'forward', 'validate1']
+        
+        # Sandwich days can push a leave outside its own dates into the range
+        window = timedelta(days=SANDWICH_WINDOW_DAYS)
+        leaves = self.search([
+            ('employee_id', 'in', employees.ids),
+            ('state', 'in', states),
+            ('request_date_from', '<=', date_to + window),
+            ('request_date_to', '>=', date_from - window),
+        ])
+        
+        sandwich_leaves = leaves.filtered(lambda l: l._l10n_bd_is_sandwich_applicable())
+        sandwich_ids = set(sandwich_leaves.ids)
+        public_holidays, leaves_by_employee = sandwich_leaves._l10n_bd_get_sandwich_data()
+        
+        intervals_by_employee = {}
+        for leave in leaves:
+            start, end = leave.request_date_from, leave.request_date_to
+            if not start or not end:
+                continue
+            if leave.id in sandwich_ids:
+                before, after = leave._l10n_bd_get_sandwich_extension(
+                    public_holidays, leave._l10n_bd_get_neighbour_leaves(leaves_by_employee))
+                start, end = start - timedelta(days=before), end + timedelta(days=after)
+            start, end = max(start, date_from), min(end, date_to)
+            if start <= end:
+                intervals_by_employee.setdefault(leave.employee_id.id, []).append((start, end))
+        
+        # Merge the intervals of each employee so overlapping leaves count once,
+        # then turn them into +1/-1 events.
+        events = []
+        for intervals in intervals_by_employee.values():
+            intervals.sort()
+            current_start, current_end = intervals[0]
+            for start, end in intervals[1:]:
+                if start <= current_end + timedelta(days=1):
+                    current_end = max(current_end, end)
+                    continue
+                events += [(current_start, 1), (current_end + timedelta(days=1), -1)]
+                current_start, current_end = start, end
+            events += [(current_start, 1), (current_end + timedelta(days=1), -1)]
+        events.sort()
+        
+        days = []
+        absent = 0
+        index = 0
+        day = date_from
+        while day <= date_to:
+            while index < len(events) and events[index][0] <= day:
+                absent += events[index][1]
+                index += 1
+            days.append({'date': fields.Date.to_string(day), 'absent': absent})
+            day += timedelta(days=1)
+        
+        return {
+            'date_from': fields.Date.to_string(date_from),
+            'date_to': fields.Date.to_string(date_to),
+            'employee_count': len(employees),
+            'days': days,
+        }
+
+    # ========================================
+    # DELTA SYNC
+    # ========================================
+    
+    @api.model
+    def _l10n_bd_sync_until(self):
+        """
+        Return the write_date up to which every change is committed: the
+        start of the oldest transaction still open on the database, and no
+        later than SYNC_SAFETY_LAG ago. Only the sessions of the same
+        database role are visible, which is how Odoo workers connect.
+        """
+        self.env.cr.execute("""
+            SELECT MIN(xact_start AT TIME ZONE 'UTC')
+              FROM pg_stat_activity
+             WHERE datname = current_database() AND xact_start IS NOT NULL
+        """)
+        oldest = self.env.cr.fetchone()[0]
+        until = fields.Datetime.now() - SYNC_SAFETY_LAG
+        return min(until, oldest) if oldest else until
+    
+    @api.model
+    def _l10n_bd_sync_page(self, model_name, cursor, until, fields_list, limit):
+        """Return the records of model_name changed after the (write_date, id) cursor, oldest first"""
+        domain = [('write_date', '<', until)]
+        if cursor:
+            write_date = fields.Datetime.to_datetime(cursor[0])
+            # The lower bound keeps the keyset OR inside one index range
+            domain += [
+                ('write_date', '>=', write_date),
+                '|', ('write_date', '>', write_date), ('id', '>', cursor[1]),
+            ]
+        # Served by the (write_date, id) index, archived records included
+        return self.env[model_name].with_context(active_test=False).search_read(
+            domain, fields_list, order='write_date, id', limit=limit)
+    
+    @api.model
+    def l10n_bd_sync_changes(self, token=False, limit=SYNC_PAGE_SIZE):
+        """
+        Return the leaves and allocations changed since the opaque token, at
+        most ``limit`` of each, and the token of the next call. Each poll
+        reads the changes only, whatever the size of the history.
+        """
+        limit = max(1, min(int(limit or SYNC_PAGE_SIZE), SYNC_PAGE_SIZE))
+        try:
+            cursors = json.loads(base64.urlsafe_b64decode(token.encode())) if token else {}
+        except (ValueError, TypeError, AttributeError):
+            raise UserError(_('Invalid synchronization token.'))
+        
+        until = self._l10n_bd_sync_until()
+        pages = {
+            'hr.leave': self._l10n_bd_sync_page(
+                'hr.leave', cursors.get('hr.leave'), until, SYNC_LEAVE_FIELDS, limit),
+            'hr.leave.allocation': self._l10n_bd_sync_page(
+                'hr.leave.allocation', cursors.get('hr.leave.allocation'), until, SYNC_ALLOCATION_FIELDS, limit),
+        }
+        for model, records in pages.items():
+            if records:
+                cursors[model] = [fields.Datetime.to_string(records[-1]['write_date']), records[-1]['id']]
+        
+        return {
+            'leaves': pages['hr.leave'],
+            'allocations': pages['hr.leave.allocation'],
+            'token': base64.urlsafe_b64encode(json.dumps(cursors).encode()).decode(),
+            'has_more': any(len(records) == limit for records in pages.values()),
+        }
+
+    # ========================================
+    # ESCALATION
+    # ========================================
+    
+    def _l10n_bd_get_stage_assignees(self):
+        """Return the users expected to act on this leave in its current stage"""
+        self.ensure_one()
+        transition = self._l10n_bd_get_transition()
+        if not transition:
+            return self.env['res.users']
+        return self._l10n_bd_get_role_users(transition.roles)
+    
+    def _l10n_bd_escalate(self):
+        """Escalate an overdue leave: auto-advance it or remind its assignees"""
+        self.ensure_one()
+        leave_type = self.holiday_status_id
+        transition = self._l10n_bd_get_transition()
+        
+        if leave_type.l10n_bd_escalation_action == 'auto_advance' and transition:
+            if transition.action == 'recommend':
+                self.write({
+                    'state': transition.next_state,
+                    'l10n_bd_recommended_date': fields.Datetime.now(),
+                    'l10n_bd_escalation_count': self.l10n_bd_escalation_count + 1,
+                })
+                self.message_post(
+                    body=_('Leave request auto-recommended: no action within %s hours.') % leave_type.l10n_bd_escalation_sla_hours,
+                    message_type='notification'
+                )
+                return 'advanced'
+            if transition.action == 'forward':
+                self.write({
+                    'state': transition.next_state,
+                    'l10n_bd_forwarded_date': fields.Datetime.now(),
+                    'l10n_bd_escalation_count': self.l10n_bd_escalation_count + 1,
+                })
+                self.message_post(
+                    body=_('Leave request auto-forwarded: no action within %s hours.') % leave_type.l10n_bd_escalation_sla_hours,
+                    message_type='notification'
+                )
+                return 'advanced'
+        
+        assignees = self._l10n_bd_get_stage_assignees()
+        for user in assignees:
+            self.activity_schedule(
+                'mail.mail_activity_data_todo',
+                summary=_('Overdue leave request'),
+                note=_('This leave request has been waiting for more than %s hours.') % leave_type.l10n_bd_escalation_sla_hours,
+                user_id=user.id,
+            )
+        # A reminder starts a new SLA period in the same stage
+        self.write({
+            'l10n_bd_sla_start': fields.Datetime.now(),
+            'l10n_bd_escalation_count': self.l10n_bd_escalation_count + 1,
+        })
+        self.message_post(
+            body=_('Leave request escalated to %s.') % (', '.join(assignees.mapped('name')) or _('nobody (no assignee configured)')),
+            message_type='notification'
+        )
+        return 'reminded'
+    
+    @api.model
+    def _cron_escalate_overdue_leaves(self, batch_size=200):
+        """Cron job to escalate leaves waiting past their escalation deadline"""
+        domain = [('l10n_bd_escalation_deadline', '<=', fields.Datetime.now())]
+        # Served by the partial index on l10n_bd_escalation_deadline
+        leaves = self.sudo().search(domain, limit=batch_size, order='l10n_bd_escalation_deadline')
+        for leave in leaves:
+            try:
+                with self.env.cr.savepoint():
+                    leave._l10n_bd_escalate()
+            except (UserError, ValidationError) as e:
+                _logger.warning('Escalation failed for leave %s: %s', leave.id, e)
+                leave.write({'l10n_bd_escalation_deadline': False})
+        if len(leaves) == batch_size:
+            self.env.ref('l10n_bd_hr_holidays.ir_cron_escalate_overdue_leaves')._trigger()
+
+    # ========================================
+    # DASHBOARD
+    # ========================================
+    
+    @api.model
+    def _l10n_bd_get_stage_types(self):
+        """Return {(action, state, roles): leave type ids} of the compiled approval chains"""
+        stages = defaultdict(list)
+        for leave_type in self.env['hr.leave.type'].sudo().with_context(active_test=False).search([]):
+            for state, transition in leave_type._l10n_bd_get_transition_table().items():
+                # Stages anybody may take wait for nobody in particular
+                if transition.roles:
+                    stages[(transition.action, state, transition.roles)].append(leave_type.id)
+        return stages
+    
+    @api.model
+    def _l10n_bd_get_role_domain(self, role, user_ids):
+        """Domain of the leaves on which one of the users holds the role, as _is_assigned_* checks it"""
+        if role == 'recommender':
+            return ['|', ('employee_id.leave_recommender_id', 'in', user_ids),
+                    ('holiday_status_id.l10n_bd_recommender_ids', 'in', user_ids)]
+        if role == 'forwarder':
+            return ['|', ('employee_id.leave_forwarder_id', 'in', user_ids),
+                    ('holiday_status_id.l10n_bd_forwarder_ids', 'in', user_ids)]
+        if role == 'manager':
+            return [('employee_id.leave_manager_id', 'in', user_ids)]
+        return [('holiday_status_id.responsible_ids', 'in', user_ids)]
+    
+    @api.model
+    def _l10n_bd_get_pending_domains(self, user=None):
+        """Return, per workflow stage, the domain of leaves waiting for the user"""
+        user = user or self.env.user
+        # Users the user stands in for through delegations, resolved once
+        user_ids = list(self.env['hr.leave.delegation']._get_acting_for(user.id))
+        parts = defaultdict(list)
+        for (action, state, roles), type_ids in self._l10n_bd_get_stage_types().items():
+            parts[action].append(expression.AND([
+                [('state', '=', state), ('holiday_status_id', 'in', type_ids)],
+                expression.OR([self._l10n_bd_get_role_domain(role, user_ids) for role in roles]),
+            ]))
+        return {
+            stage: expression.OR(parts[stage]) if parts[stage] else expression.FALSE_DOMAIN
+            for stage in DIGEST_STAGES
+        }
+    
+    @api.model
+    def l10n_bd_get_dashboard_data(self, limit=10):
+        """Everything the leave dashboard needs for its first render, in one call"""
+        today = fields.Date.context_today(self)
+        employee = self.env.user.employee_id
+        
+        pending = {
+            stage: self.search_count(domain)
+            for stage, domain in self._l10n_bd_get_pending_domains().items()
+        }
+        
+        balances = []
+        if employee:
+            # Balances are read straight from the consumption ledger totals
+            allocated = self.env['hr.leave.allocation']._read_group(
+                [('employee_id', '=', employee.id), ('state', '=', 'validate')],
+                ['holiday_status_id'], ['number_of_days:sum', 'l10n_bd_consumed_days:sum'],
+            )
+            for leave_type, days, used in allocated:
+                balances.append({
+                    'leave_type': leave_type.display_name,
+                    'allocated': days,
+                    'taken': used,
+                    'remaining': days - used,
+                })
+        
+        return {
+            'pending': pending,
+            'balances': balances,
+            'upcoming': self.l10n_bd_get_dashboard_details('upcoming', limit=limit),
+            'carryover': self.l10n_bd_get_dashboard_details('carryover', limit=limit),
+            'today': fields.Date.to_string(today),
+        }
+    
+    @api.model
+    def l10n_bd_get_dashboard_details(self, section, offset=0, limit=20):
+        """One page of a dashboard list: a pending stage, upcoming leaves or carryovers"""
+        today = fields.Date.context_today(self)
+        employee = self.env.user.employee_id
+        
+        if section == 'carryover':
+            Allocation = self.env['hr.leave.allocation']
+            domain = [
+                ('employee_id', '=', employee.id),
+                ('l10n_bd_is_carryover', '=', True),
+                ('state', '=', 'validate'),
+                ('l10n_bd_carryover_expiry_date', '>=', today),
+            ]
+            records = Allocation.search_read(
+                domain,
+                ['holiday_status_id', 'number_of_days', 'l10n_bd_carryover_from_year', 'l10n_bd_carryover_expiry_date'],
+                offset=offset, limit=limit, order='l10n_bd_carryover_expiry_date, id',
+            ) if employee else []
+            total = Allocation.search_count(domain) if employee else 0
+            return {'records': records, 'total': total, 'offset': offset, 'limit': limit}
+        
+        if section == 'upcoming':
+            domain = [
+                ('employee_id', '=', employee.id),
+                ('state', 'not in', ['cancel', 'refuse']),
+                ('request_date_to', '>=', today),
+            ] if employee else [(0, '=', 1)]
+            order = 'request_date_from, id'
+        else:
+            pending_domains = self._l10n_bd_get_pending_domains()
+            if section not in pending_domains:
+                raise UserError(_('Unknown dashboard section: %s') % section)
+            domain = pending_domains[section]
+            order = 'request_date_from, id'
+        
+        records = self.search_read(
+            domain,
+            ['employee_id', 'holiday_status_id', 'request_date_from', 'request_date_to', 'number_of_days', 'state'],
+            offset=offset, limit=limit, order=order,
+        )
+        return {'records': records, 'total': self.search_count(domain), 'offset': offset, 'limit': limit}
+
+    # ========================================
+    # APPROVER DIGEST
+    # ========================================
+    
+    def activity_schedule(self, act_type_xmlid='', date_deadline=None, summary='', note='', **act_values):
+        """Users on the daily digest get their leave activities without the per-leave mail"""
+        user_id = act_values.get('user_id')
+        if user_id and self.env['res.users'].browse(user_id).sudo().l10n_bd_leave_digest:
+            self = self.with_context(mail_activity_quick_update=True)
+        return super(HrLeave, self).activity_schedule(
+            act_type_xmlid=act_type_xmlid, date_deadline=date_deadline, summary=summary, note=note, **act_values)
+    
+    @api.model
+    def _l10n_bd_get_pending_by_approver(self):
+        """
+        Return {(user_id, stage): [leave ids]} of every pending leave, under
+        the same rules as _l10n_bd_get_pending_domains, in one grouped query.
+        """
+        rows = [
+            (type_id, state, action, role)
+            for (action, state, roles), type_ids in self._l10n_bd_get_stage_types().items()
+            for type_id in type_ids
+            for role in roles
+        ]
+        if not rows:
+            return {}
+        LeaveType = self.env['hr.leave.type']
+        
+        def type_users(field_name):
+            field = LeaveType._fields[field_name]
+            return SQL(
+                "SELECT %s AS type_id, %s AS user_id FROM %s",
+                SQL.identifier(field.column1), SQL.identifier(field.column2), SQL.identifier(field.relation),
+            )
+        
+        type_ids, states, actions, roles = (list(column) for column in zip(*rows))
+        self.env.flush_all()
+        self.env.cr.execute(SQL(
+            """
+            WITH stage AS (
+                SELECT * FROM unnest(%(type_ids)s::int[], %(states)s::varchar[], %(actions)s::varchar[], %(roles)s::varchar[])
+                           AS s(type_id, state, stage, role)
+            ), pending AS (
+                SELECT l.id, s.stage, s.role, l.holiday_status_id AS type_id,
+                       e.leave_recommender_id, e.leave_forwarder_id, e.leave_manager_id
+                  FROM hr_leave l
+                  JOIN hr_employee e ON e.id = l.employee_id
+                  JOIN stage s ON s.type_id = l.holiday_status_id AND s.state = l.state
+                 WHERE l.active AND l.state IN ('confirm', 'recommend', 'forward', 'validate1')
+            ), assigned AS (
+                SELECT p.stage, p.id, p.leave_recommender_id AS user_id
+                  FROM pending p WHERE p.role = 'recommender'
+                 UNION
+                SELECT p.stage, p.id, r.user_id
+                  FROM pending p JOIN (%(recommenders)s) r ON r.type_id = p.type_id
+                 WHERE p.role = 'recommender'
+                 UNION
+                SELECT p.stage, p.id, p.leave_forwarder_id
+                  FROM pending p WHERE p.role = 'forwarder'
+                 UNION
+                SELECT p.stage, p.id, r.user_id
+                  FROM pending p JOIN (%(forwarders)s) r ON r.type_id = p.type_id
+                 WHERE p.role = 'forwarder'
+                 UNION
+                SELECT p.stage, p.id, p.leave_manager_id
+                  FROM pending p WHERE p.role = 'manager'
+                 UNION
+                SELECT p.stage, p.id, r.user_id
+                  FROM pending p JOIN (%(responsibles)s) r ON r.type_id = p.type_id
+                 WHERE p.role = 'officer'
+            )
+            SELECT user_id, stage, array_agg(id ORDER BY id)
+              FROM assigned
+             WHERE user_id IS NOT NULL
+          GROUP BY user_id, stage
+            """,
+            type_ids=type_ids, states=states, actions=actions, roles=roles,
+            recommenders=type_users('l10n_bd_recommender_ids'),
+            forwarders=type_users('l10n_bd_forwarder_ids'),
+            responsibles=type_users('responsible_ids'),
+        ))
+        return {(user_id, stage): leave_ids for user_id, stage, leave_ids in self.env.cr.fetchall()}
+    
+    @api.model
+    def _cron_send_approver_digest(self):
+        """Cron job sending one summary of their pending leaves to each digest user"""
+        users = self.env['res.users'].search([('l10n_bd_leave_digest', '=', True), ('share', '=', False)])
+        if not users:
+            return
+        pending = self._l10n_bd_get_pending_by_approver()
+        by_approver = defaultdict(dict)
+        for (user_id, stage), leave_ids in pending.items():
+            by_approver[user_id][stage] = leave_ids
+        
+        Delegation = self.env['hr.leave.delegation']
+        Leave = self.sudo()
+        mails = []
+        for user in users.filtered('email'):
+            stages = defaultdict(set)
+            # Users on a delegation also receive the leaves of the users they act for
+            for approver_id in Delegation._get_acting_for(user.id):
+                for stage, leave_ids in by_approver.get(approver_id, {}).items():
+                    stages[stage].update(leave_ids)
+            if not stages:
+                continue
+            user_leaves = Leave.with_context(lang=user.lang)
+            sections = [
+                (stage, user_leaves.browse(sorted(stages[stage])))
+                for stage in DIGEST_STAGES if stages.get(stage)
+            ]
+            body = self.env['ir.qweb'].with_context(lang=user.lang)._render(
+                'l10n_bd_hr_holidays.leave_approver_digest', {
+                    'user': user,
+                    'sections': sections,
+                    'base_url': user.get_base_url(),
+                },
+            )
+            mails.append({
+                'subject': user_leaves.env._('%(count)s leave requests waiting for you') % {
+                    'count': sum(len(leaves) for __, leaves in sections),
+                },
+                'body_html': body,
+                'email_from': self.env.company.email_formatted or user.company_id.email_formatted,
+                'recipient_ids': [(4, user.partner_id.id)],
+                'auto_delete': True,
+            })
+        if mails:
+            self.env['mail.mail'].sudo().create(mails)
+
+    # ========================================
+    # SANDWICH INCREMENTAL RECOMPUTATION
+    # ========================================
+    
+    def _l10n_bd_apply_sandwich_durations(self):
+        """Store the sandwich-adjusted duration of saved leaves, in place of the
+        estimate sent by the form"""
+        leaves = self.filtered(lambda l: l._l10n_bd_is_sandwich_applicable() and l.state not in ('cancel', 'refuse'))
+        if not leaves:
+            return
+        leaves = leaves.sudo().with_context(l10n_bd_sandwich_saving=True)
+        result = leaves._get_durations()
+        for leave in leaves:
+            if leave.id not in result:
+                continue
+            days, hours = result[leave.id]
+            if float_compare(days, leave.number_of_days, precision_digits=2):
+                leave.write({'number_of_days': days, 'number_of_hours': hours})
+    
+    @api.model_create_multi
+    def create(self, vals_list):
+        leaves = super().create(vals_list)
+        # Closures come with their durations computed on the same calendars
+        if not self.env.context.get('l10n_bd_mandated_closure'):
+            leaves._l10n_bd_apply_sandwich_durations()
+        if not self.env.context.get('l10n_bd_skip_sandwich_tracking'):
+            leaves._l10n_bd_mark_sandwich_neighbours(leaves._l10n_bd_get_sandwich_spans())
+        absences = leaves._l10n_bd_get_absence_spans()
+        self.env['hr.leave.absence.counter']._apply_spans(absences.values(), [])
+        self.browse(absences)._l10n_bd_check_team_capacity()
+        return leaves
+    
+    def write(self, vals):
+        track = (
+            not self.env.context.get('l10n_bd_skip_sandwich_tracking') and
+            bool(SANDWICH_TRIGGER_FIELDS & set(vals))
+        )
+        spans = self._l10n_bd_get_sandwich_spans() if track else []
+        ledger = bool(LEDGER_TRIGGER_FIELDS & set(vals))
+        validated = self.filtered(lambda l: l.state == 'validate') if ledger else self.browse()
+        capacity = (
+            not self.env.context.get('l10n_bd_skip_absence_counters') and
+            bool(CAPACITY_TRIGGER_FIELDS & set(vals))
+        )
+        absences = self._l10n_bd_get_absence_spans() if capacity else {}
+        result = super().write(vals)
+        if SANDWICH_SAVE_FIELDS & set(vals) and not (
+                self.env.context.get('l10n_bd_sandwich_saving') or
+                self.env.context.get('l10n_bd_skip_sandwich_tracking')):
+            self._l10n_bd_apply_sandwich_durations()
+        if track:
+            self._l10n_bd_mark_sandwich_neighbours(spans + self._l10n_bd_get_sandwich_spans())
+        if ledger:
+            self._l10n_bd_update_consumption(validated)
+            # Absent approvers fall back to their manager in the delegation closure
+            today = fields.Date.context_today(self)
+            if (validated | self.filtered(lambda l: l.state == 'validate')).filtered(
+                    lambda l: l.employee_id.user_id and l.request_date_to and l.request_date_to >= today):
+                self.env['hr.leave.delegation']._invalidate_closure()
+        if capacity:
+            new_absences = self._l10n_bd_get_absence_spans()
+            self.env['hr.leave.absence.counter']._apply_spans(new_absences.values(), absences.values())
+            # Only leaves being submitted or moved to other days are held to
+            # the capacity, not those moving along the approval workflow.
+            self.browse(
+                leave_id for leave_id, span in new_absences.items() if absences.get(leave_id) != span
+            )._l10n_bd_check_team_capacity()
+        if vals.get('state') and self:
+            # Only count transitions that actually reach the database
+            state, count = vals['state'], len(self)
+            self.env.cr.postcommit.add(lambda: metrics.count_transition(state, count))
+            if state in OUTBOX_LEAVE_STATES:
+                self.env['hr.leave.outbox']._enqueue_leaves(self, state)
+        return result
+    
+    def unlink(self):
+        spans = self._l10n_bd_get_sandwich_spans()
+        absences = self._l10n_bd_get_absence_spans()
+        self.env['hr.leave.allocation.consumption']._release(self)
+        result = super().unlink()
+        self.env['hr.leave']._l10n_bd_mark_sandwich_neighbours(spans)
+        self.env['hr.leave.absence.counter']._apply_spans([], absences.values())
+        return result
+    
+    # ========================================
+    # TEAM CAPACITY
+    # ========================================
+    
+    def _l10n_bd_get_absence_spans(self):
+        """Return {leave_id: (department_id, date_from, date_to)} of the leaves holding a place in their team"""
+        return {
+            leave.id: (leave.department_id.id, leave.request_date_from, leave.request_date_to)
+            for leave in self
+            if leave.department_id and leave.state in ABSENCE_STATES
+            and leave.request_date_from and leave.request_date_to
+        }
+    
+    def _l10n_bd_check_team_capacity(self):
+        """Block or flag the leaves submitted while their department is at capacity,
+        one counter lookup per leave whatever the size of the team"""
+        # A mandated closure sends the whole team away on purpose
+        if self._l10n_bd_is_mandated_closure():
+            return
+        Counter = self.env['hr.leave.absence.counter']
+        flagged = self.browse()
+        for leave in self:
+            department = leave.department_id
+            if department.l10n_bd_max_absences <= 0:
+                continue
+            # The counters already include the leave itself
+            peak = Counter._get_peak(department.id, leave.request_date_from, leave.request_date_to)
+            if peak <= department.l10n_bd_max_absences:
+                continue
+            if department.l10n_bd_capacity_mode == 'block':
+                raise ValidationError(
+                    _('%(department)s already has %(count)s people on leave on some of these days, '
+                      'the maximum is %(max)s.') % {
+                        'department': department.display_name,
+                        'count': peak - 1,
+                        'max': department.l10n_bd_max_absences,
+                    }
+                )
+            flagged |= leave
+        flagged.filtered(lambda l: not l.l10n_bd_capacity_exceeded).sudo().write({'l10n_bd_capacity_exceeded': True})
+    
+    def _l10n_bd_update_consumption(self, validated):
+        """Keep the consumption ledger in step with leaves entering or leaving validation"""
+        Consumption = self.env['hr.leave.allocation.consumption']
+        still_validated = self.filtered(lambda l: l.state == 'validate')
+        # A validated leave whose duration or dates moved is booked again
+        Consumption._release(validated)
+        Consumption._consume(still_validated)
+    
+    def _l10n_bd_get_sandwich_spans(self):
+        """Return (employee_id, date_from, date_to) of the leaves in self"""
+        return [
+            (leave.employee_id.id, leave.request_date_from, leave.request_date_to)
+            for leave in self
+            if leave.employee_id and leave.request_date_from and leave.request_date_to
+        ]
+    
+    def _l10n_bd_mark_sandwich_neighbours(self, spans):
+        """Flag the sandwich leaves whose window overlaps one of the given spans"""
+        if not spans:
+            return
+        window = timedelta(days=SANDWICH_WINDOW_DAYS)
+        domain = expression.OR([
+            [
+                ('employee_id', '=', employee_id),
+                ('request_date_from', '<=', date_to + window),
+                ('request_date_to', '>=', date_from - window),
+            ]
+            for employee_id, date_from, date_to in set(spans)
+        ])
+        if self.ids:
+            domain = expression.AND([domain, [('id', 'not in', self.ids)]])
+        self._l10n_bd_mark_sandwich_dirty(domain)
+    
+    @api.model
+    def _l10n_bd_mark_sandwich_dirty(self, domain):
+        """Flag the sandwich leaves matching domain and wake up the recompute job"""
+        leaves = self.sudo().search(expression.AND([domain, [
+            ('l10n_bd_sandwich_dirty', '=', False),
+            ('state', 'not in', ['cancel', 'refuse']),
+            ('holiday_status_id.l10n_bd_is_sandwich_leave', '=', True),
+        ]]))
+        if not leaves:
+            return
+        leaves.with_context(l10n_bd_skip_sandwich_tracking=True).write({'l10n_bd_sandwich_dirty': True})
+        cron = self.env.ref('l10n_bd_hr_holidays.ir_cron_recompute_sandwich_durations', raise_if_not_found=False)
+        if cron:
+            cron._trigger()
+    
+    def _l10n_bd_recompute_sandwich_durations(self):
+        """Recompute the durations of self in one batch and audit the deltas"""
+        leaves = self.sudo().with_context(l10n_bd_skip_sandwich_tracking=True)
+        result = leaves._get_durations()
+        audit_vals = []
+        for leave in leaves:
+            if leave.id not in result:
+                continue
+            days, hours = result[leave.id]
+            if not float_compare(days, leave.number_of_days, precision_digits=2):
+                continue
+            old_days = leave.number_of_days
+            try:
+                with self.env.cr.savepoint():
+                    leave.write({'number_of_days': days, 'number_of_hours': hours})
+            except (UserError, ValidationError) as e:
+                _logger.warning('Sandwich recompute skipped for leave %s: %s', leave.id, e)
+                continue
+            audit_vals.append({
+                'leave_id': leave.id,
+                'old_number_of_days': old_days,
+                'new_number_of_days': days,
+            })
+        leaves.write({'l10n_bd_sandwich_dirty': False})
+        if audit_vals:
+            self.env['hr.leave.sandwich.audit'].sudo().create(audit_vals)
+        return audit_vals
+    
+    @api.model
+    def _cron_recompute_sandwich_durations(self, batch_size=500):
+        """Cron job to recompute the sandwich durations of flagged leaves"""
+        domain = [('l10n_bd_sandwich_dirty', '=', True)]
+        leaves = self.sudo().search(domain, limit=batch_size, order='id')
+        if not leaves:
+            return
+        leaves._l10n_bd_recompute_sandwich_durations()
+        if self.sudo().search_count(domain, limit=1):
+            self.env.ref('l10n_bd_hr_holidays.ir_cron_recompute_sandwich_durations')._trigger()
 
+    # ========================================
+    # MANDATED CLOSURES
+    # ========================================
+    
+    @api.model
+    def _l10n_bd_get_closure_durations(self, calendar, company, leave_type, date_from, date_to):
+        """
+        Compute once per calendar what every employee on it shares: the work
+        period, the duration and the non-working days of the sandwich window.
+        """
+        tz = pytz.timezone(calendar.tz or 'UTC')
+        start = tz.localize(datetime.combine(date_from, time.min))
+        stop = tz.localize(datetime.combine(date_to, time.max))
+        intervals = list(calendar._attendance_intervals_batch(start, stop)[False])
+        if not intervals:
+            return None
+        
+        duration = calendar.get_work_duration_data(start, stop, domain=[
+            ('resource_id', '=', False),
+            ('company_id', 'in', company.ids),
+        ])
+        window = timedelta(days=SANDWICH_WINDOW_DAYS)
+        bitmap = None
+        if leave_type.l10n_bd_is_sandwich_leave:
+            bitmap = leave_rules.BitmapCalendar.from_days(
+                date_from - window, date_to + window,
+                self._l10n_bd_get_non_working_days(calendar, company.ids, date_from - window, date_to + window),
+            )
+        return {
+            'date_from': intervals[0][0].astimezone(pytz.utc).replace(tzinfo=None),
+            'date_to': intervals[-1][1].astimezone(pytz.utc).replace(tzinfo=None),
+            'days': duration['days'],
+            'hours': duration['hours'],
+            'bitmap': bitmap,
+        }
+    
+    @api.model
+    def l10n_bd_create_closure_leaves(self, employee_domain, leave_type_id, date_from, date_to,
+                                      name=False, auto_approve=False, batch_size=CLOSURE_BATCH_SIZE):
+        """
+        Create the same leave for every employee of the domain, e.g. for an
+        extended Eid or a government-declared closure. Durations are computed
+        once per working calendar, neighbour leaves are loaded in one query,
+        and leaves are inserted in batches with their durations precomputed.
+        Employees already on leave in the period are skipped.
+        """
+        if not self.env.user.has_group('hr_holidays.group_hr_holidays_manager'):
+            raise AccessError(_('Only leave managers can create leaves for a mandated closure.'))
+        leave_type = self.env['hr.leave.type'].browse(leave_type_id)
+        date_from = fields.Date.to_date(date_from)
+        date_to = fields.Date.to_date(date_to)
+        if not leave_type.exists() or not date_from or not date_to or date_from > date_to:
+            raise UserError(_('A leave type and a valid period are required.'))
+        
+        employees = self.env['hr.employee'].search(employee_domain or [])
+        window = timedelta(days=SANDWICH_WINDOW_DAYS)
+        neighbours = defaultdict(list)
+        for leave in self.search_read([
+            ('employee_id', 'in', employees.ids),
+            ('state', 'not in', ['cancel', 'refuse']),
+            ('request_date_from', '<=', date_to + window),
+            ('request_date_to', '>=', date_from - window),
+        ], ['employee_id', 'request_date_from', 'request_date_to']):
+            neighbours[leave['employee_id'][0]].append(
+                leave_rules.LeaveSpan(leave['request_date_from'], leave['request_date_to']))
+        
+        durations = {}
+        skipped = []
+        vals_list = []
+        for employee in employees:
+            if any(span.start <= date_to and span.end >= date_from for span in neighbours[employee.id]):
+                skipped.append(employee.name)
+                continue
+            calendar = employee.resource_calendar_id or employee.company_id.resource_calendar_id
+            key = (calendar.id, employee.company_id.id)
+            if key not in durations:
+                durations[key] = calendar and self._l10n_bd_get_closure_durations(
+                    calendar, employee.company_id, leave_type, date_from, date_to)
+            duration = durations[key]
+            if not duration:
+                skipped.append(employee.name)
+                continue
+            
+            days = duration['days']
+            if duration['bitmap']:
+                before, after = leave_rules.sandwich_extension_fast(
+                    date_from, date_to, duration['bitmap'],
+                    leave_rules.SpanIndex.from_spans(neighbours[employee.id]))
+                days = leave_rules.sandwich_duration(date_from, date_to, before, after)
+            vals_list.append({
+                'name': name or leave_type.name,
+                'employee_id': employee.id,
+                'holiday_status_id': leave_type.id,
+                'request_date_from': date_from,
+                'request_date_to': date_to,
+                'date_from': duration['date_from'],
+                'date_to': duration['date_to'],
+                'number_of_days': days,
+                'number_of_hours': duration['hours'],
+            })
+        
+        Leave = self.with_context(
+            l10n_bd_mandated_closure=True,
+            leave_fast_create=True,
+            tracking_disable=True,
+            mail_create_nolog=True,
+            mail_activity_automation_skip=True,
+        )
+        leaves = self.browse()
+        failed = []
+        for batch in split_every(batch_size, vals_list):
+            try:
+                with self.env.cr.savepoint():
+                    leaves |= Leave.create(list(batch))
+                    self.env.flush_all()
+            except (UserError, ValidationError):
+                # Find the offending employees without losing the rest of the batch
+                for vals in batch:
+                    try:
+                        with self.env.cr.savepoint():
+                            leaves |= Leave.create(vals)
+                            self.env.flush_all()
+                    except (UserError, ValidationError) as e:
+                        failed.append({'employee_id': vals['employee_id'], 'error': str(e)})
+        
+        approved = 0
+        if auto_approve and leaves:
+            results = Leave.l10n_bd_apply_transitions([
+                {'leave_id': leave_id, 'transition': 'validate'} for leave_id in leaves.ids
+            ])
+            approved = sum(1 for result in results if result['success'])
+            failed += [
+                {'employee_id': leave.employee_id.id, 'error': result['error']}
+                for leave, result in zip(leaves, results) if not result['success']
+            ]
+        
+        return {
+            'created': len(leaves),
+            'approved': approved,
+            'skipped': skipped,
+            'failed': failed,
+            'leave_ids': leaves.ids,
+        }
+    
     # ========================================
     # OTHER ACTION METHODS
     # ========================================
@@ -681,6 +1757,79 @@ class HrLeave(models.Model):
             raise UserError(_('This leave cannot be approved in its current state.'))
         return self.action_approve()
     
+    def _l10n_bd_refuse_with_reason(self, reason, notes=False):
+        """Refuse the leaves and keep the reason on the record and in the chatter"""
+        reason_labels = dict(self._fields['l10n_bd_refuse_reason']._description_selection(self.env))
+        if reason not in reason_labels:
+            raise UserError(_('Unknown refuse reason: %s') % reason)
+        
+        message = _('Leave Request Refused - Reason: %s') % reason_labels[reason]
+        if notes:
+            message += _(' - Notes: %s') % notes
+        
+        # Stored first: the outbox serializes the reason with the refuse state write
+        self.sudo().write({
+            'l10n_bd_refuse_reason': reason,
+            'l10n_bd_refuse_notes': notes or False,
+        })
+        self.action_refuse()
+        for leave in self:
+            leave.message_post(
+                body=message,
+                message_type='comment',
+                subtype_xmlid='mail.mt_note'
+            )
+        return True
+    
+    @api.model
+    def l10n_bd_apply_transitions(self, items):
+        """
+        Apply a list of workflow transitions and report the outcome per item.
+        Each item is a dict with 'leave_id', 'transition' and, for refusals,
+        an optional 'reason' and 'notes'. Every item runs in its own savepoint
+        so a failing item does not roll back the others.
+        """
+        items = [item if isinstance(item, dict) else {} for item in items]
+        leave_ids = [item.get('leave_id') for item in items if isinstance(item.get('leave_id'), int)]
+        # Browse everything at once so all items share the same prefetch set
+        leaves_by_id = {leave.id: leave for leave in self.browse(leave_ids).exists()}
+        
+        results = []
+        for item in items:
+            leave_id = item.get('leave_id')
+            transition = item.get('transition')
+            result = {'leave_id': leave_id, 'transition': transition, 'success': False}
+            results.append(result)
+            
+            if transition not in BULK_TRANSITIONS:
+                result['error'] = _('Unknown transition: %s') % transition
+                continue
+            leave = leaves_by_id.get(leave_id)
+            if not leave:
+                result['error'] = _('Leave request %s does not exist.') % leave_id
+                continue
+            
+            try:
+                with self.env.cr.savepoint():
+                    if transition == 'refuse' and item.get('reason'):
+                        leave._l10n_bd_refuse_with_reason(item['reason'], item.get('notes'))
+                    else:
+                        getattr(leave, BULK_TRANSITIONS[transition])()
+                    self.env.flush_all()
+            except (UserError, AccessError, ValidationError) as e:
+                result['error'] = str(e)
+                continue
+            except psycopg2.Error as e:
+                # Rolled back to the savepoint: drop what the cache kept of the item
+                self.env.invalidate_all(flush=False)
+                _logger.warning('Transition %s failed for leave %s: %s', transition, leave_id, e)
+                result['error'] = _('Database error: %s') % (e.pgerror or e)
+                continue
+            
+            result.update({'success': True, 'state': leave.state})
+        
+        return results
+    
     def action_refuse_with_reason(self):
         """Open wizard to refuse with reason"""
         self.ensure_one()
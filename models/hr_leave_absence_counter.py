@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+from collections import Counter
+from datetime import timedelta
+
+from odoo import models, fields, api
+from odoo.tools import SQL
+
+# Leave states that hold a place in the team capacity, from submission on
+ABSENCE_STATES = ['confirm', 'recommend', 'forward', 'validate1', 'validate']
+
+
+class HrLeaveAbsenceCounter(models.Model):
+    _name = 'hr.leave.absence.counter'
+    _description = 'Daily Department Absence Counter'
+    _order = 'date, department_id'
+    _log_access = False
+    
+    department_id = fields.Many2one(
+        'hr.department',
+        string='Department',
+        required=True,
+        ondelete='cascade',
+        readonly=True
+    )
+    
+    date = fields.Date(
+        string='Date',
+        required=True,
+        readonly=True
+    )
+    
+    count = fields.Integer(
+        string='Absences',
+        readonly=True
+    )
+    
+    _sql_constraints = [
+        ('department_date_uniq', 'unique(department_id, date)',
+         'There is only one absence counter per department and day.'),
+    ]
+
+    @api.model
+    def _apply_spans(self, added, removed):
+        """Add one absence per day of the added (department_id, date_from, date_to)
+        spans and remove one per day of the removed spans, in one upsert"""
+        deltas = Counter()
+        for spans, sign in ((added, 1), (removed, -1)):
+            for department_id, date_from, date_to in spans:
+                day = date_from
+                while day <= date_to:
+                    deltas[(department_id, day)] += sign
+                    day += timedelta(days=1)
+        deltas = {key: delta for key, delta in deltas.items() if delta}
+        if not deltas:
+            return
+        
+        self.flush_model()
+        department_ids, dates, counts = zip(*((key[0], key[1], delta) for key, delta in deltas.items()))
+        self.env.cr.execute(SQL("""
+            INSERT INTO hr_leave_absence_counter (department_id, date, count)
+                 SELECT * FROM unnest(%s::int[], %s::date[], %s::int[])
+            ON CONFLICT (department_id, date)
+              DO UPDATE SET count = hr_leave_absence_counter.count + EXCLUDED.count
+        """, list(department_ids), list(dates), list(counts)))
+        self.invalidate_model(['count'])
+    
+    @api.model
+    def _get_peak(self, department_id, date_from, date_to):
+        """Highest number of absences of the department on one day of the period"""
+        self.flush_model()
+        self.env.cr.execute(SQL("""
+            SELECT COALESCE(MAX(count), 0)
+              FROM hr_leave_absence_counter
+             WHERE department_id = %s AND date BETWEEN %s AND %s
+        """, department_id, date_from, date_to))
+        return self.env.cr.fetchone()[0]
+    
+    @api.model
+    def _rebuild(self):
+        """Rebuild all counters from the submitted leaves, e.g. after install"""
+        self.env['hr.leave'].flush_model(['department_id', 'state', 'request_date_from', 'request_date_to'])
+        self.env.cr.execute(SQL("""
+            DELETE FROM hr_leave_absence_counter;
+            INSERT INTO hr_leave_absence_counter (department_id, date, count)
+                 SELECT leave.department_id, day::date, COUNT(*)
+                   FROM hr_leave leave,
+                        generate_series(leave.request_date_from, leave.request_date_to, interval '1 day') day
+                  WHERE leave.department_id IS NOT NULL
+                    AND leave.state IN %s
+               GROUP BY leave.department_id, day::date
+        """, tuple(ABSENCE_STATES)))
+        self.invalidate_model()
\ No newline at end of file
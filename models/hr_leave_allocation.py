@@ -1,9 +1,27 @@
 # -*- coding: utf-8 -*-
+import json
+import time
+
 from odoo import models, fields, api, _
-from odoo.exceptions import ValidationError
+from odoo.exceptions import UserError, ValidationError
+from odoo.tools.sql import create_index
+
+from ..tools import leave_rules
 from datetime import date
 from dateutil.relativedelta import relativedelta
 
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+SYNC_ALLOCATION_FIELDS = [
+    'employee_id', 'holiday_status_id', 'date_from', 'date_to',
+    'number_of_days', 'l10n_bd_consumed_days', 'state', 'active',
+    'l10n_bd_is_carryover', 'l10n_bd_carryover_from_year', 'l10n_bd_carryover_expiry_date',
+    'l10n_bd_archived_year', 'write_date',
+]
+
 
 class HrLeaveAllocation(models.Model):
     _inherit = 'hr.leave.allocation'
@@ -21,8 +39,65 @@ class HrLeaveAllocation(models.Model):
     
     l10n_bd_carryover_expiry_date = fields.Date(
         string='Carryover Expiry Date',
+        index='btree_not_null',
         help='Date when this carryover allocation expires'
     )
+    
+    l10n_bd_carryover_expired = fields.Boolean(
+        string='Carryover Expired',
+        readonly=True,
+        copy=False,
+        help='Set once the expiry job has forfeited the unused days and announced the expiry'
+    )
+    
+    l10n_bd_archived_year = fields.Integer(
+        string='Archived With Year',
+        index='btree_not_null',
+        readonly=True,
+        copy=False,
+        help='Set when the allocation was archived with its closed leave year'
+    )
+    
+    l10n_bd_consumption_ids = fields.One2many(
+        'hr.leave.allocation.consumption',
+        'allocation_id',
+        string='Consumption Ledger',
+        readonly=True
+    )
+    
+    l10n_bd_consumed_days = fields.Float(
+        string='Consumed Days',
+        default=0.0,
+        readonly=True,
+        copy=False,
+        help='Days booked on this allocation by validated leaves, kept by the consumption ledger'
+    )
+    
+    l10n_bd_remaining_days = fields.Float(
+        string='Remaining Days',
+        compute='_compute_l10n_bd_remaining_days',
+        store=True,
+        help='Allocated days not yet consumed by validated leaves'
+    )
+
+    def init(self):
+        super().init()
+        # Only active allocations are indexed, so archived years do not weigh
+        # on the per-employee lookups of the current year.
+        create_index(
+            self._cr, 'hr_leave_allocation_l10n_bd_active_employee_type_idx', self._table,
+            ['employee_id', 'holiday_status_id', 'date_from'], where='active',
+        )
+        # Keyset cursor of the delta-sync API, archived allocations included
+        create_index(
+            self._cr, 'hr_leave_allocation_l10n_bd_write_date_id_idx', self._table,
+            ['write_date', 'id'],
+        )
+
+    @api.depends('number_of_days', 'l10n_bd_consumed_days')
+    def _compute_l10n_bd_remaining_days(self):
+        for allocation in self:
+            allocation.l10n_bd_remaining_days = allocation.number_of_days - allocation.l10n_bd_consumed_days
 
     @api.constrains('number_of_days', 'holiday_status_id', 'employee_id')
     def _check_max_days_per_year(self):
@@ -65,9 +140,7 @@ class HrLeaveAllocation(models.Model):
                 if alloc.date_from and alloc.date_from.year == current_year
             )
             
-            total_days = total_other_days + allocation.number_of_days
-            
-            if total_days > max_days:
+            if leave_rules.exceeds_max_days(total_other_days, allocation.number_of_days, max_days):
                 raise ValidationError(
                     _('Cannot allocate %(days)s days for "%(leave_type)s".'
                       'Maximum allowed per year is %(max)s days. '
@@ -81,26 +154,46 @@ class HrLeaveAllocation(models.Model):
                     }
                 )
 
+    @api.model
+    def _l10n_bd_record_run_metrics(self, job, started, rows):
+        """Keep the last run and cumulative duration of a job for the metrics endpoint"""
+        ICP = self.env['ir.config_parameter'].sudo()
+        key = 'l10n_bd_hr_holidays.metrics.%s' % job
+        stats = json.loads(ICP.get_param(key) or '{}')
+        duration = time.monotonic() - started
+        ICP.set_param(key, json.dumps({
+            'last_run': time.time(),
+            'last_duration': duration,
+            'last_rows': rows,
+            'runs': stats.get('runs', 0) + 1,
+            'duration_sum': stats.get('duration_sum', 0.0) + duration,
+        }))
+
     @api.model
     def _cron_expire_carryover_allocations(self):
         """Cron job to expire carryover allocations"""
+        started = time.monotonic()
         today = date.today()
         
         expired_allocations = self.search([
             ('l10n_bd_is_carryover', '=', True),
             ('l10n_bd_carryover_expiry_date', '!=', False),
             ('l10n_bd_carryover_expiry_date', '<', today),
+            ('l10n_bd_carryover_expired', '=', False),
             ('state', '=', 'validate'),
         ])
         
+        forfeited = {}
         for allocation in expired_allocations: 
             # Calculate remaining days
-            remaining = allocation.number_of_days - allocation.leaves_taken
+            consumed = allocation.l10n_bd_consumed_days
+            remaining = leave_rules.expired_carryover_forfeit(allocation.number_of_days, consumed)
             
+            forfeited[allocation.id] = remaining
             if remaining > 0:
-                # Reduce the allocation to only the taken days
+                # Reduce the allocation to the days the ledger booked on it
                 allocation.sudo().write({
-                    'number_of_days': allocation.leaves_taken,
+                    'number_of_days': consumed,
                 })
                 
                 # Post a message
@@ -109,6 +202,12 @@ class HrLeaveAllocation(models.Model):
                         'remaining': remaining,
                     }
                 )
+        
+        # The expired allocations stay validated: the flag keeps them from
+        # being forfeited and announced again by the next runs
+        self.env['hr.leave.outbox']._enqueue_carryovers(expired_allocations, 'carryover_expire', forfeited)
+        expired_allocations.sudo().write({'l10n_bd_carryover_expired': True})
+        self._l10n_bd_record_run_metrics('expire_carryover', started, len(expired_allocations))
 
     @api.model
     def process_year_end_carryover(self, year=None):
@@ -116,6 +215,7 @@ class HrLeaveAllocation(models.Model):
         Process year-end carryover for all employees and leave types.
         Call this method via cron job or manual action at year end.
         """
+        started = time.monotonic()
         if not year:
             year = date.today().year - 1  # Process previous year by default
         
@@ -140,6 +240,8 @@ class HrLeaveAllocation(models.Model):
                     processed_count += 1
                     carryover_details.append(result)
         
+        self._l10n_bd_record_run_metrics('carryover', started, processed_count)
+        
         return {
             'processed': processed_count,
             'details': carryover_details,
@@ -166,38 +268,22 @@ class HrLeaveAllocation(models.Model):
         if not allocations:
             return None
         
-        # Calculate total allocated and taken
+        # Calculate total allocated and taken, as booked by the consumption ledger
         total_allocated = sum(allocations.mapped('number_of_days'))
+        total_taken = sum(allocations.mapped('l10n_bd_consumed_days'))
         
-        # Get leaves taken in that year
-        leaves = self.env['hr.leave'].search([
-            ('employee_id', '=', employee.id),
-            ('holiday_status_id', '=', leave_type.id),
-            ('state', '=', 'validate'),
-            ('request_date_from', '>=', year_start),
-            ('request_date_from', '<=', year_end),
-        ])
-        
-        total_taken = sum(leaves.mapped('number_of_days'))
-        unused_days = total_allocated - total_taken
+        # Unused days, capped by the carryover max days limit
+        unused_days = leave_rules.carryover_days(total_allocated, total_taken, leave_type.l10n_bd_carryover_max_days)
         
         if unused_days <= 0:
             return None
         
-        # Apply carryover max days limit
-        max_carryover = leave_type.l10n_bd_carryover_max_days
-        if max_carryover and max_carryover > 0:
-            unused_days = min(unused_days, max_carryover)
-        
         # Calculate expiry date
         new_year_start = date(from_year + 1, 1, 1)
-        expiry_date = None
+        expiry_date = leave_rules.carryover_expiry_date(from_year, leave_type.l10n_bd_carryover_expiry_months)
         
-        if leave_type.l10n_bd_carryover_expiry_months and leave_type.l10n_bd_carryover_expiry_months > 0:
-            expiry_date = new_year_start + relativedelta(months=leave_type.l10n_bd_carryover_expiry_months)
-        
-        # Check if carryover allocation already exists
-        existing_carryover = self.search([
+        # Check if carryover allocation already exists, even in an archived year
+        existing_carryover = self.with_context(active_test=False).search([
             ('employee_id', '=', employee.id),
             ('holiday_status_id', '=', leave_type.id),
             ('l10n_bd_is_carryover', '=', True),
@@ -226,10 +312,92 @@ class HrLeaveAllocation(models.Model):
         
         # Auto-approve the carryover allocation
         carryover_allocation.action_validate()
+        self.env['hr.leave.outbox']._enqueue_carryovers(carryover_allocation, 'carryover_create')
         
         return {
             'employee': employee.name,
             'leave_type': leave_type.name,
             'days':  unused_days,
             'expiry_date': expiry_date,
-        }
\ No newline at end of file
+        }
+
+    @api.model
+    def l10n_bd_project_year_end(self, company_id=None, year=None):
+        """
+        Project the closing balance of every employee and leave type at the
+        end of the year: days left, days carried over, days forfeited to the
+        carryover cap and carried days exposed to expiry.
+        Data is loaded with a few grouped reads and computed with NumPy.
+        """
+        if np is None:
+            raise UserError(_('The year-end projection requires the numpy Python library.'))
+        
+        company_id = company_id or self.env.company.id
+        year = year or date.today().year
+        year_start = date(year, 1, 1)
+        year_end = date(year, 12, 31)
+        
+        allocated = self._read_group([
+            ('employee_id.company_id', '=', company_id),
+            ('state', '=', 'validate'),
+            ('date_from', '>=', year_start),
+            ('date_from', '<=', year_end),
+        ], ['employee_id', 'holiday_status_id'], ['number_of_days:sum', 'l10n_bd_consumed_days:sum'])
+        
+        if not allocated:
+            return []
+        
+        # Validated leaves are read from the consumption ledger totals,
+        # only pending requests still need to be summed.
+        planned = {
+            (employee.id, leave_type.id): days
+            for employee, leave_type, days in self.env['hr.leave']._read_group([
+                ('employee_id.company_id', '=', company_id),
+                ('holiday_status_id', 'in', list({leave_type.id for __, leave_type, __, __ in allocated})),
+                ('request_date_from', '>=', year_start),
+                ('request_date_from', '<=', year_end),
+                ('state', 'in', ['confirm', 'recommend', 'forward', 'validate1']),
+            ], ['employee_id', 'holiday_status_id'], ['number_of_days:sum'])
+        }
+        
+        keys = [(employee.id, leave_type.id) for employee, leave_type, __, __ in allocated]
+        leave_types = self.env['hr.leave.type'].browse(list({key[1] for key in keys}))
+        type_index = {leave_type.id: index for index, leave_type in enumerate(leave_types)}
+        rows = np.array([type_index[key[1]] for key in keys], dtype=np.int64)
+        
+        allocated_days = np.array([days for __, __, days, __ in allocated], dtype=np.float64)
+        taken_days = np.array([consumed for __, __, __, consumed in allocated], dtype=np.float64)
+        planned_days = np.array([planned.get(key, 0.0) for key in keys], dtype=np.float64)
+        
+        # Leave type policies, broadcast to one value per (employee, type) row
+        allowed = np.array(leave_types.mapped('l10n_bd_carryover_allowed'), dtype=bool)[rows]
+        max_days = np.array(leave_types.mapped('l10n_bd_carryover_max_days'), dtype=np.float64)[rows]
+        expiry_months = np.array(leave_types.mapped('l10n_bd_carryover_expiry_months'), dtype=np.int64)[rows]
+        
+        closing = allocated_days - taken_days - planned_days
+        unused = np.maximum(closing, 0.0)
+        cap = np.where(max_days > 0, max_days, np.inf)
+        carryover = np.where(allowed, np.minimum(unused, cap), 0.0)
+        forfeited = unused - carryover
+        exposure = np.where(expiry_months > 0, carryover, 0.0)
+        
+        employees = self.env['hr.employee'].browse(list({key[0] for key in keys}))
+        employee_names = dict(zip(employees.ids, employees.mapped('name')))
+        type_names = dict(zip(leave_types.ids, leave_types.mapped('name')))
+        next_year_start = date(year + 1, 1, 1)
+        
+        return [{
+            'employee_id': employee_id,
+            'employee': employee_names[employee_id],
+            'leave_type_id': leave_type_id,
+            'leave_type': type_names[leave_type_id],
+            'allocated': float(allocated_days[index]),
+            'taken': float(taken_days[index]),
+            'planned': float(planned_days[index]),
+            'closing_balance': float(closing[index]),
+            'carryover': float(carryover[index]),
+            'forfeited': float(forfeited[index]),
+            'expiry_exposure': float(exposure[index]),
+            'expiry_date': next_year_start + relativedelta(months=int(expiry_months[index]))
+                if exposure[index] > 0 else False,
+        } for index, (employee_id, leave_type_id) in enumerate(keys)]
\ No newline at end of file
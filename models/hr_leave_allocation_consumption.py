@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+from collections import defaultdict
+from datetime import date
+
+from odoo import models, fields, api
+from odoo.tools import float_compare, float_round
+
+
+class HrLeaveAllocationConsumption(models.Model):
+    _name = 'hr.leave.allocation.consumption'
+    _description = 'Leave Allocation Consumption'
+    _order = 'date, id'
+
+    leave_id = fields.Many2one(
+        'hr.leave',
+        string='Leave Request',
+        required=True,
+        index=True,
+        ondelete='cascade',
+        readonly=True
+    )
+
+    allocation_id = fields.Many2one(
+        'hr.leave.allocation',
+        string='Allocation',
+        required=True,
+        index=True,
+        ondelete='cascade',
+        readonly=True
+    )
+
+    employee_id = fields.Many2one(
+        'hr.employee',
+        string='Employee',
+        required=True,
+        index=True,
+        readonly=True
+    )
+
+    holiday_status_id = fields.Many2one(
+        'hr.leave.type',
+        string='Leave Type',
+        required=True,
+        readonly=True
+    )
+
+    date = fields.Date(
+        string='Leave Start',
+        required=True,
+        readonly=True
+    )
+
+    days = fields.Float(
+        string='Days',
+        required=True,
+        readonly=True
+    )
+
+    @api.model
+    def _get_fifo_key(self, allocation):
+        """Carryover days expiring first are used first, then regular allocations"""
+        return (
+            allocation.l10n_bd_carryover_expiry_date or date.max,
+            allocation.date_to or date.max,
+            allocation.date_from or date.min,
+            allocation.id,
+        )
+
+    @api.model
+    def _consume(self, leaves):
+        """Book validated leaves on their allocations in FIFO order by expiry"""
+        leaves = leaves.filtered(
+            lambda l: l.employee_id and l.holiday_status_id.requires_allocation == 'yes'
+        )
+        if not leaves:
+            return self
+
+        allocations = self.env['hr.leave.allocation'].sudo().search([
+            ('employee_id', 'in', leaves.employee_id.ids),
+            ('holiday_status_id', 'in', leaves.holiday_status_id.ids),
+            ('state', '=', 'validate'),
+        ])
+        by_key = defaultdict(list)
+        for allocation in allocations.sorted(self._get_fifo_key):
+            by_key[(allocation.employee_id.id, allocation.holiday_status_id.id)].append(allocation)
+
+        consumed = {allocation.id: allocation.l10n_bd_consumed_days for allocation in allocations}
+        vals_list = []
+        for leave in leaves.sorted(lambda l: (l.request_date_from, l.id)):
+            needed = leave.number_of_days
+            start = leave.request_date_from
+            for allocation in by_key[(leave.employee_id.id, leave.holiday_status_id.id)]:
+                if float_compare(needed, 0.0, precision_digits=2) <= 0:
+                    break
+                # An allocation only covers leaves starting inside its validity
+                if (allocation.date_from and start < allocation.date_from) or \
+                        (allocation.date_to and start > allocation.date_to):
+                    continue
+                available = allocation.number_of_days - consumed[allocation.id]
+                if float_compare(available, 0.0, precision_digits=2) <= 0:
+                    continue
+                days = float_round(min(available, needed), precision_digits=2)
+                consumed[allocation.id] += days
+                needed -= days
+                vals_list.append({
+                    'leave_id': leave.id,
+                    'allocation_id': allocation.id,
+                    'employee_id': leave.employee_id.id,
+                    'holiday_status_id': leave.holiday_status_id.id,
+                    'date': start,
+                    'days': days,
+                })
+
+        lines = self.sudo().create(vals_list)
+        for allocation in lines.allocation_id:
+            allocation.sudo().write({'l10n_bd_consumed_days': consumed[allocation.id]})
+        return lines
+
+    @api.model
+    def _release(self, leaves):
+        """Give back the days booked by leaves that are no longer validated"""
+        lines = self.sudo().search([('leave_id', 'in', leaves.ids)])
+        if not lines:
+            return
+        released = defaultdict(float)
+        for line in lines:
+            released[line.allocation_id] += line.days
+        lines.unlink()
+        for allocation, days in released.items():
+            allocation.sudo().write({
+                'l10n_bd_consumed_days': max(allocation.l10n_bd_consumed_days - days, 0.0),
+            })
+
+    @api.model
+    def _rebuild(self):
+        """Rebuild the whole ledger from the validated leaves, e.g. after install"""
+        # Archived years are rebuilt too: their allocations are reset below
+        # and their leaves are booked again on them
+        self = self.with_context(active_test=False)
+        self.sudo().search([]).unlink()
+        self.env['hr.leave.allocation'].sudo().search([
+            ('l10n_bd_consumed_days', '!=', 0),
+        ]).write({'l10n_bd_consumed_days': 0.0})
+        leaves = self.env['hr.leave'].sudo().search([('state', '=', 'validate')])
+        return self._consume(leaves)
\ No newline at end of file
@@ -0,0 +1,159 @@
+# -*- coding: utf-8 -*-
+from collections import defaultdict
+
+from odoo import models, fields, api, _
+from odoo.exceptions import ValidationError
+from odoo.tools import ormcache
+
+from ..tools import cache_version
+
+# Postgres sequence versioning the cached delegation closure
+CLOSURE_VERSION_SEQUENCE = 'hr_leave_delegation_closure_version_seq'
+
+
+class HrLeaveDelegation(models.Model):
+    _name = 'hr.leave.delegation'
+    _description = 'Leave Approval Delegation'
+    _order = 'date_from desc, id desc'
+    
+    user_id = fields.Many2one(
+        'res.users',
+        string='Delegated By',
+        required=True,
+        index=True,
+        default=lambda self: self.env.user,
+        domain="[('share', '=', False)]",
+        ondelete='cascade'
+    )
+    
+    delegate_id = fields.Many2one(
+        'res.users',
+        string='Delegate',
+        required=True,
+        domain="[('share', '=', False)]",
+        ondelete='cascade',
+        help='User who recommends, forwards and approves in place of the delegating user'
+    )
+    
+    date_from = fields.Date(
+        string='From',
+        required=True,
+        default=fields.Date.context_today
+    )
+    
+    date_to = fields.Date(
+        string='To',
+        required=True
+    )
+    
+    note = fields.Char(
+        string='Note'
+    )
+    
+    _sql_constraints = [
+        ('date_check', 'CHECK(date_from <= date_to)',
+         'The delegation must end after it starts.'),
+        ('delegate_check', 'CHECK(user_id != delegate_id)',
+         'A user cannot delegate to themselves.'),
+    ]
+
+    @api.constrains('user_id', 'date_from', 'date_to')
+    def _check_overlap(self):
+        """A user delegates to one person at a time"""
+        for delegation in self:
+            if self.search_count([
+                ('id', '!=', delegation.id),
+                ('user_id', '=', delegation.user_id.id),
+                ('date_from', '<=', delegation.date_to),
+                ('date_to', '>=', delegation.date_from),
+            ]):
+                raise ValidationError(
+                    _('%s already delegates the leave approvals for part of this period.') % delegation.user_id.name
+                )
+
+    # ========================================
+    # DELEGATION CLOSURE
+    # ========================================
+    
+    def init(self):
+        super().init()
+        cache_version.create(self.env.cr, CLOSURE_VERSION_SEQUENCE)
+    
+    @api.model
+    def _get_closure_version(self):
+        """Current version of the delegation closure, read once per transaction"""
+        return cache_version.get(self.env, CLOSURE_VERSION_SEQUENCE)
+    
+    @api.model
+    def _invalidate_closure(self):
+        """Move the closure to a new version instead of clearing every cache of the registry"""
+        cache_version.bump(self.env, CLOSURE_VERSION_SEQUENCE)
+    
+    @api.model
+    def _get_closure(self, day):
+        """
+        Resolve the delegation chains of the day into {user_id: frozenset of
+        the user ids the user acts for}. Users absent on a validated leave
+        without a delegation fall back to the user of their manager.
+        """
+        return self._get_closure_cached(day, self._get_closure_version())
+    
+    @api.model
+    @ormcache('day', 'version')
+    def _get_closure_cached(self, day, version):
+        """Computed with two queries and cached until delegations or absences change"""
+        edges = {
+            delegation['user_id'][0]: delegation['delegate_id'][0]
+            for delegation in self.sudo().search_read([
+                ('date_from', '<=', day),
+                ('date_to', '>=', day),
+            ], ['user_id', 'delegate_id'])
+        }
+        
+        absent = self.env['hr.leave'].sudo()._read_group([
+            ('state', '=', 'validate'),
+            ('request_date_from', '<=', day),
+            ('request_date_to', '>=', day),
+            ('employee_id.user_id', '!=', False),
+            ('employee_id.parent_id.user_id', '!=', False),
+        ], ['employee_id'])
+        for employee, in absent:
+            edges.setdefault(employee.user_id.id, employee.parent_id.user_id.id)
+        
+        acting_for = defaultdict(set)
+        for user_id, delegate_id in edges.items():
+            seen = {user_id}
+            # Follow the chain until a present user, stopping on cycles
+            while delegate_id and delegate_id not in seen:
+                acting_for[delegate_id].add(user_id)
+                seen.add(delegate_id)
+                delegate_id = edges.get(delegate_id)
+        return {user_id: frozenset(user_ids) for user_id, user_ids in acting_for.items()}
+    
+    @api.model
+    def _get_acting_for(self, user_id=None, day=None):
+        """Return the ids of the users the user acts for on the day, the user included"""
+        user_id = user_id or self.env.uid
+        day = day or fields.Date.context_today(self)
+        return self._get_closure(day).get(user_id, frozenset()) | {user_id}
+    
+    @api.model
+    def _cron_refresh_closure(self):
+        """Drop the cached closures so delegations starting or ending today apply"""
+        self._invalidate_closure()
+    
+    @api.model_create_multi
+    def create(self, vals_list):
+        delegations = super().create(vals_list)
+        self._invalidate_closure()
+        return delegations
+    
+    def write(self, vals):
+        result = super().write(vals)
+        self._invalidate_closure()
+        return result
+    
+    def unlink(self):
+        result = super().unlink()
+        self._invalidate_closure()
+        return result
\ No newline at end of file
@@ -0,0 +1,219 @@
+# -*- coding: utf-8 -*-
+import json
+import logging
+from datetime import timedelta
+
+import requests
+
+from odoo import models, fields, api
+from odoo.tools import SQL
+
+_logger = logging.getLogger(__name__)
+
+# Leave states announced to the downstream systems
+OUTBOX_LEAVE_STATES = ('recommend', 'forward', 'validate', 'refuse')
+
+OUTBOX_MAX_ATTEMPTS = 8
+OUTBOX_TIMEOUT = 10
+
+# Delivered events are kept this long for troubleshooting
+OUTBOX_RETENTION_DAYS = 30
+
+
+class HrLeaveOutbox(models.Model):
+    _name = 'hr.leave.outbox'
+    _description = 'Leave Event Outbox'
+    _order = 'id'
+    
+    event = fields.Selection([
+        ('leave_recommend', 'Leave Recommended'),
+        ('leave_forward', 'Leave Forwarded'),
+        ('leave_validate', 'Leave Approved'),
+        ('leave_refuse', 'Leave Refused'),
+        ('carryover_create', 'Carryover Created'),
+        ('carryover_expire', 'Carryover Expired'),
+    ], string='Event', required=True, readonly=True)
+    
+    res_model = fields.Char(
+        string='Model',
+        required=True,
+        readonly=True
+    )
+    
+    res_id = fields.Integer(
+        string='Record ID',
+        required=True,
+        index=True,
+        readonly=True
+    )
+    
+    payload = fields.Text(
+        string='Payload',
+        readonly=True,
+        help='JSON body of the event'
+    )
+    
+    state = fields.Selection([
+        ('pending', 'Pending'),
+        ('done', 'Delivered'),
+        ('failed', 'Failed'),
+    ], string='Status', required=True, default='pending', readonly=True)
+    
+    attempts = fields.Integer(
+        string='Attempts',
+        readonly=True
+    )
+    
+    next_attempt = fields.Datetime(
+        string='Next Attempt',
+        default=fields.Datetime.now,
+        readonly=True,
+        index='btree_not_null',
+        help='Cleared once the event is delivered or given up'
+    )
+    
+    sent_date = fields.Datetime(
+        string='Delivered On',
+        readonly=True
+    )
+    
+    last_error = fields.Char(
+        string='Last Error',
+        readonly=True
+    )
+
+    # ========================================
+    # ENQUEUE
+    # ========================================
+    
+    @api.model
+    def _enqueue(self, event, records, payloads):
+        """
+        Record one event per record in the current transaction, so that the
+        events exist if and only if the change they announce is committed.
+        """
+        if not records:
+            return self
+        events = self.sudo().create([{
+            'event': event,
+            'res_model': records._name,
+            'res_id': record.id,
+            'payload': json.dumps(payload),
+        } for record, payload in zip(records, payloads)])
+        # The trigger is transactional too: the dispatcher wakes up after commit
+        cron = self.env.ref('l10n_bd_hr_holidays.ir_cron_dispatch_outbox', raise_if_not_found=False)
+        if cron:
+            cron._trigger()
+        return events
+    
+    @api.model
+    def _enqueue_leaves(self, leaves, state):
+        payloads = [{
+            'leave_id': leave.id,
+            'employee_id': leave.employee_id.id,
+            'employee': leave.employee_id.name,
+            'leave_type_id': leave.holiday_status_id.id,
+            'date_from': fields.Date.to_string(leave.request_date_from),
+            'date_to': fields.Date.to_string(leave.request_date_to),
+            'number_of_days': leave.number_of_days,
+            'state': state,
+            'refuse_reason': leave.l10n_bd_refuse_reason or False,
+            'user_id': self.env.uid,
+        } for leave in leaves]
+        return self._enqueue('leave_%s' % state, leaves, payloads)
+    
+    @api.model
+    def _enqueue_carryovers(self, allocations, event, forfeited=None):
+        payloads = [{
+            'allocation_id': allocation.id,
+            'employee_id': allocation.employee_id.id,
+            'employee': allocation.employee_id.name,
+            'leave_type_id': allocation.holiday_status_id.id,
+            'from_year': allocation.l10n_bd_carryover_from_year,
+            'number_of_days': allocation.number_of_days,
+            'expiry_date': fields.Date.to_string(allocation.l10n_bd_carryover_expiry_date),
+            'forfeited_days': (forfeited or {}).get(allocation.id, 0.0),
+        } for allocation in allocations]
+        return self._enqueue(event, allocations, payloads)
+
+    # ========================================
+    # DISPATCH
+    # ========================================
+    
+    @api.model
+    def _get_backoff(self, attempts):
+        """Exponential backoff: 1, 2, 4 ... minutes, capped at 6 hours"""
+        return timedelta(minutes=min(2 ** (attempts - 1), 360))
+    
+    @api.model
+    def _post(self, url, events):
+        """Deliver a batch; the receiver deduplicates on the event id"""
+        response = requests.post(url, json={
+            'events': [{
+                'id': event.id,
+                'event': event.event,
+                'model': event.res_model,
+                'res_id': event.res_id,
+                'date': fields.Datetime.to_string(event.create_date),
+                'payload': json.loads(event.payload or '{}'),
+            } for event in events],
+        }, timeout=OUTBOX_TIMEOUT)
+        response.raise_for_status()
+    
+    @api.model
+    def _cron_dispatch(self, batch_size=100):
+        """Cron job delivering the due events in batches, oldest first"""
+        url = self.env['ir.config_parameter'].sudo().get_param('l10n_bd_hr_holidays.outbox_url')
+        if not url:
+            return
+        now = fields.Datetime.now()
+        # Skip events locked by a concurrent run instead of waiting for them
+        self.env.cr.execute(SQL(
+            """SELECT id FROM hr_leave_outbox
+                WHERE state = 'pending' AND next_attempt <= %s
+             ORDER BY id LIMIT %s FOR UPDATE SKIP LOCKED""",
+            now, batch_size,
+        ))
+        events = self.sudo().browse(row[0] for row in self.env.cr.fetchall())
+        if not events:
+            return
+        
+        error = False
+        try:
+            with self.env.cr.savepoint():
+                self._post(url, events)
+        except requests.exceptions.RequestException as e:
+            _logger.warning('Leave outbox delivery of %s events failed: %s', len(events), e)
+            error = str(e)
+        except Exception as e:
+            # Unexpected errors count as attempts too, or the batch would be retried forever
+            _logger.exception('Leave outbox delivery of %s events failed', len(events))
+            error = repr(e)
+        if error:
+            for attempts, batch in events.grouped('attempts').items():
+                attempts += 1
+                if attempts >= OUTBOX_MAX_ATTEMPTS:
+                    batch.write({'attempts': attempts, 'state': 'failed', 'next_attempt': False, 'last_error': error})
+                else:
+                    batch.write({'attempts': attempts, 'next_attempt': now + self._get_backoff(attempts), 'last_error': error})
+            return
+        
+        events.write({'state': 'done', 'attempts': 0, 'next_attempt': False, 'sent_date': now, 'last_error': False})
+        if len(events) == batch_size:
+            self.env.ref('l10n_bd_hr_holidays.ir_cron_dispatch_outbox')._trigger()
+    
+    def action_retry(self):
+        """Put failed events back in the queue"""
+        self.filtered(lambda e: e.state == 'failed').write({
+            'state': 'pending',
+            'attempts': 0,
+            'next_attempt': fields.Datetime.now(),
+        })
+        self.env.ref('l10n_bd_hr_holidays.ir_cron_dispatch_outbox')._trigger()
+    
+    @api.autovacuum
+    def _gc_delivered(self):
+        self.sudo().search([
+            ('state', '=', 'done'),
+            ('sent_date', '<', fields.Datetime.now() - timedelta(days=OUTBOX_RETENTION_DAYS)),
+        ]).unlink()
\ No newline at end of file
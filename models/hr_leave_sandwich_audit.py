@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+from odoo import models, fields, api
+
+
+class HrLeaveSandwichAudit(models.Model):
+    _name = 'hr.leave.sandwich.audit'
+    _description = 'Sandwich Duration Recompute Audit'
+    _order = 'create_date desc, id desc'
+    
+    leave_id = fields.Many2one(
+        'hr.leave',
+        string='Leave Request',
+        required=True,
+        index=True,
+        ondelete='cascade',
+        readonly=True
+    )
+    
+    employee_id = fields.Many2one(
+        'hr.employee',
+        string='Employee',
+        related='leave_id.employee_id',
+        store=True,
+        readonly=True
+    )
+    
+    holiday_status_id = fields.Many2one(
+        'hr.leave.type',
+        string='Leave Type',
+        related='leave_id.holiday_status_id',
+        store=True,
+        readonly=True
+    )
+    
+    old_number_of_days = fields.Float(
+        string='Previous Duration',
+        readonly=True
+    )
+    
+    new_number_of_days = fields.Float(
+        string='New Duration',
+        readonly=True
+    )
+    
+    delta_days = fields.Float(
+        string='Delta (Days)',
+        compute='_compute_delta_days',
+        store=True
+    )
+
+    @api.depends('old_number_of_days', 'new_number_of_days')
+    def _compute_delta_days(self):
+        for audit in self:
+            audit.delta_days = audit.new_number_of_days - audit.old_number_of_days
@@ -1,5 +1,66 @@
 # -*- coding: utf-8 -*-
+from collections import defaultdict, namedtuple
+from datetime import date, timedelta
+
 from odoo import models, fields, api, _
+from odoo.tools import ormcache
+
+from ..tools import cache_version, leave_rules
+
+APPROVAL_ACTIONS = [
+    ('recommend', 'Recommend'),
+    ('forward', 'Forward'),
+    ('approve', 'Approve'),
+    ('validate', 'Validate'),
+]
+
+APPROVAL_ROLES = [
+    ('recommender', 'Recommender'),
+    ('forwarder', 'Forwarder'),
+    ('manager', 'Leave Approver'),
+    ('officer', 'Leave Officer'),
+]
+
+# Actors of each stage when the leave type does not configure its own
+DEFAULT_ACTION_ROLES = {
+    'recommend': ('recommender',),
+    'forward': ('forwarder',),
+    'approve': ('manager',),
+    'validate': ('officer',),
+}
+
+# Leave type fields the compiled transition table is built from
+TRANSITION_FIELDS = {
+    'l10n_bd_require_recommendation',
+    'l10n_bd_require_forward',
+    'leave_validation_type',
+    'l10n_bd_approval_role_ids',
+}
+
+# Postgres sequence versioning the cached transition tables
+TRANSITION_VERSION_SEQUENCE = 'hr_leave_type_transition_version_seq'
+
+# One entry of the compiled approval chain: the action expected in a state,
+# the roles allowed to take it, the state it leads to and who may refuse.
+# An empty roles tuple means anybody may act (no validation).
+Transition = namedtuple('Transition', ['action', 'roles', 'next_state', 'refuse_roles'])
+
+# Leave type fields a policy replay can change, by policy key
+REPLAY_POLICY_FIELDS = {
+    'sandwich': 'l10n_bd_is_sandwich_leave',
+    'notice_days': 'l10n_bd_notice_days',
+    'max_days': 'l10n_bd_max_days_per_year',
+    'carryover_allowed': 'l10n_bd_carryover_allowed',
+    'carryover_max_days': 'l10n_bd_carryover_max_days',
+}
+
+# Employees replayed per chunk: their leaves and allocations of the year
+# are the only records held in memory at a time
+REPLAY_CHUNK_SIZE = 200
+
+# Days around the year loaded for the sandwich neighbours and calendars,
+# enough for the leaves running into the next year and their sandwich days
+REPLAY_WINDOW_DAYS = 40
 
 
 class HrLeaveType(models.Model):
@@ -39,6 +100,30 @@ class HrLeaveType(models.Model):
         help='Users who will be notified to forward leaves of this type'
     )
     
+    l10n_bd_approval_role_ids = fields.One2many(
+        'hr.leave.type.approval.role',
+        'leave_type_id',
+        string='Stage Actors',
+        help='Who may take each approval stage. Stages without lines use their default actor: '
+             'recommender, forwarder, leave approver and leave officer.'
+    )
+    
+    l10n_bd_escalation_sla_hours = fields.Integer(
+        string='Escalation SLA (Hours)',
+        default=0,
+        help='Hours a leave request may wait in the Submitted, Recommended or Forwarded stage '
+             'before it is escalated. Set 0 to disable escalation.'
+    )
+    
+    l10n_bd_escalation_action = fields.Selection([
+        ('remind', 'Remind Assignees'),
+        ('auto_advance', 'Auto-Advance Recommend/Forward'),
+    ], string='Escalation Action', default='remind', required=True,
+        help='Remind: schedule an activity for the assigned users and restart the SLA.\n'
+             'Auto-Advance: recommend or forward the request automatically; '
+             'requests waiting for approval are always reminded.'
+    )
+    
     # ========================================
     # ENHANCED LEAVE RULES
     # ========================================
@@ -77,4 +162,238 @@ class HrLeaveType(models.Model):
         string='Carryover Expiry (Months)',
         default=3,
         help='Number of months after which carried over leaves expire.'
-    )
\ No newline at end of file
+    )
+
+    # ========================================
+    # COMPILED APPROVAL WORKFLOW
+    # ========================================
+    
+    def init(self):
+        super().init()
+        cache_version.create(self.env.cr, TRANSITION_VERSION_SEQUENCE)
+    
+    @api.model
+    def _l10n_bd_invalidate_transition_tables(self):
+        """Move the compiled transition tables to a new version instead of clearing every cache of the registry"""
+        cache_version.bump(self.env, TRANSITION_VERSION_SEQUENCE)
+    
+    def _l10n_bd_get_transition_table(self):
+        """Compile the approval chain into {state: Transition}, cached until the configuration changes"""
+        self.ensure_one()
+        return self._l10n_bd_get_transition_table_cached(cache_version.get(self.env, TRANSITION_VERSION_SEQUENCE))
+    
+    @ormcache('self.id', 'version')
+    def _l10n_bd_get_transition_table_cached(self, version):
+        self.ensure_one()
+        actions = []
+        if self.l10n_bd_require_recommendation:
+            actions.append('recommend')
+            # The forward stage always follows a recommendation
+            if self.l10n_bd_require_forward:
+                actions.append('forward')
+        if self.leave_validation_type in ('manager', 'both'):
+            actions.append('approve')
+        if self.leave_validation_type in ('hr', 'both'):
+            actions.append('validate')
+        
+        configured = defaultdict(set)
+        for line in self.sudo().l10n_bd_approval_role_ids:
+            configured[line.action].add(line.role)
+        roles = {
+            action: tuple(sorted(configured[action])) if configured[action] else DEFAULT_ACTION_ROLES[action]
+            for action in actions
+        }
+        if self.leave_validation_type == 'no_validation':
+            actions.append('approve')
+            roles['approve'] = ()
+        
+        # State in which each stage waits: the chain starts from 'confirm',
+        # recommended leaves wait in 'recommend', leaves ready for approval
+        # in 'forward' and the second approval in 'validate1'.
+        states = []
+        for index, action in enumerate(actions):
+            if not index:
+                states.append('confirm')
+            elif action == 'forward':
+                states.append('recommend')
+            elif action == 'validate' and actions[index - 1] == 'approve':
+                states.append('validate1')
+            else:
+                states.append('forward')
+        
+        approval_roles = tuple(sorted({
+            role for action in actions if action in ('approve', 'validate') for role in roles[action]
+        }))
+        table = {}
+        for index, (state, action) in enumerate(zip(states, actions)):
+            next_state = states[index + 1] if index + 1 < len(states) else 'validate'
+            refuse_roles = tuple(sorted(set(roles[action]) | set(approval_roles))) if roles[action] else ()
+            table[state] = Transition(action, roles[action], next_state, refuse_roles)
+        return table
+    
+    def write(self, vals):
+        result = super().write(vals)
+        if TRANSITION_FIELDS & set(vals):
+            self._l10n_bd_invalidate_transition_tables()
+        return result
+
+    # ========================================
+    # POLICY REPLAY
+    # ========================================
+    
+    def _l10n_bd_get_policy(self):
+        """Return the replayable policy of the leave type as a dict"""
+        self.ensure_one()
+        return {key: self[field_name] for key, field_name in REPLAY_POLICY_FIELDS.items()}
+    
+    def _l10n_bd_replay_leave(self, leave, policy, calendar, stored_policy):
+        """Return (days, notice violation) of a historical leave under the policy"""
+        date_from, date_to = leave['request_date_from'], leave['request_date_to']
+        if policy['sandwich'] == stored_policy['sandwich'] and not policy['sandwich']:
+            # Unchanged working-day duration: the stored one, half days included
+            days = leave['number_of_days']
+        elif calendar is None:
+            days = leave['number_of_days']
+        elif policy['sandwich']:
+            before, after = leave_rules.sandwich_extension_fast(
+                date_from, date_to, calendar['bitmap'], calendar['neighbours'])
+            days = leave_rules.sandwich_duration(date_from, date_to, before, after)
+        else:
+            days = sum(
+                1 for offset in range((date_to - date_from).days + 1)
+                if not calendar['bitmap'].is_non_working(date_from + timedelta(days=offset))
+            )
+        # The request date is the creation of the leave
+        violation = leave_rules.notice_shortfall(
+            date_from, leave['create_date'].date(), policy['notice_days']) is not None
+        return days, violation
+    
+    def l10n_bd_replay_policy(self, year, proposed, company_id=None, chunk_size=REPLAY_CHUNK_SIZE):
+        """
+        Replay the validated leaves and allocations of the year under the
+        current and the proposed policy of the leave type, without writing
+        anything. Employees are streamed in keyset chunks, so memory stays
+        bounded whatever the size of the company. Yields one dict per
+        employee with leaves or allocations of the type in the year.
+        """
+        self.ensure_one()
+        current = self._l10n_bd_get_policy()
+        proposed = dict(current, **proposed)
+        company = self.env['res.company'].browse(company_id) if company_id else self.env.company
+        Leave = self.env['hr.leave'].with_context(active_test=False)
+        Allocation = self.env['hr.leave.allocation'].with_context(active_test=False)
+        Employee = self.env['hr.employee'].with_context(active_test=False)
+        
+        year_start, year_end = date(year, 1, 1), date(year, 12, 31)
+        window = timedelta(days=REPLAY_WINDOW_DAYS)
+        sandwich = current['sandwich'] or proposed['sandwich']
+        # One non-working day bitmap per working calendar, shared by every chunk
+        bitmaps = {}
+        
+        last_id = 0
+        while True:
+            # Archived employees and years are part of the history
+            employees = Employee.search(
+                [('company_id', '=', company.id), ('id', '>', last_id)], order='id', limit=chunk_size)
+            if not employees:
+                break
+            last_id = employees[-1].id
+            
+            leaves = Leave.search_read([
+                ('employee_id', 'in', employees.ids),
+                ('holiday_status_id', '=', self.id),
+                ('state', '=', 'validate'),
+                ('request_date_from', '>=', year_start),
+                ('request_date_from', '<=', year_end),
+            ], ['employee_id', 'request_date_from', 'request_date_to', 'number_of_days', 'create_date'],
+                order='employee_id, request_date_from, id')
+            allocations = Allocation._read_group([
+                ('employee_id', 'in', employees.ids),
+                ('holiday_status_id', '=', self.id),
+                ('state', '=', 'validate'),
+                ('date_from', '>=', year_start),
+                ('date_from', '<=', year_end),
+            ], ['employee_id', 'l10n_bd_is_carryover'], ['number_of_days:sum', 'l10n_bd_consumed_days:sum'])
+            
+            leaves_by_employee = defaultdict(list)
+            for leave in leaves:
+                leaves_by_employee[leave['employee_id'][0]].append(leave)
+            allocated = defaultdict(lambda: {'regular': 0.0, 'total': 0.0, 'consumed': 0.0})
+            for employee, is_carryover, days, consumed in allocations:
+                allocated[employee.id]['total'] += days
+                allocated[employee.id]['consumed'] += consumed
+                if not is_carryover:
+                    allocated[employee.id]['regular'] += days
+            
+            neighbours = defaultdict(list)
+            if sandwich and leaves_by_employee:
+                # Leaves of every type can close a sandwich
+                for leave in Leave.search_read([
+                    ('employee_id', 'in', list(leaves_by_employee)),
+                    ('state', 'not in', ['cancel', 'refuse']),
+                    ('request_date_from', '<=', year_end + window),
+                    ('request_date_to', '>=', year_start - window),
+                ], ['employee_id', 'request_date_from', 'request_date_to']):
+                    neighbours[leave['employee_id'][0]].append(leave)
+            
+            for employee in employees:
+                employee_leaves = leaves_by_employee.get(employee.id, [])
+                if not employee_leaves and employee.id not in allocated:
+                    continue
+                
+                calendar = None
+                resource_calendar = employee.resource_calendar_id or company.resource_calendar_id
+                if sandwich and resource_calendar and employee_leaves:
+                    if resource_calendar.id not in bitmaps:
+                        bitmaps[resource_calendar.id] = leave_rules.BitmapCalendar.from_days(
+                            year_start - window, year_end + window,
+                            Leave._l10n_bd_get_non_working_days(
+                                resource_calendar, company.ids, year_start - window, year_end + window),
+                        )
+                    calendar = {'bitmap': bitmaps[resource_calendar.id]}
+                
+                totals = {'current': [0.0, 0], 'proposed': [0.0, 0]}
+                for leave in employee_leaves:
+                    if calendar is not None:
+                        calendar['neighbours'] = leave_rules.SpanIndex.from_spans([
+                            leave_rules.LeaveSpan(other['request_date_from'], other['request_date_to'])
+                            for other in neighbours[employee.id] if other['id'] != leave['id']
+                        ])
+                    for name, policy in (('current', current), ('proposed', proposed)):
+                        days, violation = self._l10n_bd_replay_leave(leave, policy, calendar, current)
+                        totals[name][0] += days
+                        totals[name][1] += violation
+                
+                balance = allocated[employee.id]
+                # Days taken move with the replayed durations
+                taken = {
+                    'current': balance['consumed'],
+                    'proposed': balance['consumed'] + totals['proposed'][0] - totals['current'][0],
+                }
+                carryover = {
+                    name: leave_rules.carryover_days(balance['total'], taken[name], policy['carryover_max_days'])
+                    if policy['carryover_allowed'] else 0
+                    for name, policy in (('current', current), ('proposed', proposed))
+                }
+                max_days = {
+                    name: leave_rules.exceeds_max_days(0, balance['regular'], policy['max_days'])
+                    for name, policy in (('current', current), ('proposed', proposed))
+                }
+                yield {
+                    'employee_id': employee.id,
+                    'employee': employee.name,
+                    'leaves': len(employee_leaves),
+                    'days_current': totals['current'][0],
+                    'days_proposed': totals['proposed'][0],
+                    'days_delta': totals['proposed'][0] - totals['current'][0],
+                    'notice_violations_current': totals['current'][1],
+                    'notice_violations_proposed': totals['proposed'][1],
+                    'max_days_violation_current': int(max_days['current']),
+                    'max_days_violation_proposed': int(max_days['proposed']),
+                    'carryover_current': carryover['current'],
+                    'carryover_proposed': carryover['proposed'],
+                    'carryover_delta': carryover['proposed'] - carryover['current'],
+                }
+            
+            # Only the bitmaps outlive a chunk
+            self.env.invalidate_all()
\ No newline at end of file
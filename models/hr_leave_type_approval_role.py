@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+from odoo import models, fields, api
+
+from .hr_leave_type import APPROVAL_ACTIONS, APPROVAL_ROLES
+
+
+class HrLeaveTypeApprovalRole(models.Model):
+    _name = 'hr.leave.type.approval.role'
+    _description = 'Leave Type Approval Stage Actor'
+    _order = 'leave_type_id, action, role'
+    
+    leave_type_id = fields.Many2one(
+        'hr.leave.type',
+        string='Leave Type',
+        required=True,
+        index=True,
+        ondelete='cascade'
+    )
+    
+    action = fields.Selection(
+        APPROVAL_ACTIONS,
+        string='Stage',
+        required=True
+    )
+    
+    role = fields.Selection(
+        APPROVAL_ROLES,
+        string='Actor',
+        required=True
+    )
+    
+    _sql_constraints = [
+        ('action_role_uniq', 'unique(leave_type_id, action, role)',
+         'This actor is already allowed on this stage.'),
+    ]
+
+    # The compiled transition tables of the leave types depend on these lines
+    @api.model_create_multi
+    def create(self, vals_list):
+        lines = super().create(vals_list)
+        self.env['hr.leave.type']._l10n_bd_invalidate_transition_tables()
+        return lines
+    
+    def write(self, vals):
+        result = super().write(vals)
+        self.env['hr.leave.type']._l10n_bd_invalidate_transition_tables()
+        return result
+    
+    def unlink(self):
+        result = super().unlink()
+        self.env['hr.leave.type']._l10n_bd_invalidate_transition_tables()
+        return result
\ No newline at end of file
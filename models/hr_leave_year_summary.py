@@ -0,0 +1,174 @@
+# -*- coding: utf-8 -*-
+from datetime import date
+
+from odoo import models, fields, api, _
+from odoo.exceptions import UserError
+from odoo.tools import split_every
+
+# Records archived (or restored) per write
+ARCHIVE_CHUNK_SIZE = 1000
+
+
+class HrLeaveYearSummary(models.Model):
+    _name = 'hr.leave.year.summary'
+    _description = 'Archived Leave Year Summary'
+    _order = 'year desc, employee_id, holiday_status_id'
+    
+    year = fields.Integer(
+        string='Year',
+        required=True,
+        index=True,
+        readonly=True
+    )
+    
+    employee_id = fields.Many2one(
+        'hr.employee',
+        string='Employee',
+        required=True,
+        index=True,
+        ondelete='cascade',
+        readonly=True
+    )
+    
+    holiday_status_id = fields.Many2one(
+        'hr.leave.type',
+        string='Leave Type',
+        required=True,
+        ondelete='cascade',
+        readonly=True
+    )
+    
+    company_id = fields.Many2one(
+        'res.company',
+        string='Company',
+        related='employee_id.company_id',
+        store=True,
+        readonly=True
+    )
+    
+    allocated_days = fields.Float(
+        string='Allocated Days',
+        readonly=True
+    )
+    
+    taken_days = fields.Float(
+        string='Taken Days',
+        readonly=True
+    )
+    
+    leave_count = fields.Integer(
+        string='Leaves',
+        readonly=True
+    )
+    
+    allocation_count = fields.Integer(
+        string='Allocations',
+        readonly=True
+    )
+    
+    _sql_constraints = [
+        ('employee_type_year_uniq', 'unique(employee_id, holiday_status_id, year)',
+         'A leave year can only be summarized once per employee and leave type.'),
+    ]
+
+    # ========================================
+    # ARCHIVAL
+    # ========================================
+    
+    @api.model
+    def _get_archivable_domains(self, year):
+        """Return the domains of the finalized leaves and allocations of a year"""
+        year_start = date(year, 1, 1)
+        year_end = date(year, 12, 31)
+        leave_domain = [
+            ('state', 'in', ['validate', 'refuse', 'cancel']),
+            ('request_date_from', '>=', year_start),
+            ('request_date_from', '<=', year_end),
+        ]
+        # Allocations belong to the year they end in, so each is archived
+        # (and summarized) once; open-ended ones are still in use and kept
+        allocation_domain = [
+            ('state', 'in', ['validate', 'refuse']),
+            ('date_to', '>=', year_start),
+            ('date_to', '<=', year_end),
+        ]
+        return leave_domain, allocation_domain
+    
+    @api.model
+    def archive_year(self, year):
+        """
+        Move the finalized leaves and allocations of a year closed by
+        carryover out of the active data, keeping their per-employee and
+        per-type totals in this model.
+        """
+        Allocation = self.env['hr.leave.allocation'].sudo()
+        Leave = self.env['hr.leave'].sudo()
+        
+        if not Allocation.with_context(active_test=False).search_count(
+                [('l10n_bd_carryover_from_year', '=', year)], limit=1):
+            raise UserError(_('Year %s has not been closed by a carryover run yet.') % year)
+        if year >= date.today().year:
+            raise UserError(_('Only past years can be archived.'))
+        
+        leave_domain, allocation_domain = self._get_archivable_domains(year)
+        
+        # Totals include records archived by a previous run, so archiving
+        # a year twice keeps complete summaries.
+        taken = Leave.with_context(active_test=False)._read_group(
+            leave_domain + [('state', '=', 'validate')],
+            ['employee_id', 'holiday_status_id'], ['number_of_days:sum', '__count'])
+        allocated = {
+            (employee, leave_type): (days, count)
+            for employee, leave_type, days, count in Allocation.with_context(active_test=False)._read_group(
+                allocation_domain + [('state', '=', 'validate')],
+                ['employee_id', 'holiday_status_id'], ['number_of_days:sum', '__count'])
+        }
+        
+        summaries = {}
+        for employee, leave_type, days, count in taken:
+            summaries[(employee, leave_type)] = {'taken_days': days, 'leave_count': count}
+        for key, (days, count) in allocated.items():
+            summaries.setdefault(key, {}).update({'allocated_days': days, 'allocation_count': count})
+        
+        self.sudo().search([('year', '=', year)]).unlink()
+        self.sudo().create([
+            dict(values, year=year, employee_id=employee.id, holiday_status_id=leave_type.id)
+            for (employee, leave_type), values in summaries.items()
+        ])
+        
+        archived = {
+            'leaves': self._archive_chunks(Leave, leave_domain, {'active': False, 'l10n_bd_archived_year': year}),
+            'allocations': self._archive_chunks(Allocation, allocation_domain, {'active': False, 'l10n_bd_archived_year': year}),
+        }
+        return archived
+    
+    @api.model
+    def restore_year(self, year):
+        """Bring back the leaves and allocations archived for a year"""
+        Allocation = self.env['hr.leave.allocation'].sudo().with_context(active_test=False)
+        Leave = self.env['hr.leave'].sudo().with_context(active_test=False)
+        domain = [('active', '=', False), ('l10n_bd_archived_year', '=', year)]
+        restored = {
+            'leaves': self._archive_chunks(Leave, domain, {'active': True, 'l10n_bd_archived_year': False}),
+            'allocations': self._archive_chunks(Allocation, domain, {'active': True, 'l10n_bd_archived_year': False}),
+        }
+        self.sudo().search([('year', '=', year)]).unlink()
+        return restored
+    
+    @api.model
+    def _archive_chunks(self, model, domain, values):
+        """Write values on the records matching domain, ARCHIVE_CHUNK_SIZE at a time"""
+        model = model.with_context(
+            tracking_disable=True,
+            l10n_bd_skip_sandwich_tracking=True,
+            # Core refuses to (un)archive leaves outside its cancel wizard
+            from_cancel_wizard=True,
+        )
+        count = 0
+        for ids in split_every(ARCHIVE_CHUNK_SIZE, model.search(domain, order='id').ids):
+            model.browse(ids).write(values)
+            count += len(ids)
+            # Keep memory bounded whatever the size of the year
+            self.env.flush_all()
+            self.env.invalidate_all()
+        return count
\ No newline at end of file
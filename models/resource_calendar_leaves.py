@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+from datetime import timedelta
+from odoo import models, api
+from odoo.osv import expression
+
+from .hr_leave import SANDWICH_WINDOW_DAYS
+
+
+class ResourceCalendarLeaves(models.Model):
+    _inherit = 'resource.calendar.leaves'
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        holidays = super().create(vals_list)
+        holidays._l10n_bd_mark_sandwich_leaves(holidays._l10n_bd_get_holiday_spans())
+        return holidays
+
+    def write(self, vals):
+        track = bool({'date_from', 'date_to', 'resource_id', 'company_id'} & set(vals))
+        spans = self._l10n_bd_get_holiday_spans() if track else []
+        result = super().write(vals)
+        if track:
+            self._l10n_bd_mark_sandwich_leaves(spans + self._l10n_bd_get_holiday_spans())
+        return result
+
+    def unlink(self):
+        spans = self._l10n_bd_get_holiday_spans()
+        result = super().unlink()
+        self.env['resource.calendar.leaves']._l10n_bd_mark_sandwich_leaves(spans)
+        return result
+
+    def _l10n_bd_get_holiday_spans(self):
+        """Return (company_id, date_from, date_to) of the public holidays in self"""
+        return [
+            (holiday.company_id.id, holiday.date_from.date(), holiday.date_to.date())
+            for holiday in self
+            if not holiday.resource_id and holiday.company_id and holiday.date_from and holiday.date_to
+        ]
+
+    @api.model
+    def _l10n_bd_mark_sandwich_leaves(self, spans):
+        """Flag the sandwich leaves whose window overlaps a changed public holiday"""
+        if not spans:
+            return
+        window = timedelta(days=SANDWICH_WINDOW_DAYS)
+        domain = expression.OR([
+            [
+                ('company_id', '=', company_id),
+                ('request_date_from', '<=', date_to + window),
+                ('request_date_to', '>=', date_from - window),
+            ]
+            for company_id, date_from, date_to in set(spans)
+        ])
+        self.env['hr.leave']._l10n_bd_mark_sandwich_dirty(domain)
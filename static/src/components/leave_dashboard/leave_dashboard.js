@@ -0,0 +1,79 @@
+/** @odoo-module **/
+
+import { Component, onWillStart, useState } from "@odoo/owl";
+import { registry } from "@web/core/registry";
+import { useService } from "@web/core/utils/hooks";
+import { _t } from "@web/core/l10n/translation";
+
+const PAGE_SIZE = 20;
+
+/**
+ * Leave dashboard: the first render comes from a single aggregated call
+ * (l10n_bd_get_dashboard_data). Detail lists of the pending stages are only
+ * fetched when opened, one page at a time.
+ */
+export class LeaveDashboard extends Component {
+    static template = "l10n_bd_hr_holidays.LeaveDashboard";
+    static props = ["*"];
+
+    setup() {
+        this.orm = useService("orm");
+        this.action = useService("action");
+        this.stages = [
+            { key: "recommend", label: _t("To Recommend") },
+            { key: "forward", label: _t("To Forward") },
+            { key: "approve", label: _t("To Approve") },
+            { key: "validate", label: _t("To Validate") },
+        ];
+        this.state = useState({
+            data: null,
+            section: null,
+            details: null,
+            loading: false,
+        });
+        onWillStart(async () => {
+            this.state.data = await this.orm.call("hr.leave", "l10n_bd_get_dashboard_data", []);
+        });
+    }
+
+    async openSection(section, offset = 0) {
+        this.state.section = section;
+        this.state.loading = true;
+        try {
+            this.state.details = await this.orm.call("hr.leave", "l10n_bd_get_dashboard_details", [section], {
+                offset,
+                limit: PAGE_SIZE,
+            });
+        } finally {
+            this.state.loading = false;
+        }
+    }
+
+    get hasPrevious() {
+        return this.state.details && this.state.details.offset > 0;
+    }
+
+    get hasNext() {
+        const details = this.state.details;
+        return details && details.offset + details.limit < details.total;
+    }
+
+    previousPage() {
+        this.openSection(this.state.section, Math.max(0, this.state.details.offset - PAGE_SIZE));
+    }
+
+    nextPage() {
+        this.openSection(this.state.section, this.state.details.offset + PAGE_SIZE);
+    }
+
+    openLeave(leaveId) {
+        this.action.doAction({
+            type: "ir.actions.act_window",
+            res_model: "hr.leave",
+            res_id: leaveId,
+            views: [[false, "form"]],
+        });
+    }
+}
+
+registry.category("actions").add("l10n_bd_leave_dashboard", LeaveDashboard);
@@ -0,0 +1,93 @@
+/** @odoo-module **/
+
+import { Component, useState } from "@odoo/owl";
+import { registry } from "@web/core/registry";
+import { useService } from "@web/core/utils/hooks";
+import { deserializeDate, serializeDate } from "@web/core/l10n/dates";
+import { useRecordObserver } from "@web/model/relational_model/utils";
+import { standardWidgetProps } from "@web/views/widgets/standard_widget_props";
+
+/**
+ * Count the sandwich days on one side of a leave, like
+ * hr.leave._l10n_bd_get_sandwich_extension: walk over consecutive
+ * non-working days and keep them only if another leave closes the sandwich.
+ */
+function countSandwichDays(payload, index, direction) {
+    const bitmap = payload.non_working;
+    let count = 0;
+    let current = index + direction;
+    while (count < payload.max_check && bitmap[current] === "1") {
+        count++;
+        current += direction;
+    }
+    if (!count) {
+        return 0;
+    }
+    const closed = payload.leaves.some(([start, end]) => start <= current && current <= end);
+    return closed ? count : 0;
+}
+
+/**
+ * Sandwich-adjusted duration computed in the browser from a payload sent
+ * once by l10n_bd_get_sandwich_calendar. The payload is only fetched again
+ * when the employee or leave type changes or the dates leave its window;
+ * the server still computes the authoritative duration on save.
+ */
+export class SandwichPreview extends Component {
+    static template = "l10n_bd_hr_holidays.SandwichPreview";
+    static props = { ...standardWidgetProps };
+
+    setup() {
+        this.orm = useService("orm");
+        this.state = useState({ days: null, sandwichDays: 0 });
+        this.payload = null;
+        this.payloadKey = null;
+        useRecordObserver((record) => this.update(record));
+    }
+
+    covers(fromIndex, toIndex) {
+        const margin = this.payload.max_check + 1;
+        return fromIndex - margin >= 0 && toIndex + margin < this.payload.non_working.length;
+    }
+
+    async update(record) {
+        const { request_date_from: dateFrom, request_date_to: dateTo, employee_id, holiday_status_id } = record.data;
+        if (!dateFrom || !dateTo || !employee_id || !holiday_status_id || dateFrom > dateTo) {
+            this.state.days = null;
+            return;
+        }
+        const key = `${employee_id[0]}-${holiday_status_id[0]}`;
+        let fromIndex, toIndex;
+        if (this.payload && this.payloadKey === key && this.payload.sandwich) {
+            const windowStart = deserializeDate(this.payload.window_start);
+            fromIndex = Math.round(dateFrom.diff(windowStart, "days").days);
+            toIndex = Math.round(dateTo.diff(windowStart, "days").days);
+        }
+        if (!this.payload || this.payloadKey !== key || (this.payload.sandwich && !this.covers(fromIndex, toIndex))) {
+            this.payload = await this.orm.call(
+                "hr.leave",
+                "l10n_bd_get_sandwich_calendar",
+                [employee_id[0], holiday_status_id[0], serializeDate(dateFrom), serializeDate(dateTo)],
+                { leave_id: record.resId || false }
+            );
+            this.payloadKey = key;
+            if (this.payload.sandwich) {
+                const windowStart = deserializeDate(this.payload.window_start);
+                fromIndex = Math.round(dateFrom.diff(windowStart, "days").days);
+                toIndex = Math.round(dateTo.diff(windowStart, "days").days);
+            }
+        }
+        if (!this.payload.sandwich) {
+            this.state.days = null;
+            return;
+        }
+        const sandwichDays =
+            countSandwichDays(this.payload, fromIndex, -1) + countSandwichDays(this.payload, toIndex, 1);
+        this.state.sandwichDays = sandwichDays;
+        this.state.days = toIndex - fromIndex + 1 + sandwichDays;
+    }
+}
+
+registry.category("view_widgets").add("l10n_bd_sandwich_preview", {
+    component: SandwichPreview,
+});
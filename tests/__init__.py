@@ -0,0 +1,5 @@
+# -*- coding: utf-8 -*-
+from . import test_year_archive
+from . import test_query_plans
+from . import test_outbox
+from . import test_delegation_closure
\ No newline at end of file
@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+from datetime import date, timedelta
+
+from odoo.tests import TransactionCase, tagged
+
+
+@tagged('post_install', '-at_install')
+class TestDelegationClosure(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.env = cls.env(context=dict(cls.env.context, tracking_disable=True))
+        Users = cls.env['res.users'].with_context(no_reset_password=True)
+        cls.old_manager_user, cls.new_manager_user, cls.absent_user = Users.create([{
+            'name': 'Closure Test %s' % name,
+            'login': 'l10n_bd_closure_%s' % name,
+        } for name in ('old_manager', 'new_manager', 'absent')])
+        cls.old_manager, cls.new_manager = cls.env['hr.employee'].create([
+            {'name': 'Closure Test Old Manager', 'user_id': cls.old_manager_user.id},
+            {'name': 'Closure Test New Manager', 'user_id': cls.new_manager_user.id},
+        ])
+        cls.employee = cls.env['hr.employee'].create({
+            'name': 'Closure Test Absent',
+            'user_id': cls.absent_user.id,
+            'parent_id': cls.old_manager.id,
+        })
+        leave_type = cls.env['hr.leave.type'].create({
+            'name': 'Closure Test',
+            'requires_allocation': 'no',
+            'leave_validation_type': 'no_validation',
+        })
+        today = date.today()
+        leave = cls.env['hr.leave'].create({
+            'employee_id': cls.employee.id,
+            'holiday_status_id': leave_type.id,
+            'request_date_from': today - timedelta(days=3),
+            'request_date_to': today + timedelta(days=3),
+        })
+        leave.sudo().write({'state': 'validate'})
+
+    def test_manager_change_moves_fallback(self):
+        Delegation = self.env['hr.leave.delegation']
+        self.assertIn(self.absent_user.id, Delegation._get_acting_for(self.old_manager_user.id))
+        
+        self.employee.parent_id = self.new_manager
+        self.assertNotIn(self.absent_user.id, Delegation._get_acting_for(self.old_manager_user.id))
+        self.assertIn(self.absent_user.id, Delegation._get_acting_for(self.new_manager_user.id))
+    
+    def test_user_change_moves_fallback(self):
+        Delegation = self.env['hr.leave.delegation']
+        self.assertIn(self.absent_user.id, Delegation._get_acting_for(self.old_manager_user.id))
+        
+        self.employee.user_id = False
+        self.assertNotIn(self.absent_user.id, Delegation._get_acting_for(self.old_manager_user.id))
\ No newline at end of file
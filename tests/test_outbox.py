@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+import json
+from datetime import date, timedelta
+
+from odoo.tests import TransactionCase, tagged
+
+
+@tagged('post_install', '-at_install')
+class TestOutbox(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.env = cls.env(context=dict(cls.env.context, tracking_disable=True))
+        cls.manager = cls.env.ref('base.user_admin')
+        cls.leave_type = cls.env['hr.leave.type'].create({
+            'name': 'Outbox Test',
+            'requires_allocation': 'no',
+            'leave_validation_type': 'manager',
+        })
+        cls.employee = cls.env['hr.employee'].create({
+            'name': 'Outbox Test Employee',
+            'leave_manager_id': cls.manager.id,
+        })
+        start = date.today() + timedelta(days=60)
+        start += timedelta(days=-start.weekday())
+        cls.leave = cls.env['hr.leave'].create({
+            'employee_id': cls.employee.id,
+            'holiday_status_id': cls.leave_type.id,
+            'request_date_from': start,
+            'request_date_to': start + timedelta(days=1),
+        })
+
+    def test_refuse_payload_carries_reason(self):
+        wizard = self.env['hr.leave.refuse.wizard'].with_user(self.manager).create({
+            'leave_id': self.leave.id,
+            'refuse_reason': 'workload',
+        })
+        wizard.action_refuse()
+        self.assertEqual(self.leave.state, 'refuse')
+        event = self.env['hr.leave.outbox'].search([
+            ('event', '=', 'leave_refuse'),
+            ('res_model', '=', 'hr.leave'),
+            ('res_id', '=', self.leave.id),
+        ])
+        self.assertEqual(len(event), 1)
+        self.assertEqual(json.loads(event.payload)['refuse_reason'], 'workload')
\ No newline at end of file
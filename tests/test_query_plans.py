@@ -0,0 +1,26 @@
+# -*- coding: utf-8 -*-
+from odoo.tests import TransactionCase, tagged
+
+from ..tools import query_plans
+
+
+@tagged('post_install', '-at_install', 'l10n_bd_query_plans')
+class TestQueryPlans(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        # Enough rows in both watched tables for the planner to prefer the indexes
+        cls.sample = query_plans.seed(cls.env, employees=150, leaves_per_employee=30, years=3)
+        cls.table_rows = {
+            table: query_plans.get_table_rows(cls.env, table) for table in query_plans.WATCHED_TABLES
+        }
+
+    def test_hot_domains_use_indexes(self):
+        for label, model, domain, search_kwargs, context in query_plans.get_hot_domains(self.env, self.sample):
+            with self.subTest(label):
+                plan = query_plans.explain(self.env, model, domain, search_kwargs, context)
+                self.assertFalse(
+                    query_plans.get_seq_scans(plan, self.table_rows),
+                    'Sequential scan in the plan of %s' % label,
+                )
\ No newline at end of file
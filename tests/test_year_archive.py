@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+from datetime import date
+
+from odoo.tests import TransactionCase, tagged
+
+
+@tagged('post_install', '-at_install')
+class TestYearArchive(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.env = cls.env(context=dict(cls.env.context, tracking_disable=True))
+        cls.year = date.today().year - 2
+        cls.leave_type = cls.env['hr.leave.type'].create({
+            'name': 'Archive Test',
+            'requires_allocation': 'yes',
+            'leave_validation_type': 'no_validation',
+        })
+        cls.employee = cls.env['hr.employee'].create({'name': 'Archive Test Employee'})
+        cls.allocation = cls.env['hr.leave.allocation'].create({
+            'name': 'Archive Test %s' % cls.year,
+            'employee_id': cls.employee.id,
+            'holiday_status_id': cls.leave_type.id,
+            'number_of_days': 20,
+            'date_from': date(cls.year, 1, 1),
+            'date_to': date(cls.year, 12, 31),
+            'allocation_type': 'regular',
+        })
+        cls.allocation.action_validate()
+        cls.previous_allocation = cls.env['hr.leave.allocation'].create({
+            'name': 'Archive Test %s' % (cls.year - 1),
+            'employee_id': cls.employee.id,
+            'holiday_status_id': cls.leave_type.id,
+            'number_of_days': 10,
+            'date_from': date(cls.year - 1, 1, 1),
+            'date_to': date(cls.year - 1, 12, 31),
+            'allocation_type': 'regular',
+        })
+        cls.previous_allocation.action_validate()
+        # The year must have been closed by a carryover run
+        carryover = cls.env['hr.leave.allocation'].create({
+            'name': 'Archive Test Carryover',
+            'employee_id': cls.employee.id,
+            'holiday_status_id': cls.leave_type.id,
+            'number_of_days': 2,
+            'date_from': date(cls.year + 1, 1, 1),
+            'date_to': date(cls.year + 1, 3, 31),
+            'allocation_type': 'regular',
+            'l10n_bd_is_carryover': True,
+            'l10n_bd_carryover_from_year': cls.year,
+            'l10n_bd_carryover_expiry_date': date(cls.year + 1, 3, 31),
+        })
+        carryover.action_validate()
+        cls.leave = cls.env['hr.leave'].create({
+            'employee_id': cls.employee.id,
+            'holiday_status_id': cls.leave_type.id,
+            'request_date_from': date(cls.year, 3, 4),
+            'request_date_to': date(cls.year, 3, 5),
+        })
+        cls.leave.sudo().write({'state': 'validate'})
+
+    def test_archive_and_restore_year(self):
+        Summary = self.env['hr.leave.year.summary']
+        archived = Summary.archive_year(self.year)
+        self.assertEqual(archived['leaves'], 1)
+        self.assertEqual(archived['allocations'], 1)
+        self.assertFalse(self.leave.active)
+        self.assertEqual(self.leave.l10n_bd_archived_year, self.year)
+        self.assertFalse(self.allocation.active)
+        # Allocations of older years are left to their own archival
+        self.assertTrue(self.previous_allocation.active)
+        summary = Summary.search([('year', '=', self.year), ('employee_id', '=', self.employee.id)])
+        self.assertEqual(summary.taken_days, self.leave.number_of_days)
+        self.assertEqual(summary.allocated_days, 20)
+        
+        restored = Summary.restore_year(self.year)
+        self.assertEqual(restored, {'leaves': 1, 'allocations': 1})
+        self.assertTrue(self.leave.active)
+        self.assertFalse(self.leave.l10n_bd_archived_year)
+        self.assertTrue(self.allocation.active)
+        self.assertFalse(Summary.search([('year', '=', self.year)]))
\ No newline at end of file
@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Concurrency load harness for the leave approval workflow.
+
+Runs several approver sessions in parallel against a local Odoo server.
+Each session repeatedly picks a leave waiting for it (recommend, forward
+or approve stage) and applies the transition through JSON-RPC. Sessions
+deliberately share overlapping leaves to provoke row lock contention.
+
+Usage:
+    python3 tools/approval_load_harness.py --url http://localhost:8069 --db mydb \\
+        --user recommender1:pwd --user forwarder1:pwd --user manager1:pwd \\
+        --sessions-per-user 4 --duration 60 --server-log /var/log/odoo/odoo.log
+
+Reports throughput, latency percentiles and serialization failure rates.
+Odoo retries serialization failures itself before answering, so those
+retries are only visible in the server log (--server-log); failures that
+exhausted the server retries are counted on the client side.
+"""
+import argparse
+import itertools
+import json
+import os
+import random
+import statistics
+import threading
+import time
+import urllib.request
+
+STAGE_TRANSITIONS = {
+    'recommend': 'action_recommend',
+    'forward': 'action_forward',
+    'approve': 'action_approve',
+}
+
+SERIALIZATION_MARKERS = (
+    'could not serialize access',
+    'concurrent update',
+    'SerializationFailure',
+)
+
+# Logged by odoo.service.model each time a transaction is retried
+SERVER_RETRY_MARKER = 'tries left, try again in'
+
+
+class RpcError(Exception):
+    pass
+
+
+class OdooSession:
+    """Minimal JSON-RPC client, one per simulated approver session"""
+
+    _ids = itertools.count(1)
+
+    def __init__(self, url, db, login, password):
+        self.url = url.rstrip('/') + '/jsonrpc'
+        self.db = db
+        self.password = password
+        self.uid = self._call('common', 'login', db, login, password)
+        if not self.uid:
+            raise RpcError('Authentication failed for %s' % login)
+
+    def _call(self, service, method, *args):
+        payload = json.dumps({
+            'jsonrpc': '2.0',
+            'method': 'call',
+            'id': next(self._ids),
+            'params': {'service': service, 'method': method, 'args': args},
+        }).encode()
+        request = urllib.request.Request(self.url, payload, {'Content-Type': 'application/json'})
+        with urllib.request.urlopen(request, timeout=120) as response:
+            reply = json.loads(response.read())
+        if reply.get('error'):
+            error = reply['error']
+            raise RpcError(error.get('data', {}).get('message') or error.get('message'))
+        return reply['result']
+
+    def execute(self, model, method, *args, **kwargs):
+        return self._call('object', 'execute_kw', self.db, self.uid, self.password, model, method, list(args), kwargs)
+
+
+class Stats:
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = []
+        self.succeeded = 0
+        self.refused_by_workflow = 0
+        self.serialization_failures = 0
+        self.other_errors = 0
+
+    def record(self, latency, outcome):
+        with self.lock:
+            if latency is not None:
+                self.latencies.append(latency)
+            if outcome == 'ok':
+                self.succeeded += 1
+            elif outcome == 'serialization':
+                self.serialization_failures += 1
+            elif outcome == 'workflow':
+                self.refused_by_workflow += 1
+            else:
+                self.other_errors += 1
+
+
+def run_session(session, stats, deadline, page_size):
+    while time.monotonic() < deadline:
+        stage = random.choice(list(STAGE_TRANSITIONS))
+        try:
+            page = session.execute('hr.leave', 'l10n_bd_get_dashboard_details', stage, limit=page_size)
+        except (RpcError, OSError):
+            stats.record(None, 'error')
+            continue
+        if not page['records']:
+            time.sleep(0.2)
+            continue
+        leave_id = random.choice(page['records'])['id']
+        start = time.monotonic()
+        try:
+            session.execute('hr.leave', STAGE_TRANSITIONS[stage], [leave_id])
+            outcome = 'ok'
+        except RpcError as e:
+            message = str(e)
+            if any(marker in message for marker in SERIALIZATION_MARKERS):
+                outcome = 'serialization'
+            else:
+                # Another session moved the leave first, or access was refused
+                outcome = 'workflow'
+        except OSError:
+            outcome = 'error'
+        stats.record(time.monotonic() - start, outcome)
+
+
+def count_server_retries(path, offset):
+    if not path or not os.path.exists(path):
+        return None
+    with open(path, 'rb') as log:
+        log.seek(offset)
+        return sum(1 for line in log if SERVER_RETRY_MARKER.encode() in line)
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(pct / 100.0 * (len(values) - 1))))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', default='http://localhost:8069')
+    parser.add_argument('--db', required=True)
+    parser.add_argument('--user', action='append', required=True, metavar='LOGIN:PASSWORD',
+                        help='Approver credentials, repeat for each approver')
+    parser.add_argument('--sessions-per-user', type=int, default=2)
+    parser.add_argument('--duration', type=float, default=30.0, help='Seconds to run')
+    parser.add_argument('--page-size', type=int, default=20,
+                        help='Leaves each session picks from; smaller means more contention')
+    parser.add_argument('--server-log', help='Odoo log file, to count server-side serialization retries')
+    args = parser.parse_args()
+
+    log_offset = os.path.getsize(args.server_log) if args.server_log and os.path.exists(args.server_log) else 0
+    sessions = []
+    for credentials in args.user:
+        login, password = credentials.split(':', 1)
+        sessions += [OdooSession(args.url, args.db, login, password) for __ in range(args.sessions_per_user)]
+
+    stats = Stats()
+    started = time.monotonic()
+    deadline = started + args.duration
+    threads = [
+        threading.Thread(target=run_session, args=(session, stats, deadline, args.page_size))
+        for session in sessions
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - started
+
+    attempts = len(stats.latencies)
+    server_retries = count_server_retries(args.server_log, log_offset)
+    print('Sessions:                  %d' % len(sessions))
+    print('Elapsed:                   %.1f s' % elapsed)
+    print('Transitions attempted:     %d' % attempts)
+    print('Transitions succeeded:     %d (%.1f/s)' % (stats.succeeded, stats.succeeded / elapsed))
+    print('Lost races (workflow):     %d' % stats.refused_by_workflow)
+    print('Serialization failures:    %d (%.2f%%)' % (
+        stats.serialization_failures, 100.0 * stats.serialization_failures / attempts if attempts else 0.0))
+    print('Other errors:              %d' % stats.other_errors)
+    if server_retries is not None:
+        print('Server-side retries:       %d (%.2f per transition)' % (
+            server_retries, server_retries / attempts if attempts else 0.0))
+    if stats.latencies:
+        print('Latency mean/p50/p95/p99:  %.3f / %.3f / %.3f / %.3f s' % (
+            statistics.mean(stats.latencies),
+            percentile(stats.latencies, 50),
+            percentile(stats.latencies, 95),
+            percentile(stats.latencies, 99),
+        ))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+"""
+Versioned ormcache keys shared by all workers.
+
+A method cached with ``@ormcache(..., 'version')`` is called with the value
+of ``get(env, name)``; ``bump(env, name)`` moves every worker to a new
+version instead of clearing every cache of the registry. Versions are
+Postgres sequences: they are not transactional, so the version is bumped
+right away for the current transaction, and once more after commit so that
+the other workers drop what they may have cached before the commit.
+"""
+from odoo.tools import SQL
+
+
+def create(cr, name):
+    """Create the version sequence, from the init() of the owning model"""
+    cr.execute(SQL("CREATE SEQUENCE IF NOT EXISTS %s", SQL.identifier(name)))
+
+
+def get(env, name):
+    """Current version, read once per transaction"""
+    cache = env.cr.cache
+    if name not in cache:
+        # NULL until the sequence exists, e.g. while the module installs
+        env.cr.execute(SQL("SELECT COALESCE(pg_sequence_last_value(to_regclass(%s)), 0)", name))
+        cache[name] = env.cr.fetchone()[0]
+    return cache[name]
+
+
+def bump(env, name):
+    """Move the current transaction, then every worker after commit, to a new version"""
+    query = SQL("SELECT nextval(%s)", name)
+    env.cr.execute(query)
+    env.cr.cache[name] = env.cr.fetchone()[0]
+    registry = env.registry
+
+    def bump_after_commit():
+        with registry.cursor() as cr:
+            cr.execute(query)
+
+    env.cr.postcommit.add(bump_after_commit)
\ No newline at end of file
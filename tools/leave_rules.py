@@ -0,0 +1,178 @@
+# -*- coding: utf-8 -*-
+"""
+ORM-free leave rules.
+
+Pure functions over dates, numbers and small ``__slots__`` structures for
+the sandwich rule, the notice-days check, the max-days-per-year check and
+the carryover arithmetic. The ``hr.leave`` and ``hr.leave.allocation``
+methods are thin adapters over this module, and bulk tools (imports,
+previews, simulations) can evaluate millions of rules without records.
+"""
+from bisect import bisect_right
+from dataclasses import dataclass
+from datetime import date, timedelta
+
+from dateutil.relativedelta import relativedelta
+
+# Consecutive non-working days looked at on each side of a leave
+MAX_SANDWICH_CHECK = 7
+
+ONE_DAY = timedelta(days=1)
+
+
+# ========================================
+# DATA STRUCTURES
+# ========================================
+
+@dataclass(slots=True, frozen=True)
+class LeaveSpan:
+    """Inclusive date range of a leave"""
+    start: date
+    end: date
+
+
+@dataclass(slots=True)
+class BitmapCalendar:
+    """Non-working days of a calendar over a window, one byte per day (1 = off)"""
+    start: date
+    bitmap: bytearray
+
+    @classmethod
+    def from_days(cls, start, end, non_working_days):
+        bitmap = bytearray((end - start).days + 1)
+        for day in non_working_days:
+            if start <= day <= end:
+                bitmap[(day - start).days] = 1
+        return cls(start, bitmap)
+
+    def is_non_working(self, day):
+        index = (day - self.start).days
+        return 0 <= index < len(self.bitmap) and self.bitmap[index] == 1
+
+
+@dataclass(slots=True)
+class SpanIndex:
+    """Merged, sorted leave spans answering 'is this day on leave?' in O(log n)"""
+    starts: list
+    ends: list
+
+    @classmethod
+    def from_spans(cls, spans):
+        starts, ends = [], []
+        for start, end in sorted((span.start, span.end) for span in spans):
+            if ends and start <= ends[-1] + ONE_DAY:
+                ends[-1] = max(ends[-1], end)
+            else:
+                starts.append(start)
+                ends.append(end)
+        return cls(starts, ends)
+
+    def covers(self, day):
+        index = bisect_right(self.starts, day) - 1
+        return index >= 0 and self.ends[index] >= day
+
+
+# ========================================
+# SANDWICH RULE
+# ========================================
+
+def _count_sandwich_days(start_date, direction, is_non_working, is_on_leave, max_check):
+    step = ONE_DAY * direction
+    days_count = 0
+    current_date = start_date + step
+    while days_count < max_check and is_non_working(current_date):
+        days_count += 1
+        current_date += step
+    # The run of days off only counts if another leave closes the sandwich
+    if days_count and is_on_leave(current_date):
+        return days_count
+    return 0
+
+
+def sandwich_extension(date_from, date_to, is_non_working, neighbours, max_check=MAX_SANDWICH_CHECK):
+    """
+    Reference implementation: return the (before, after) sandwich days of a
+    leave. ``is_non_working(day)`` tells whether a day is off and
+    ``neighbours`` lists the employee's other leaves as LeaveSpan.
+    """
+    if not date_from or not date_to or date_from > date_to:
+        return 0, 0
+
+    def is_on_leave(day):
+        return any(span.start <= day <= span.end for span in neighbours)
+
+    return (
+        _count_sandwich_days(date_from, -1, is_non_working, is_on_leave, max_check),
+        _count_sandwich_days(date_to, 1, is_non_working, is_on_leave, max_check),
+    )
+
+
+def sandwich_extension_fast(date_from, date_to, calendar, neighbour_index, max_check=MAX_SANDWICH_CHECK):
+    """
+    Same result as sandwich_extension, for bulk evaluation: the calendar is a
+    BitmapCalendar and the neighbours a SpanIndex shared by many checks.
+    """
+    if not date_from or not date_to or date_from > date_to:
+        return 0, 0
+    return (
+        _count_sandwich_days(date_from, -1, calendar.is_non_working, neighbour_index.covers, max_check),
+        _count_sandwich_days(date_to, 1, calendar.is_non_working, neighbour_index.covers, max_check),
+    )
+
+
+def sandwich_duration(date_from, date_to, before, after):
+    """Calendar days of the leave plus its sandwich days, 0 for an invalid range"""
+    if not date_from or not date_to or date_from > date_to:
+        return 0
+    return (date_to - date_from).days + 1 + before + after
+
+
+# ========================================
+# NOTICE DAYS
+# ========================================
+
+def notice_shortfall(leave_start, today, notice_days):
+    """Return the days of advance notice given when it is below notice_days, else None"""
+    if not leave_start or not notice_days or notice_days <= 0:
+        return None
+    days_advance = (leave_start - today).days
+    if days_advance < notice_days:
+        return max(0, days_advance)
+    return None
+
+
+# ========================================
+# MAX DAYS PER YEAR
+# ========================================
+
+def exceeds_max_days(existing_days, requested_days, max_days):
+    """Whether allocating requested_days on top of existing_days breaks the yearly maximum"""
+    if not max_days or max_days <= 0:
+        return False
+    return existing_days + requested_days > max_days
+
+
+# ========================================
+# CARRYOVER
+# ========================================
+
+def carryover_days(allocated, taken, max_days):
+    """Unused days carried to next year, capped by max_days when set"""
+    unused = allocated - taken
+    if unused <= 0:
+        return 0
+    if max_days and max_days > 0:
+        return min(unused, max_days)
+    return unused
+
+
+def carryover_expiry_date(from_year, expiry_months):
+    """Expiry of days carried over from from_year, None when they never expire"""
+    if not expiry_months or expiry_months <= 0:
+        return None
+    return date(from_year + 1, 1, 1) + relativedelta(months=expiry_months)
+
+
+def expired_carryover_forfeit(number_of_days, consumed):
+    """Days lost when a carryover allocation expires"""
+    return max(0, number_of_days - consumed)
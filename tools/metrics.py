@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+"""
+In-process counters for the leave workflow metrics endpoint.
+
+Counters live in the memory of each worker process and are exposed with a
+``worker`` label, the usual layout for Prometheus counters in a pre-forked
+server; per-minute rates are obtained with ``rate()`` on the scraper side.
+"""
+import collections
+import os
+import threading
+
+_lock = threading.Lock()
+_transitions = collections.Counter()
+
+
+def count_transition(state, count=1):
+    """Count leaves entering ``state``"""
+    with _lock:
+        _transitions[state] += count
+
+
+def get_transitions():
+    with _lock:
+        return dict(_transitions)
+
+
+def worker_label():
+    return str(os.getpid())
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def render(metrics):
+    """
+    Render metrics in the Prometheus text exposition format.
+    ``metrics`` is a list of (name, type, help, [(labels dict, value)]).
+    """
+    lines = []
+    for name, metric_type, help_text, samples in metrics:
+        lines.append('# HELP %s %s' % (name, help_text))
+        lines.append('# TYPE %s %s' % (name, metric_type))
+        for labels, value in samples:
+            if labels:
+                label_text = ','.join('%s="%s"' % (key, _escape(val)) for key, val in sorted(labels.items()))
+                lines.append('%s{%s} %s' % (name, label_text, float(value)))
+            else:
+                lines.append('%s %s' % (name, float(value)))
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Local HTTP stand-in for the downstream receiver of the leave event outbox.
+
+Accepts the batches POSTed by hr.leave.outbox._cron_dispatch, prints the
+events, deduplicates them on their id the way a real receiver must (the
+outbox delivers at least once) and can fail on purpose to exercise the
+retries and the backoff.
+
+Usage:
+    python3 tools/outbox_stub_server.py --port 8099 --fail-rate 0.3
+    # then, on the Odoo database:
+    #   l10n_bd_hr_holidays.outbox_url = http://localhost:8099/events
+
+Options:
+    --fail-rate   share of the batches answered with HTTP 503
+    --fail-first  number of batches answered with HTTP 503 before any success
+    --delay       seconds to wait before answering, to test the timeout
+"""
+import argparse
+import json
+import random
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class OutboxStubHandler(BaseHTTPRequestHandler):
+
+    def do_POST(self):
+        server = self.server
+        body = self.rfile.read(int(self.headers.get('Content-Length') or 0))
+        try:
+            events = json.loads(body)['events']
+        except (ValueError, KeyError, TypeError):
+            return self.answer(400, {'error': 'expected {"events": [...]}'})
+
+        if server.delay:
+            time.sleep(server.delay)
+        server.batches += 1
+        if server.batches <= server.fail_first or server.rng.random() < server.fail_rate:
+            print('batch %d: %d events -> 503' % (server.batches, len(events)))
+            return self.answer(503, {'error': 'simulated failure'})
+
+        duplicates = 0
+        for event in events:
+            if event['id'] in server.seen:
+                duplicates += 1
+                continue
+            server.seen.add(event['id'])
+            print('  #%s %s %s/%s %s' % (
+                event['id'], event['event'], event['model'], event['res_id'], json.dumps(event['payload'])))
+        print('batch %d: %d events, %d duplicates, %d distinct so far' % (
+            server.batches, len(events), duplicates, len(server.seen)))
+        self.answer(200, {'received': len(events) - duplicates})
+
+    def answer(self, status, data):
+        body = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Batches are already printed by do_POST
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8099)
+    parser.add_argument('--fail-rate', type=float, default=0.0)
+    parser.add_argument('--fail-first', type=int, default=0)
+    parser.add_argument('--delay', type=float, default=0.0)
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer((args.host, args.port), OutboxStubHandler)
+    server.fail_rate = args.fail_rate
+    server.fail_first = args.fail_first
+    server.delay = args.delay
+    server.rng = random.Random(args.seed)
+    server.batches = 0
+    server.seen = set()
+    print('Listening on http://%s:%d/' % (args.host, args.port))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
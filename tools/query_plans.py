@@ -0,0 +1,261 @@
+# -*- coding: utf-8 -*-
+"""
+Query-plan regression checks for the hot domains of the module.
+
+Seeds a realistic dataset inside a savepoint, runs EXPLAIN (FORMAT JSON)
+on the SQL generated by the domains of the sandwich lookup, the
+allocation constraints, the carryover jobs, the crons and the custom
+search filters, and fails when a plan sequentially scans hr_leave or
+hr_leave_allocation while the table holds more rows than the threshold.
+The seeded data is rolled back afterwards. ANALYZE is opt-in: the
+statistics it writes to pg_class survive the rollback.
+
+The same checks run in tests/test_query_plans.py. Usage, from an Odoo
+shell on a database with the module installed:
+    odoo-bin shell -d mydb <<'EOF'
+    from odoo.addons.l10n_bd_hr_holidays.tools import query_plans
+    query_plans.run(env, analyze=True)
+    EOF
+"""
+import logging
+from datetime import date, timedelta
+
+from odoo import fields
+from odoo.tools import SQL
+
+_logger = logging.getLogger(__name__)
+
+WATCHED_TABLES = ('hr_leave', 'hr_leave_allocation')
+
+# Rows a watched table may hold before a sequential scan on it is reported
+DEFAULT_THRESHOLD = 1000
+
+SEED_CONTEXT = {
+    'leave_fast_create': True,
+    'tracking_disable': True,
+    'mail_create_nolog': True,
+    'mail_activity_automation_skip': True,
+    'l10n_bd_skip_sandwich_tracking': True,
+}
+
+
+class _Rollback(Exception):
+    pass
+
+
+def seed(env, employees=300, leaves_per_employee=30, years=3, analyze=False):
+    """Create employees, allocations and leaves spread over several years"""
+    env = env(context=dict(env.context, **SEED_CONTEXT), su=True)
+    company = env.company
+    today = fields.Date.context_today(env['hr.leave'])
+    first_year = today.year - years + 1
+
+    leave_types = env['hr.leave.type'].create([{
+        'name': 'Query Plan Check %s' % index,
+        'company_id': company.id,
+        'requires_allocation': 'yes',
+        'leave_validation_type': 'manager',
+        'l10n_bd_require_recommendation': bool(index),
+        'l10n_bd_is_sandwich_leave': not index,
+        'l10n_bd_carryover_allowed': True,
+        'l10n_bd_carryover_max_days': 5,
+    } for index in range(2)])
+    staff = env['hr.employee'].create([{
+        'name': 'Query Plan Check %s' % index,
+        'company_id': company.id,
+        'resource_calendar_id': company.resource_calendar_id.id,
+    } for index in range(employees)])
+
+    allocation_vals = []
+    for employee in staff:
+        for leave_type in leave_types:
+            for year in range(first_year, today.year + 1):
+                allocation_vals.append({
+                    'name': 'Query Plan Check %s' % year,
+                    'employee_id': employee.id,
+                    'holiday_status_id': leave_type.id,
+                    'number_of_days': 40,
+                    'date_from': date(year, 1, 1),
+                    'date_to': date(year, 12, 31),
+                    'allocation_type': 'regular',
+                })
+            allocation_vals.append({
+                'name': 'Query Plan Check Carryover',
+                'employee_id': employee.id,
+                'holiday_status_id': leave_type.id,
+                'number_of_days': 5,
+                'date_from': date(today.year, 1, 1),
+                'date_to': date(today.year, 3, 31),
+                'allocation_type': 'regular',
+                'l10n_bd_is_carryover': True,
+                'l10n_bd_carryover_from_year': today.year - 1,
+                'l10n_bd_carryover_expiry_date': date(today.year, 3, 31),
+            })
+    env['hr.leave.allocation'].create(allocation_vals).action_validate()
+
+    # One leave every few weeks, Monday to Monday-Wednesday, so that
+    # requests of the same employee never overlap
+    first_monday = date(first_year, 1, 1) + timedelta(days=-date(first_year, 1, 1).weekday() % 7)
+    weeks = max((today - first_monday).days // 7, 1)
+    step = max(weeks // leaves_per_employee, 1)
+    leave_vals = []
+    for index, employee in enumerate(staff):
+        for number in range(leaves_per_employee):
+            start = first_monday + timedelta(weeks=(number * step + index % step) % weeks)
+            leave_vals.append({
+                'employee_id': employee.id,
+                'holiday_status_id': leave_types[number % 2].id,
+                'request_date_from': start,
+                'request_date_to': start + timedelta(days=number % 3),
+            })
+    leaves = env['hr.leave'].create(leave_vals)
+
+    # Most leaves end up validated, the rest spread over the workflow states
+    states = ['validate'] * 6 + ['confirm', 'recommend', 'forward', 'refuse']
+    for state in set(states):
+        leaves.filtered(lambda l: states[l.id % len(states)] == state).write({'state': state})
+
+    env.flush_all()
+    if analyze:
+        # Not transactional: the new statistics outlive the seeded rows
+        env.cr.execute(SQL('ANALYZE %s', SQL(', ').join(SQL.identifier(table) for table in WATCHED_TABLES)))
+    return {
+        'employee': staff[0],
+        'leave_type': leave_types[0],
+        'year': today.year - 1,
+        'today': today,
+        'user': env.ref('base.user_admin'),
+    }
+
+
+def get_hot_domains(env, sample):
+    """Return (label, model, domain, search kwargs, context) of the hot searches"""
+    employee = sample['employee']
+    leave_type = sample['leave_type']
+    year = sample['year']
+    today = sample['today']
+    window_from = today - timedelta(days=30)
+    window_to = today + timedelta(days=30)
+
+    checks = [
+        ('sandwich neighbours (_get_durations)', 'hr.leave', [
+            ('employee_id', 'in', employee.ids),
+            ('state', 'not in', ['cancel', 'refuse']),
+            ('request_date_from', '<=', window_to),
+            ('request_date_to', '>=', window_from),
+        ], {}, {}),
+        ('other allocations (_check_max_days_per_year)', 'hr.leave.allocation', [
+            ('employee_id', '=', employee.id),
+            ('holiday_status_id', '=', leave_type.id),
+            ('state', 'in', ['confirm', 'validate1', 'validate']),
+            ('l10n_bd_is_carryover', '=', False),
+            ('id', '!=', 0),
+        ], {}, {}),
+        ('year allocations (_create_carryover_allocation)', 'hr.leave.allocation', [
+            ('employee_id', '=', employee.id),
+            ('holiday_status_id', '=', leave_type.id),
+            ('state', '=', 'validate'),
+            ('date_from', '>=', date(year, 1, 1)),
+            ('date_from', '<=', date(year, 12, 31)),
+        ], {}, {}),
+        ('existing carryover (_create_carryover_allocation)', 'hr.leave.allocation', [
+            ('employee_id', '=', employee.id),
+            ('holiday_status_id', '=', leave_type.id),
+            ('l10n_bd_is_carryover', '=', True),
+            ('l10n_bd_carryover_from_year', '=', year),
+        ], {'limit': 1}, {'active_test': False}),
+        ('expired carryover (_cron_expire_carryover_allocations)', 'hr.leave.allocation', [
+            ('l10n_bd_is_carryover', '=', True),
+            ('l10n_bd_carryover_expiry_date', '!=', False),
+            ('l10n_bd_carryover_expiry_date', '<', today),
+            ('l10n_bd_carryover_expired', '=', False),
+            ('state', '=', 'validate'),
+        ], {}, {}),
+        ('overdue leaves (_cron_escalate_overdue_leaves)', 'hr.leave', [
+            ('l10n_bd_escalation_deadline', '<=', fields.Datetime.now()),
+        ], {'limit': 200, 'order': 'l10n_bd_escalation_deadline'}, {}),
+        ('dirty sandwich leaves (_cron_recompute_sandwich_durations)', 'hr.leave', [
+            ('l10n_bd_sandwich_dirty', '=', True),
+        ], {'limit': 500}, {}),
+    ]
+
+    # Search filters of the leave views
+    view_filters = {
+        'to_recommend': [('state', '=', 'confirm'), ('holiday_status_id.l10n_bd_require_recommendation', '=', True)],
+        'recommended': [('state', '=', 'recommend')],
+        'to_forward': [('state', '=', 'recommend'), ('holiday_status_id.l10n_bd_require_forward', '=', True)],
+        'forwarded': [('state', '=', 'forward')],
+    }
+    for name, domain in view_filters.items():
+        checks.append(('filter %s' % name, 'hr.leave', domain, {'limit': 80}, {}))
+
+    pending = env['hr.leave']._l10n_bd_get_pending_domains(sample['user'])
+    for stage, domain in pending.items():
+        checks.append(('dashboard %s queue' % stage, 'hr.leave', domain, {'limit': 20}, {}))
+    return checks
+
+
+def get_table_rows(env, table):
+    # Counted, as pg_class.reltuples is stale until the table is analyzed
+    env.cr.execute(SQL('SELECT COUNT(*) FROM %s', SQL.identifier(table)))
+    return env.cr.fetchone()[0]
+
+
+def iter_plan_nodes(node):
+    yield node
+    for child in node.get('Plans', []):
+        yield from iter_plan_nodes(child)
+
+
+def explain(env, model, domain, search_kwargs, context):
+    """Return the JSON plan of the SQL the ORM generates for the domain"""
+    records = env[model].with_context(**context)
+    query = records._search(domain, **search_kwargs)
+    env.cr.execute(SQL('EXPLAIN (FORMAT JSON) %s', query.select()))
+    return env.cr.fetchone()[0][0]['Plan']
+
+
+def get_seq_scans(plan, table_rows, threshold=DEFAULT_THRESHOLD):
+    """Return the watched tables sequentially scanned by the plan above the threshold"""
+    return [
+        node['Relation Name'] for node in iter_plan_nodes(plan)
+        if node.get('Node Type') == 'Seq Scan'
+        and node.get('Relation Name') in table_rows
+        and table_rows[node['Relation Name']] > threshold
+    ]
+
+
+def check(env, sample, threshold=DEFAULT_THRESHOLD):
+    """Explain every hot domain and return the offending sequential scans"""
+    table_rows = {table: get_table_rows(env, table) for table in WATCHED_TABLES}
+    failures = []
+    for label, model, domain, search_kwargs, context in get_hot_domains(env, sample):
+        plan = explain(env, model, domain, search_kwargs, context)
+        scans = get_seq_scans(plan, table_rows, threshold)
+        status = 'SEQ SCAN on %s' % ', '.join(scans) if scans else 'ok'
+        _logger.info('%s: %s (cost %.0f)', label, status, plan['Total Cost'])
+        if scans:
+            failures.append((label, scans, plan))
+    return failures
+
+
+def run(env, employees=300, leaves_per_employee=30, years=3, threshold=DEFAULT_THRESHOLD, keep=False,
+        analyze=False):
+    """Seed, explain and roll back; raise AssertionError on sequential scans"""
+    failures = []
+    try:
+        with env.cr.savepoint():
+            sample = seed(env, employees=employees, leaves_per_employee=leaves_per_employee, years=years,
+                          analyze=analyze)
+            failures = check(env, sample, threshold=threshold)
+            if not keep:
+                raise _Rollback()
+    except _Rollback:
+        # Seeded records are gone, so are the caches that may reference them
+        env.invalidate_all(flush=False)
+        env.registry.clear_cache()
+
+    if failures:
+        raise AssertionError('Sequential scans above %s rows in: %s' % (
+            threshold, ', '.join(label for label, __, __ in failures)))
+    return True
\ No newline at end of file
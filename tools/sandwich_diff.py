@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Differential harness for the sandwich rule.
+
+Generates random weekly calendars, public holidays, neighbouring leaves
+and request ranges, evaluates each case with the reference implementation
+(leave_rules.sandwich_extension) and with a candidate engine, and compares
+the days charged to the employee one by one. On the first disagreement the
+case is shrunk to the smallest input that still disagrees and printed.
+
+Usage:
+    python3 tools/sandwich_diff.py --runs 20000 --seed 42
+    python3 tools/sandwich_diff.py --engine my_module:my_engine
+
+A candidate engine is a callable taking a Case and returning the (before,
+after) sandwich days. The default candidate is the bitmap engine,
+leave_rules.sandwich_extension_fast. Exits with status 1 on disagreement.
+"""
+import argparse
+import importlib
+import random
+import sys
+from dataclasses import dataclass, replace
+from datetime import date, timedelta
+
+try:
+    from . import leave_rules
+except ImportError:
+    # Run as a script from the tools directory
+    import leave_rules
+
+ONE_DAY = timedelta(days=1)
+EPOCH = date(2025, 1, 1)
+
+
+@dataclass(frozen=True)
+class Case:
+    date_from: date
+    date_to: date
+    weekly_off: frozenset   # weekday() numbers of the weekly days off
+    holidays: tuple         # (start, end) public holiday spans
+    neighbours: tuple       # (start, end) other leaves of the employee
+    max_check: int
+
+    def is_non_working(self, day):
+        return day.weekday() in self.weekly_off or any(start <= day <= end for start, end in self.holidays)
+
+    def window(self):
+        days = [self.date_from, self.date_to]
+        for start, end in self.holidays + self.neighbours:
+            days += [start, end]
+        margin = timedelta(days=self.max_check + 2)
+        return min(days) - margin, max(days) + margin
+
+
+# ========================================
+# ENGINES
+# ========================================
+
+def reference_engine(case):
+    neighbours = [leave_rules.LeaveSpan(start, end) for start, end in case.neighbours]
+    return leave_rules.sandwich_extension(
+        case.date_from, case.date_to, case.is_non_working, neighbours, max_check=case.max_check)
+
+
+def bitmap_engine(case):
+    window_start, window_end = case.window()
+    non_working = []
+    day = window_start
+    while day <= window_end:
+        if case.is_non_working(day):
+            non_working.append(day)
+        day += ONE_DAY
+    calendar = leave_rules.BitmapCalendar.from_days(window_start, window_end, non_working)
+    index = leave_rules.SpanIndex.from_spans(
+        [leave_rules.LeaveSpan(start, end) for start, end in case.neighbours])
+    return leave_rules.sandwich_extension_fast(
+        case.date_from, case.date_to, calendar, index, max_check=case.max_check)
+
+
+def load_engine(spec):
+    module_name, __, function_name = spec.partition(':')
+    return getattr(importlib.import_module(module_name), function_name)
+
+
+def charged_days(case, engine):
+    """Set of the days charged to the employee: the leave and its sandwich days"""
+    before, after = engine(case)
+    if case.date_from > case.date_to:
+        return frozenset()
+    first = case.date_from - before * ONE_DAY
+    last = case.date_to + after * ONE_DAY
+    return frozenset(first + offset * ONE_DAY for offset in range((last - first).days + 1))
+
+
+def disagrees(case, candidate):
+    try:
+        return charged_days(case, reference_engine) != charged_days(case, candidate)
+    except Exception:
+        # A crashing candidate disagrees as well
+        return True
+
+
+# ========================================
+# GENERATION
+# ========================================
+
+def random_span(rng, start, spread, max_length):
+    first = start + timedelta(days=rng.randrange(spread))
+    return first, first + timedelta(days=rng.randrange(max_length))
+
+
+def random_case(rng):
+    start = EPOCH + timedelta(days=rng.randrange(365))
+    weekly_off = frozenset(rng.sample(range(7), rng.choice([0, 1, 2, 2, 2, 3])))
+    holidays = tuple(sorted(random_span(rng, start - timedelta(days=10), 30, 4) for __ in range(rng.randrange(4))))
+    neighbours = tuple(sorted(random_span(rng, start - timedelta(days=12), 34, 5) for __ in range(rng.randrange(5))))
+    date_from, date_to = random_span(rng, start, 7, 6)
+    if rng.random() < 0.02:
+        # Invalid ranges must be handled the same way
+        date_from, date_to = date_to + ONE_DAY, date_from
+    return Case(date_from, date_to, weekly_off, holidays, neighbours, rng.choice([1, 3, 7, 7, 7, 10]))
+
+
+# ========================================
+# SHRINKING
+# ========================================
+
+def shrink_candidates(case):
+    """Yield strictly smaller variants of the case"""
+    for field in ('holidays', 'neighbours'):
+        spans = getattr(case, field)
+        for index in range(len(spans)):
+            yield replace(case, **{field: spans[:index] + spans[index + 1:]})
+        for index, (start, end) in enumerate(spans):
+            if start < end:
+                yield replace(case, **{field: spans[:index] + ((start + ONE_DAY, end),) + spans[index + 1:]})
+                yield replace(case, **{field: spans[:index] + ((start, end - ONE_DAY),) + spans[index + 1:]})
+    for weekday in sorted(case.weekly_off):
+        yield replace(case, weekly_off=case.weekly_off - {weekday})
+    if case.date_from < case.date_to:
+        yield replace(case, date_from=case.date_from + ONE_DAY)
+        yield replace(case, date_to=case.date_to - ONE_DAY)
+    if case.max_check > 1:
+        yield replace(case, max_check=case.max_check - 1)
+
+
+def shrink(case, candidate):
+    """Greedily apply the first smaller variant that still disagrees, until none does"""
+    progress = True
+    while progress:
+        progress = False
+        for smaller in shrink_candidates(case):
+            if disagrees(smaller, candidate):
+                case = smaller
+                progress = True
+                break
+    return case
+
+
+def describe(case, candidate):
+    lines = [
+        'Request:     %s .. %s' % (case.date_from, case.date_to),
+        'Weekly off:  %s' % (', '.join(date(2024, 1, 1 + weekday).strftime('%A') for weekday in sorted(case.weekly_off)) or '-'),
+        'Holidays:    %s' % (', '.join('%s..%s' % span for span in case.holidays) or '-'),
+        'Neighbours:  %s' % (', '.join('%s..%s' % span for span in case.neighbours) or '-'),
+        'Max check:   %s' % case.max_check,
+    ]
+    expected = charged_days(case, reference_engine)
+    try:
+        actual = charged_days(case, candidate)
+        lines += [
+            'Reference:   %s -> %s' % (reference_engine(case), sorted(day.isoformat() for day in expected)),
+            'Candidate:   %s -> %s' % (candidate(case), sorted(day.isoformat() for day in actual)),
+            'Only in reference: %s' % sorted(day.isoformat() for day in expected - actual),
+            'Only in candidate: %s' % sorted(day.isoformat() for day in actual - expected),
+        ]
+    except Exception as e:
+        lines.append('Candidate raised: %r' % e)
+    return '\n'.join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=10000)
+    parser.add_argument('--seed', type=int, default=None, help='Random seed, printed when omitted')
+    parser.add_argument('--engine', help='Candidate engine as module:function (default: the bitmap engine)')
+    args = parser.parse_args()
+
+    seed = args.seed if args.seed is not None else random.randrange(2 ** 32)
+    candidate = load_engine(args.engine) if args.engine else bitmap_engine
+    rng = random.Random(seed)
+    print('Seed: %d' % seed)
+
+    for run in range(1, args.runs + 1):
+        case = random_case(rng)
+        if disagrees(case, candidate):
+            smallest = shrink(case, candidate)
+            print('Disagreement after %d cases, smallest input:' % run)
+            print(describe(smallest, candidate))
+            sys.exit(1)
+    print('%d cases, no disagreement' % args.runs)
+
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
@@ -1,3 +1,8 @@
 # -*- coding: utf-8 -*-
 from . import hr_leave_refuse_wizard
-from . import hr_leave_carryover_wizard
\ No newline at end of file
+from . import hr_leave_carryover_wizard
+from . import hr_leave_projection_wizard
+from . import hr_leave_archive_wizard
+from . import hr_leave_approver_assign_wizard
+from . import hr_leave_closure_wizard
+from . import hr_leave_policy_replay_wizard
\ No newline at end of file
@@ -0,0 +1,194 @@
+# -*- coding: utf-8 -*-
+from odoo import models, fields, _
+from odoo.exceptions import UserError
+
+# Wizard target field -> hr.employee approver field
+APPROVER_FIELDS = {
+    'recommender_id': 'leave_recommender_id',
+    'forwarder_id': 'leave_forwarder_id',
+    'approver_id': 'leave_manager_id',
+}
+
+
+class HrLeaveApproverAssignWizard(models.TransientModel):
+    _name = 'hr.leave.approver.assign.wizard'
+    _description = 'Bulk Leave Approver Assignment'
+    
+    # ========================================
+    # SCOPE
+    # ========================================
+    
+    department_ids = fields.Many2many(
+        'hr.department',
+        string='Departments'
+    )
+    
+    include_sub_departments = fields.Boolean(
+        string='Include Sub-Departments',
+        default=True
+    )
+    
+    job_ids = fields.Many2many(
+        'hr.job',
+        string='Job Positions'
+    )
+    
+    manager_id = fields.Many2one(
+        'hr.employee',
+        string='Reporting To',
+        help='Apply to every employee below this manager in the hierarchy'
+    )
+    
+    # ========================================
+    # ASSIGNMENT
+    # ========================================
+    
+    recommender_id = fields.Many2one(
+        'res.users',
+        string='Leave Recommender',
+        domain="[('share', '=', False)]"
+    )
+    
+    forwarder_id = fields.Many2one(
+        'res.users',
+        string='Leave Forwarder',
+        domain="[('share', '=', False)]"
+    )
+    
+    approver_id = fields.Many2one(
+        'res.users',
+        string='Leave Approver',
+        domain="[('share', '=', False)]"
+    )
+    
+    overwrite = fields.Boolean(
+        string='Overwrite Existing',
+        default=False,
+        help='If disabled, only employees without a value are updated'
+    )
+    
+    line_ids = fields.One2many(
+        'hr.leave.approver.assign.line',
+        'wizard_id',
+        string='Changes',
+        readonly=True
+    )
+    
+    state = fields.Selection([
+        ('draft', 'Draft'),
+        ('preview', 'Preview'),
+        ('done', 'Done'),
+    ], default='draft')
+
+    def _get_employee_domain(self):
+        self.ensure_one()
+        domain = []
+        if self.department_ids:
+            operator = 'child_of' if self.include_sub_departments else 'in'
+            domain.append(('department_id', operator, self.department_ids.ids))
+        if self.job_ids:
+            domain.append(('job_id', 'in', self.job_ids.ids))
+        if self.manager_id:
+            domain += [('parent_id', 'child_of', self.manager_id.id), ('id', '!=', self.manager_id.id)]
+        if not domain:
+            raise UserError(_('Please select departments, job positions or a manager.'))
+        return domain
+    
+    def _reopen(self):
+        return {
+            'type': 'ir.actions.act_window',
+            'res_model': 'hr.leave.approver.assign.wizard',
+            'res_id': self.id,
+            'view_mode': 'form',
+            'target': 'new',
+        }
+
+    def action_preview(self):
+        """Compute the changes the assignment would make, without applying them"""
+        self.ensure_one()
+        
+        targets = {
+            employee_field: self[wizard_field]
+            for wizard_field, employee_field in APPROVER_FIELDS.items()
+            if self[wizard_field]
+        }
+        if not targets:
+            raise UserError(_('Please select at least one recommender, forwarder or approver.'))
+        
+        employees = self.env['hr.employee'].search(self._get_employee_domain())
+        
+        lines = []
+        for employee in employees:
+            for employee_field, user in targets.items():
+                current = employee[employee_field]
+                if current == user or (current and not self.overwrite):
+                    continue
+                lines.append({
+                    'employee_id': employee.id,
+                    'field_name': employee_field,
+                    'old_user_id': current.id,
+                    'new_user_id': user.id,
+                })
+        
+        self.line_ids.unlink()
+        self.write({
+            'line_ids': [(0, 0, vals) for vals in lines],
+            'state': 'preview',
+        })
+        return self._reopen()
+
+    def action_apply(self):
+        """Apply the previewed changes with one write per group of identical updates"""
+        self.ensure_one()
+        if self.state != 'preview':
+            raise UserError(_('Please preview the changes first.'))
+        
+        # Group employees by the set of fields they receive, so every group
+        # is updated by a single write on the whole recordset.
+        updates = {}
+        for line in self.line_ids:
+            updates.setdefault(line.employee_id, {})[line.field_name] = line.new_user_id.id
+        
+        groups = {}
+        for employee, values in updates.items():
+            groups.setdefault(tuple(sorted(values.items())), []).append(employee.id)
+        
+        Employee = self.env['hr.employee']
+        for values, employee_ids in groups.items():
+            Employee.browse(employee_ids).write(dict(values))
+        
+        self.state = 'done'
+        return self._reopen()
+
+
+class HrLeaveApproverAssignLine(models.TransientModel):
+    _name = 'hr.leave.approver.assign.line'
+    _description = 'Bulk Leave Approver Assignment Change'
+    
+    wizard_id = fields.Many2one(
+        'hr.leave.approver.assign.wizard',
+        required=True,
+        ondelete='cascade'
+    )
+    
+    employee_id = fields.Many2one(
+        'hr.employee',
+        string='Employee',
+        required=True
+    )
+    
+    field_name = fields.Selection([
+        ('leave_recommender_id', 'Recommender'),
+        ('leave_forwarder_id', 'Forwarder'),
+        ('leave_manager_id', 'Approver'),
+    ], string='Role', required=True)
+    
+    old_user_id = fields.Many2one(
+        'res.users',
+        string='Current'
+    )
+    
+    new_user_id = fields.Many2one(
+        'res.users',
+        string='New'
+    )
\ No newline at end of file
@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+from datetime import date
+
+from odoo import models, fields, _
+
+
+class HrLeaveArchiveWizard(models.TransientModel):
+    _name = 'hr.leave.archive.wizard'
+    _description = 'Leave Year Archive Wizard'
+    
+    year = fields.Integer(
+        string='Year',
+        required=True,
+        default=lambda self: date.today().year - 2
+    )
+    
+    mode = fields.Selection([
+        ('archive', 'Archive Year'),
+        ('restore', 'Restore Year'),
+    ], string='Operation', required=True, default='archive')
+    
+    result_message = fields.Text(
+        string='Result',
+        readonly=True
+    )
+
+    def action_process(self):
+        """Archive or restore the selected year"""
+        self.ensure_one()
+        
+        Summary = self.env['hr.leave.year.summary']
+        if self.mode == 'archive':
+            result = Summary.archive_year(self.year)
+            message = _('Archived %(leaves)s leaves and %(allocations)s allocations of %(year)s.')
+        else:
+            result = Summary.restore_year(self.year)
+            message = _('Restored %(leaves)s leaves and %(allocations)s allocations of %(year)s.')
+        
+        self.result_message = message % dict(result, year=self.year)
+        
+        return {
+            'type': 'ir.actions.act_window',
+            'res_model': 'hr.leave.archive.wizard',
+            'res_id': self.id,
+            'view_mode': 'form',
+            'target': 'new',
+        }
\ No newline at end of file
@@ -1,4 +1,6 @@
 # -*- coding: utf-8 -*-
+import time
+
 from odoo import models, fields, api, _
 from odoo.exceptions import UserError
 from datetime import date
@@ -35,6 +37,7 @@ class HrLeaveCarryoverWizard(models.TransientModel):
     def action_process_carryover(self):
         """Process carryover based on wizard selections"""
         self.ensure_one()
+        started = time.monotonic()
         
         Allocation = self.env['hr.leave.allocation']
         
@@ -70,6 +73,8 @@ class HrLeaveCarryoverWizard(models.TransientModel):
                         }
                     )
         
+        Allocation._l10n_bd_record_run_metrics('carryover', started, processed_count)
+        
         if processed_count == 0:
             result_message = _('No carryover allocations created. Either no unused days found or carryover already processed.')
         else:
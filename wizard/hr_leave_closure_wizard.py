@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+from odoo import models, fields, api, _
+from odoo.exceptions import UserError
+from odoo.tools.safe_eval import safe_eval
+
+
+class HrLeaveClosureWizard(models.TransientModel):
+    _name = 'hr.leave.closure.wizard'
+    _description = 'Mandated Closure Leave Wizard'
+    
+    name = fields.Char(
+        string='Description',
+        required=True,
+        help='E.g. Extended Eid Holiday'
+    )
+    
+    employee_domain = fields.Char(
+        string='Employees',
+        default="[('active', '=', True)]",
+        required=True
+    )
+    
+    employee_count = fields.Integer(
+        string='Matching Employees',
+        compute='_compute_employee_count'
+    )
+    
+    holiday_status_id = fields.Many2one(
+        'hr.leave.type',
+        string='Leave Type',
+        required=True
+    )
+    
+    date_from = fields.Date(
+        string='From',
+        required=True
+    )
+    
+    date_to = fields.Date(
+        string='To',
+        required=True
+    )
+    
+    auto_approve = fields.Boolean(
+        string='Approve Immediately',
+        default=True,
+        help='Validate the created leaves right away, without the recommend/forward/approve chain'
+    )
+    
+    result_message = fields.Text(
+        string='Result',
+        readonly=True
+    )
+
+    @api.depends('employee_domain')
+    def _compute_employee_count(self):
+        for wizard in self:
+            try:
+                wizard.employee_count = self.env['hr.employee'].search_count(safe_eval(wizard.employee_domain or '[]'))
+            except Exception:
+                wizard.employee_count = 0
+
+    def action_create_leaves(self):
+        """Create the closure leave for every matching employee"""
+        self.ensure_one()
+        
+        if self.date_from > self.date_to:
+            raise UserError(_('The closure must end after it starts.'))
+        
+        result = self.env['hr.leave'].l10n_bd_create_closure_leaves(
+            safe_eval(self.employee_domain or '[]'),
+            self.holiday_status_id.id,
+            self.date_from,
+            self.date_to,
+            name=self.name,
+            auto_approve=self.auto_approve,
+        )
+        
+        message = _('Created %(created)s leaves, approved %(approved)s.') % result
+        if result['skipped']:
+            message += '\n' + _('Skipped (already on leave or no working day): %s') % ', '.join(result['skipped'])
+        if result['failed']:
+            employees = self.env['hr.employee'].browse([failure['employee_id'] for failure in result['failed']])
+            names = dict(zip(employees.ids, employees.mapped('name')))
+            message += '\n' + _('Failed:') + ''.join(
+                '\n- %s: %s' % (names.get(failure['employee_id'], failure['employee_id']), failure['error'])
+                for failure in result['failed']
+            )
+        self.result_message = message
+        
+        return {
+            'type': 'ir.actions.act_window',
+            'res_model': 'hr.leave.closure.wizard',
+            'res_id': self.id,
+            'view_mode': 'form',
+            'target': 'new',
+        }
\ No newline at end of file
@@ -0,0 +1,161 @@
+# -*- coding: utf-8 -*-
+import base64
+import csv
+import io
+from datetime import date
+
+from odoo import models, fields, api, _
+
+REPLAY_COLUMNS = [
+    'employee_id', 'employee', 'leaves',
+    'days_current', 'days_proposed', 'days_delta',
+    'notice_violations_current', 'notice_violations_proposed',
+    'max_days_violation_current', 'max_days_violation_proposed',
+    'carryover_current', 'carryover_proposed', 'carryover_delta',
+]
+
+
+class HrLeavePolicyReplayWizard(models.TransientModel):
+    _name = 'hr.leave.policy.replay.wizard'
+    _description = 'Leave Policy What-If Replay'
+    
+    holiday_status_id = fields.Many2one(
+        'hr.leave.type',
+        string='Leave Type',
+        required=True
+    )
+    
+    year = fields.Integer(
+        string='Year',
+        required=True,
+        default=lambda self: date.today().year - 1
+    )
+    
+    company_id = fields.Many2one(
+        'res.company',
+        string='Company',
+        required=True,
+        default=lambda self: self.env.company
+    )
+    
+    # Proposed policy, starting from the current one of the leave type
+    is_sandwich_leave = fields.Boolean(
+        string='Apply Sandwich Rule',
+        compute='_compute_policy',
+        store=True,
+        readonly=False
+    )
+    
+    notice_days = fields.Integer(
+        string='Min Notice Days',
+        compute='_compute_policy',
+        store=True,
+        readonly=False
+    )
+    
+    max_days_per_year = fields.Integer(
+        string='Max Days Per Year',
+        compute='_compute_policy',
+        store=True,
+        readonly=False
+    )
+    
+    carryover_allowed = fields.Boolean(
+        string='Allow Carryover',
+        compute='_compute_policy',
+        store=True,
+        readonly=False
+    )
+    
+    carryover_max_days = fields.Integer(
+        string='Max Carryover Days',
+        compute='_compute_policy',
+        store=True,
+        readonly=False
+    )
+    
+    result_message = fields.Text(
+        string='Result',
+        readonly=True
+    )
+    
+    report_file = fields.Binary(
+        string='Report',
+        readonly=True,
+        attachment=False
+    )
+    
+    report_filename = fields.Char(
+        string='Report Filename',
+        readonly=True
+    )
+
+    @api.depends('holiday_status_id')
+    def _compute_policy(self):
+        for wizard in self:
+            leave_type = wizard.holiday_status_id
+            wizard.is_sandwich_leave = leave_type.l10n_bd_is_sandwich_leave
+            wizard.notice_days = leave_type.l10n_bd_notice_days
+            wizard.max_days_per_year = leave_type.l10n_bd_max_days_per_year
+            wizard.carryover_allowed = leave_type.l10n_bd_carryover_allowed
+            wizard.carryover_max_days = leave_type.l10n_bd_carryover_max_days
+
+    def action_replay(self):
+        """Replay the year under the proposed policy and attach the deltas as a CSV file"""
+        self.ensure_one()
+        
+        proposed = {
+            'sandwich': self.is_sandwich_leave,
+            'notice_days': self.notice_days,
+            'max_days': self.max_days_per_year,
+            'carryover_allowed': self.carryover_allowed,
+            'carryover_max_days': self.carryover_max_days,
+        }
+        
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=REPLAY_COLUMNS)
+        writer.writeheader()
+        totals = dict.fromkeys(REPLAY_COLUMNS[2:], 0)
+        employees = changed = 0
+        # Rows are written as they are replayed, only the totals are kept
+        for row in self.holiday_status_id.l10n_bd_replay_policy(self.year, proposed, self.company_id.id):
+            writer.writerow(row)
+            employees += 1
+            changed += any(row[key] for key in ('days_delta', 'carryover_delta')) or \
+                row['notice_violations_current'] != row['notice_violations_proposed'] or \
+                row['max_days_violation_current'] != row['max_days_violation_proposed']
+            for key in totals:
+                totals[key] += row[key]
+        
+        self.write({
+            'report_file': base64.b64encode(buffer.getvalue().encode()),
+            'report_filename': 'policy_replay_%s_%s.csv' % (self.holiday_status_id.name, self.year),
+            'result_message': _(
+                '%(employees)s employees replayed, %(changed)s affected.\n'
+                'Leave days: %(days_current)s -> %(days_proposed)s (%(days_delta)+g)\n'
+                'Notice violations: %(notice_current)s -> %(notice_proposed)s\n'
+                'Over the yearly maximum: %(max_current)s -> %(max_proposed)s employees\n'
+                'Carried over: %(carryover_current)s -> %(carryover_proposed)s days (%(carryover_delta)+g)'
+            ) % {
+                'employees': employees,
+                'changed': changed,
+                'days_current': round(totals['days_current'], 2),
+                'days_proposed': round(totals['days_proposed'], 2),
+                'days_delta': round(totals['days_delta'], 2),
+                'notice_current': totals['notice_violations_current'],
+                'notice_proposed': totals['notice_violations_proposed'],
+                'max_current': totals['max_days_violation_current'],
+                'max_proposed': totals['max_days_violation_proposed'],
+                'carryover_current': round(totals['carryover_current'], 2),
+                'carryover_proposed': round(totals['carryover_proposed'], 2),
+                'carryover_delta': round(totals['carryover_delta'], 2),
+            },
+        })
+        
+        return {
+            'type': 'ir.actions.act_window',
+            'res_model': 'hr.leave.policy.replay.wizard',
+            'res_id': self.id,
+            'view_mode': 'form',
+            'target': 'new',
+        }
\ No newline at end of file
@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+import base64
+import csv
+import io
+from datetime import date
+
+from odoo import models, fields, _
+
+PROJECTION_COLUMNS = [
+    'employee', 'leave_type', 'allocated', 'taken', 'planned', 'closing_balance',
+    'carryover', 'forfeited', 'expiry_exposure', 'expiry_date',
+]
+
+
+class HrLeaveProjectionWizard(models.TransientModel):
+    _name = 'hr.leave.projection.wizard'
+    _description = 'Year-End Leave Balance Projection'
+    
+    year = fields.Integer(
+        string='Year',
+        required=True,
+        default=lambda self: date.today().year
+    )
+    
+    company_id = fields.Many2one(
+        'res.company',
+        string='Company',
+        required=True,
+        default=lambda self: self.env.company
+    )
+    
+    result_message = fields.Text(
+        string='Result',
+        readonly=True
+    )
+    
+    report_file = fields.Binary(
+        string='Report',
+        readonly=True,
+        attachment=False
+    )
+    
+    report_filename = fields.Char(
+        string='Report Filename',
+        readonly=True
+    )
+
+    def action_project(self):
+        """Compute the projection and attach it as a CSV file"""
+        self.ensure_one()
+        
+        rows = self.env['hr.leave.allocation'].l10n_bd_project_year_end(self.company_id.id, self.year)
+        
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=PROJECTION_COLUMNS, extrasaction='ignore')
+        writer.writeheader()
+        writer.writerows(rows)
+        
+        self.write({
+            'report_file': base64.b64encode(buffer.getvalue().encode()),
+            'report_filename': 'year_end_projection_%s_%s.csv' % (self.company_id.name, self.year),
+            'result_message': _(
+                '%(count)s balances projected for %(employees)s employees.\n'
+                'Carried over: %(carryover)s days\n'
+                'Forfeited to carryover limits: %(forfeited)s days\n'
+                'Exposed to carryover expiry: %(exposure)s days'
+            ) % {
+                'count': len(rows),
+                'employees': len({row['employee_id'] for row in rows}),
+                'carryover': round(sum(row['carryover'] for row in rows), 2),
+                'forfeited': round(sum(row['forfeited'] for row in rows), 2),
+                'exposure': round(sum(row['expiry_exposure'] for row in rows), 2),
+            },
+        })
+        
+        return {
+            'type': 'ir.actions.act_window',
+            'res_model': 'hr.leave.projection.wizard',
+            'res_id': self.id,
+            'view_mode': 'form',
+            'target': 'new',
+        }
\ No newline at end of file
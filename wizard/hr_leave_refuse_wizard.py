@@ -2,6 +2,8 @@
 from odoo import models, fields, api, _
 from odoo.exceptions import UserError
 
+from ..models.hr_leave import REFUSE_REASONS
+
 
 class HrLeaveRefuseWizard(models.TransientModel):
     _name = 'hr.leave.refuse.wizard'
@@ -21,21 +23,27 @@ class HrLeaveRefuseWizard(models.TransientModel):
         readonly=True
     )
     
-    refuse_reason = fields.Selection([
-        ('insufficient_balance', 'Insufficient Leave Balance'),
-        ('workload', 'Critical Workload/Project Deadline'),
-        ('overlap', 'Overlapping with Other Leaves'),
-        ('notice', 'Insufficient Notice Period'),
-        ('document', 'Missing Supporting Documents'),
-        ('policy', 'Policy Violation'),
-        ('other', 'Other Reason'),
-    ], string='Refuse Reason', required=True)
+    refuse_reason = fields.Selection(
+        REFUSE_REASONS,
+        string='Refuse Reason',
+        compute='_compute_refuse_reason',
+        store=True,
+        readonly=False,
+        required=True
+    )
     
     refuse_notes = fields.Text(
         string='Additional Notes',
         help='Provide additional details for the refusal'
     )
 
+    @api.depends('leave_id')
+    def _compute_refuse_reason(self):
+        """Suggest the overlap reason for requests submitted over the team capacity"""
+        for wizard in self:
+            if not wizard.refuse_reason and wizard.leave_id.l10n_bd_capacity_exceeded:
+                wizard.refuse_reason = 'overlap'
+
     def action_refuse(self):
         """Refuse the leave request with reason"""
         self.ensure_one()
@@ -43,18 +51,6 @@ class HrLeaveRefuseWizard(models.TransientModel):
         if not self.leave_id:
             raise UserError(_('No leave request selected.'))
         
-        reason_labels = dict(self._fields['refuse_reason'].selection)
-        reason_text = reason_labels.get(self.refuse_reason, self.refuse_reason)
-        
-        message = _('Leave Request Refused - Reason: %s') % reason_text
-        if self.refuse_notes:
-            message += _(' - Notes: %s') % self.refuse_notes
-        
-        self.leave_id.action_refuse()
-        self.leave_id.message_post(
-            body=message,
-            message_type='comment',
-            subtype_xmlid='mail.mt_note'
-        )
+        self.leave_id._l10n_bd_refuse_with_reason(self.refuse_reason, self.refuse_notes)
         
         return {'type': 'ir.actions.act_window_close'}
\ No newline at end of file